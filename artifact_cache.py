@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+
+from search_cache import SearchCache
+
+# Stages of a research run, in order, each cached under its own key
+STAGES = ("plan", "findings", "synthesis", "report")
+
+# Default freshness per stage, in seconds. Plans depend only on the query and
+# syntheses only on their input findings, so they keep; findings age with the web.
+DEFAULT_TTLS = {
+    "plan": 7 * 24 * 3600,
+    "findings": 6 * 3600,
+    "synthesis": 7 * 24 * 3600,
+    "report": 24 * 3600,
+}
+
+
+def digest(value) -> str:
+    """
+    Content hash of any JSON-serializable value; dict key order does not matter.
+    """
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def query_key(query: str) -> str:
+    """
+    Cache identity of a query for artifacts that answer it (plans and
+    reports): the exact text, casefolded and whitespace-normalized. Unlike
+    the search cache's canonical key it keeps every word and the word
+    order, so "who founded X" and "when was X founded" never share a
+    report. A blank query is keyed by a hash of its raw text.
+    """
+    normalized = " ".join(query.casefold().split())
+    return normalized if normalized else f"raw:{digest(query)}"
+
+
+class ArtifactCache:
+    """
+    Content-addressed cache of research run artifacts.
+    Each stage is keyed by a hash of exactly what it was computed from, so
+    a repeated query hits every stage, while a query that plans the same
+    tasks reuses the cached findings and synthesis and only renders a new
+    report for its own user profile. Entries live in a SearchCache (memory
+    LRU plus optional shared SQLite tier) with a freshness TTL per stage;
+    a TTL of 0 turns caching off for that stage. get() and set() are
+    coroutines so the SQLite tier is only touched off the event loop.
+    """
+
+    def __init__(self, store: SearchCache = None, ttls: dict = None):
+        self.store = store or SearchCache(max_entries=256)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.hits = dict.fromkeys(STAGES, 0)
+        self.misses = dict.fromkeys(STAGES, 0)
+
+    def key(self, stage: str, *parts) -> str:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage} (expected one of {', '.join(STAGES)})")
+        return f"{stage}:{digest(parts)}"
+
+    async def get(self, stage: str, key: str):
+        """
+        The cached artifact, or None if it is missing, stale or the stage is not cached.
+        """
+        if self.ttls[stage] <= 0:
+            return None
+        payload = await self.store.aget(key)
+        if payload is None:
+            self.misses[stage] += 1
+            return None
+        self.hits[stage] += 1
+        return json.loads(payload)
+
+    async def set(self, stage: str, key: str, value):
+        if self.ttls[stage] > 0:
+            await self.store.aset(key, json.dumps(value), ttl=self.ttls[stage])
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self) -> dict:
+        return {"hits": dict(self.hits), "misses": dict(self.misses), "store": self.store.stats()}
+
+
+def create_artifact_cache() -> ArtifactCache:
+    """
+    Build an ArtifactCache from environment variables.
+    ARTIFACT_TTL_PLAN, ARTIFACT_TTL_FINDINGS, ARTIFACT_TTL_SYNTHESIS and
+    ARTIFACT_TTL_REPORT set per-stage freshness in seconds; set
+    ARTIFACT_CACHE_PATH to share artifacts across processes through SQLite.
+    """
+    ttls = {stage: float(os.getenv(f"ARTIFACT_TTL_{stage.upper()}", str(ttl))) for stage, ttl in DEFAULT_TTLS.items()}
+    return ArtifactCache(
+        SearchCache(
+            max_entries=int(os.getenv("ARTIFACT_CACHE_MAX_ENTRIES", "256")),
+            max_bytes=int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            ttl=max(ttls.values()),
+            disk_path=os.getenv("ARTIFACT_CACHE_PATH") or None,
+        ),
+        ttls,
+    )
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+
+ID_FIELDS = ("id", "query_id", "request_id")
+QUERY_FIELDS = ("query", "question", "body", "title")
+
+
+def load_queries(path: str) -> list[dict]:
+    """
+    Read queries from a JSONL file.
+    Each line needs an id (id, query_id or request_id) and the query text
+    (query, question, body or title). Lines without an id are numbered.
+    """
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            query_id = next((str(data[field]) for field in ID_FIELDS if data.get(field)), f"line-{line_number}")
+            query = next((data[field] for field in QUERY_FIELDS if data.get(field)), None)
+            if query is None:
+                raise ValueError(f"{path}:{line_number} has no query text")
+            records.append({"id": query_id, "query": query})
+    return records
+
+
+def _terminate_partial_line(path: str):
+    # A crash mid-write leaves a line without "\n"; start appending on a fresh line
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def completed_ids(output_path: str) -> set:
+    """
+    IDs that already have a successful result in output_path.
+    A truncated last line (e.g. from a crash mid-write) is ignored.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+            if data.get("status") == "ok":
+                done.add(data["id"])
+    return done
+
+
+async def research_batch(records: list[dict], output_path: str, concurrency: int = 4, mode: str = None,
+                         system=None, resume: bool = True) -> dict:
+    """
+    Research many queries concurrently with one shared DeepResearchSystem,
+    so every run shares the same search client pool, cache and limiters.
+    Each result is appended to output_path as soon as it finishes; with
+    resume=True, IDs that already succeeded there are skipped.
+    Returns a summary with counts and wall time.
+    """
+    if system is None:
+        from deep_research_system import DeepResearchSystem
+        system = DeepResearchSystem()
+
+    skip = completed_ids(output_path) if resume else set()
+    pending = [record for record in records if record["id"] not in skip]
+    queue = asyncio.Queue()
+    for record in pending:
+        queue.put_nowait(record)
+
+    summary = {"total": len(records), "skipped": len(records) - len(pending), "ok": 0, "error": 0}
+    start = time.perf_counter()
+
+    _terminate_partial_line(output_path)
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        def write(result):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+        async def worker():
+            while not queue.empty():
+                record = queue.get_nowait()
+                result = {"id": record["id"], "query": record["query"]}
+                try:
+                    async for event in system.research_stream(record["query"], mode):
+                        if event["type"] == "done":
+                            result.update(status="ok", output=event["output"], timings=event["timings"])
+                except Exception as e:
+                    result.update(status="error", error=str(e))
+
+                summary[result["status"]] += 1
+                write(result)
+                print(f"{'✅' if result['status'] == 'ok' else '❌'} [{summary['ok'] + summary['error']}/{len(pending)}] {record['id']}")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run research for every query in a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one query per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mode", choices=["handoff", "pipeline"], default=None)
+    parser.add_argument("--no-resume", action="store_true", help="rerun IDs that already succeeded")
+    args = parser.parse_args()
+
+    summary = asyncio.run(research_batch(
+        load_queries(args.input), args.output,
+        concurrency=args.concurrency, mode=args.mode, resume=not args.no_resume,
+    ))
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Cold-start benchmark: import time of the package entry points and time to
+construct a DeepResearchSystem, each measured in a fresh interpreter.
+
+    python -m benchmarks.bench_import                 # check against the budget
+    python -m benchmarks.bench_import --save-budget   # store current numbers (+ headroom)
+
+Clients and agents are built on first use, so importing the system must not
+load the agents SDK or need GEMINI_API_KEY; both are checked on every run.
+Exits 1 when a measurement exceeds benchmarks/import_budget.json.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+DEFAULT_BUDGET = HERE / "import_budget.json"
+
+# name -> statement timed in a fresh interpreter
+TARGETS = {
+    "import_deep_research_system": "import deep_research_system",
+    "construct_system": "import deep_research_system; deep_research_system.DeepResearchSystem()",
+    "import_research_service": "import research_service",
+}
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "agents_loaded": "agents" in sys.modules}}))
+"""
+
+
+def measure(statement: str) -> dict:
+    # A cold start must not need API keys
+    env = {key: value for key, value in os.environ.items() if key not in ("GEMINI_API_KEY", "OPENAI_API_KEY")}
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(statement=statement)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time against a budget.")
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per target (median is reported)")
+    parser.add_argument("--budget", default=str(DEFAULT_BUDGET))
+    parser.add_argument("--save-budget", action="store_true")
+    parser.add_argument("--headroom", type=float, default=0.5, help="fraction added to measurements by --save-budget")
+    args = parser.parse_args()
+
+    report = {}
+    problems = []
+    for name, statement in TARGETS.items():
+        # The first run warms the bytecode cache and is not counted
+        samples = [measure(statement) for _ in range(args.runs + 1)][1:]
+        report[name] = statistics.median(sample["seconds"] for sample in samples)
+        if any(sample["agents_loaded"] for sample in samples):
+            problems.append(f"{name}: imported the agents SDK")
+    print(json.dumps(report, indent=2))
+
+    budget_path = Path(args.budget)
+    if args.save_budget:
+        budget = {name: round(seconds * (1 + args.headroom), 3) for name, seconds in report.items()}
+        budget_path.write_text(json.dumps(budget, indent=2) + "\n")
+        print(f"Saved budget to {budget_path}")
+    elif budget_path.exists():
+        budget = json.loads(budget_path.read_text())
+        problems.extend(
+            f"{name}: {report[name]:.3f}s over budget {limit:.3f}s"
+            for name, limit in budget.items() if name in report and report[name] > limit
+        )
+
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems:
+        sys.exit(1)
+    print("Within import budget")
+
+
+if __name__ == "__main__":
+    main()
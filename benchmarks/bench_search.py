@@ -0,0 +1,55 @@
+"""
+Wall-clock comparison of serial blocking searches vs SearchEngine.search_many.
+
+    python -m benchmarks.bench_search --queries 8 --latency 0.25
+"""
+import argparse
+import asyncio
+import time
+
+from tavily import TavilyClient
+
+from benchmarks.fake_tavily import FakeTavilyServer
+from search_engine import SearchEngine
+
+
+def run_serial(base_url: str, queries: list[str]) -> float:
+    # The old search_web path: one blocking TavilyClient call after another
+    client = TavilyClient(api_key="tvly-bench", api_base_url=base_url)
+    start = time.perf_counter()
+    for query in queries:
+        client.search(query=query, search_depth="advanced", max_results=5, include_answer=True)
+    return time.perf_counter() - start
+
+
+async def run_parallel(base_url: str, queries: list[str], max_concurrency: int) -> float:
+    engine = SearchEngine(api_key="tvly-bench", base_url=base_url,
+                          max_concurrency=max_concurrency, per_host_limit=max_concurrency)
+    start = time.perf_counter()
+    results = await engine.search_many(queries)
+    elapsed = time.perf_counter() - start
+    await engine.aclose()
+    assert all('"error"' not in result[:20] for result in results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.25, help="fake server latency per request (s)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    queries = [f"benchmark query {i}" for i in range(args.queries)]
+    with FakeTavilyServer(latency=args.latency) as server:
+        serial = run_serial(server.base_url, queries)
+        parallel = asyncio.run(run_parallel(server.base_url, queries, args.concurrency))
+
+    print(f"queries={args.queries} latency={args.latency}s concurrency={args.concurrency}")
+    print(f"serial:      {serial:.3f}s")
+    print(f"search_many: {parallel:.3f}s")
+    print(f"speedup:     {serial / parallel:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
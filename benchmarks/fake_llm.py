@@ -0,0 +1,199 @@
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Call ids must stay unique even when handoff filtering shortens the history
+_call_ids = itertools.count(1)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def _arguments_for(tool: dict, text: str) -> dict:
+    # Fill every parameter from its JSON schema: strings get the latest text,
+    # numbers get their default (or 1), arrays get a one-element list
+    schema = tool["function"].get("parameters", {})
+    arguments = {}
+    for name, spec in schema.get("properties", {}).items():
+        kind = spec.get("type")
+        if kind == "string":
+            arguments[name] = text
+        elif kind in ("integer", "number"):
+            arguments[name] = spec.get("default", 1)
+        elif kind == "array":
+            arguments[name] = [text]
+        elif kind == "boolean":
+            arguments[name] = spec.get("default", False)
+        else:
+            arguments[name] = spec.get("default")
+    return arguments
+
+
+def scripted_reply(body: dict, handoff_target: str = None) -> dict:
+    """
+    Decide the next assistant message for a chat.completions request.
+
+    The script is deterministic: an agent with only handoff tools transfers
+    to `handoff_target` (or its first handoff); an agent with ordinary tools
+    calls its first tool once; after a tool result the agent answers in
+    text. That gives a plan -> tool -> answer run without a real model.
+    """
+    messages = body.get("messages", [])
+    tools = body.get("tools") or []
+    last = messages[-1] if messages else {"role": "user", "content": ""}
+    text = last.get("content") or ""
+    if isinstance(text, list):
+        text = " ".join(part.get("text", "") for part in text if isinstance(part, dict))
+
+    handoffs = [tool for tool in tools if tool["function"]["name"].startswith("transfer_to_")]
+    regular = [tool for tool in tools if tool not in handoffs]
+    first_turn_for_agent = last.get("role") == "user" or (
+        last.get("role") == "tool" and '"assistant"' in text and regular
+    )
+
+    if last.get("role") == "tool" and not first_turn_for_agent:
+        return {"role": "assistant", "content": f"Final answer based on: {text[:400]}"}
+
+    if regular:
+        tool = regular[0]
+    elif handoffs:
+        names = [tool["function"]["name"] for tool in handoffs]
+        tool = handoffs[names.index(handoff_target)] if handoff_target in names else handoffs[0]
+    else:
+        return {"role": "assistant", "content": f"Final answer: {text[:400]}"}
+
+    user_text = next((m.get("content") for m in messages if m.get("role") == "user"), text)
+    arguments = _arguments_for(tool, user_text if isinstance(user_text, str) else text)
+    return {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [{
+            "id": f"call_{next(_call_ids)}",
+            "type": "function",
+            "function": {"name": tool["function"]["name"], "arguments": json.dumps(arguments)},
+        }],
+    }
+
+
+class FakeLLMServer:
+    """
+    Local OpenAI-compatible /chat/completions endpoint for offline runs.
+
+    Replies come from scripted_reply() (or from `replies`, a list of
+    recorded assistant messages served in order). Supports streaming (SSE),
+    reports token usage, adds a fixed latency, and can answer the first
+    `fail_first` requests with 429 + Retry-After to exercise retry logic.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, retry_after: float = 0.1,
+                 handoff_target: str = None, replies: list = None):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.handoff_target = handoff_target
+        self.replies = list(replies) if replies else None
+        self.request_count = 0
+        self.rejected_count = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _next_reply(self, body):
+        with self._lock:
+            if self.replies:
+                return self.replies.pop(0)
+        return scripted_reply(body, self.handoff_target)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.request_count += 1
+                    reject = server.rejected_count < server.fail_first
+                    if reject:
+                        server.rejected_count += 1
+                if reject:
+                    self._send_json(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                                    {"Retry-After": str(server.retry_after)})
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+
+                message = server._next_reply(body)
+                prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+                completion_tokens = max(1, len(json.dumps(message)) // 4)
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                         "total_tokens": prompt_tokens + completion_tokens}
+                finish = "tool_calls" if message.get("tool_calls") else "stop"
+                base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": body.get("model", "fake")}
+
+                if not body.get("stream"):
+                    self._send_json(200, {**base, "object": "chat.completion", "usage": usage,
+                                          "choices": [{"index": 0, "message": message, "finish_reason": finish}]})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                def send(chunk):
+                    self.wfile.write(f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', **chunk})}\n\n".encode())
+                    self.wfile.flush()
+
+                if message.get("tool_calls"):
+                    calls = [{"index": i, **call} for i, call in enumerate(message["tool_calls"])]
+                    send({"choices": [{"index": 0, "delta": {"role": "assistant", "tool_calls": calls}}]})
+                else:
+                    for word in (message.get("content") or "").split(" "):
+                        send({"choices": [{"index": 0, "delta": {"content": word + " "}}]})
+                send({"choices": [{"index": 0, "delta": {}, "finish_reason": finish}]})
+                send({"choices": [], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from query_dedup import canonicalize_query
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections during parallel bursts
+    request_queue_size = 128
+
+
+def fake_response(query: str, max_results: int = 5) -> dict:
+    """
+    Deterministic Tavily-shaped response for a query.
+    """
+    results = []
+    for i in range(max_results):
+        results.append({
+            "title": f"Result {i + 1} for {query}",
+            "url": f"https://example{i}.org/articles/{zlib.crc32(query.encode()) % 10000}/{i}",
+            "content": f"Content {i + 1} about {query}. " * 20,
+            "score": round(1.0 - i * 0.1, 2),
+            "published_date": "2025-01-01",
+        })
+    return {"query": query, "answer": f"Short answer for {query}", "results": results}
+
+
+class FakeTavilyServer:
+    """
+    Local stand-in for the Tavily search API.
+    Serves POST /search on 127.0.0.1 with a fixed artificial latency so the
+    search backend can be exercised and benchmarked without a real key.
+    The first `fail_first` requests get 429 + Retry-After. `fixtures` maps
+    canonical queries to recorded responses; other queries get a synthetic
+    fake_response().
+
+        with FakeTavilyServer(latency=0.2) as server:
+            engine = SearchEngine(api_key="test", base_url=server.base_url)
+    """
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, retry_after: float = 0.1, fixtures: dict = None):
+        self.latency = latency
+        self.fixtures = fixtures or {}
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.rejected_count = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.request_count += 1
+                    reject = server.rejected_count < server.fail_first
+                    if reject:
+                        server.rejected_count += 1
+                if reject:
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(server.retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+
+                query = body.get("query", "")
+                response = server.fixtures.get(canonicalize_query(query)) or fake_response(query, body.get("max_results", 5))
+                payload = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
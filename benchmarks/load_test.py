@@ -0,0 +1,191 @@
+"""
+Concurrent multi-tenant load test of research_service against local stub servers.
+
+    python -m benchmarks.load_test --sessions 200 --concurrency 64 --tenants 8
+    python -m benchmarks.load_test --mode handoff --llm-latency 0.2
+
+The service runs in its own process(es), so its CPU time excludes the stubs
+and the load generator: it is the CPU used by the whole service process tree
+(workers and CPU pool included) minus that of an idle start/stop. Every session is a separate
+tenant-tagged POST /research with its own profile and a distinct query.
+Reports latency, throughput, admission rejections, per-tenant fairness and
+concurrent sessions per core: the mean number of sessions in flight
+(Little's law) divided by the cores the service actually kept busy.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.fake_tavily import FakeTavilyServer
+from benchmarks.run_benchmarks import DEFAULT_CORPUS, percentile
+from batch_research import load_queries
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def start_service(env: dict, workers: int = 1) -> tuple[subprocess.Popen, str]:
+    process = subprocess.Popen(
+        [sys.executable, "research_service.py", "--port", "0", "--workers", str(workers)],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+    )
+    listening = 0
+    for line in process.stdout:
+        match = re.search(r"Listening on (\S+)", line)
+        if match:
+            listening += 1
+            if listening == workers:
+                return process, match.group(1)
+    raise RuntimeError(f"research_service exited with {process.wait()} before listening")
+
+
+def stop_service(process: subprocess.Popen):
+    # Waiting for a clean exit makes the service tree's CPU time show up in RUSAGE_CHILDREN
+    process.terminate()
+    process.wait(timeout=60)
+
+
+def idle_service_cpu(env: dict, workers: int) -> float:
+    before = children_cpu()
+    process, base_url = start_service(env, workers)
+    httpx.get(f"{base_url}/healthz")
+    stop_service(process)
+    return children_cpu() - before
+
+
+async def run_sessions(base_url: str, queries: list[str], sessions: int, concurrency: int, tenants: int,
+                       mode: str) -> tuple[list[dict], float]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+    results = []
+    next_session = iter(range(sessions))
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        async def worker():
+            for session in next_session:
+                tenant = f"tenant-{session % tenants}"
+                request = {
+                    "query": f"{queries[session % len(queries)]} (session {session})",
+                    "mode": mode,
+                    "tenant": tenant,
+                    "user_profile": {"name": f"User {session}", "city": "Load", "topic": "Testing", "user_id": tenant},
+                }
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/research", json=request)
+                    status = response.status_code
+                    body = response.json()
+                except httpx.HTTPError as e:
+                    status, body = 0, {"error": str(e)}
+                results.append({
+                    "tenant": tenant,
+                    "status": status,
+                    "latency": time.perf_counter() - started,
+                    "queue_wait": body.get("queue_wait", 0.0),
+                    "error": body.get("error"),
+                })
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        return results, time.perf_counter() - started
+
+
+def summarize(results: list[dict], elapsed: float, cpu_seconds: float) -> dict:
+    ok = [result for result in results if result["status"] == 200]
+    latencies = [result["latency"] for result in ok]
+    tenant_p50 = {}
+    for tenant in sorted({result["tenant"] for result in ok}):
+        tenant_p50[tenant] = percentile([result["latency"] for result in ok if result["tenant"] == tenant], 50)
+    in_flight = sum(latencies) / elapsed if elapsed else 0.0
+    cores_busy = cpu_seconds / elapsed if elapsed else 0.0
+    return {
+        "sessions": len(results),
+        "ok": len(ok),
+        "rejected": sum(1 for result in results if result["status"] == 429),
+        "errors": sum(1 for result in results if result["status"] not in (200, 429)),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "queue_wait_p95": percentile([result["queue_wait"] for result in ok], 95),
+        "throughput_sessions_per_s": len(ok) / elapsed if elapsed else 0.0,
+        "wall_seconds": elapsed,
+        "service_cpu_seconds": cpu_seconds,
+        "cpu_ms_per_session": 1000 * cpu_seconds / len(ok) if ok else 0.0,
+        "mean_sessions_in_flight": in_flight,
+        "service_cores_busy": cores_busy,
+        "concurrent_sessions_per_core": in_flight / cores_busy if cores_busy else 0.0,
+        # Fairness: spread of median latency between the best and worst served tenant
+        "tenant_p50_spread": (max(tenant_p50.values()) - min(tenant_p50.values())) if tenant_p50 else 0.0,
+        "first_errors": [result["error"] for result in results if result["error"]][:3],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-tenant load test of the research service.")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64, help="client sessions in flight")
+    parser.add_argument("--tenants", type=int, default=8)
+    parser.add_argument("--mode", choices=["handoff", "pipeline"], default="pipeline")
+    parser.add_argument("--workers", type=int, default=1, help="service processes (research_service --workers)")
+    parser.add_argument("--cpu-workers", default="0", help="service CPU_POOL_WORKERS (0 = inline, auto = all cores)")
+    parser.add_argument("--max-active", type=int, default=64, help="service SERVICE_MAX_ACTIVE")
+    parser.add_argument("--max-queued", type=int, default=256, help="service SERVICE_MAX_QUEUED")
+    parser.add_argument("--search-concurrency", type=int, default=64,
+                        help="service SEARCH_MAX_CONCURRENCY / SEARCH_PER_HOST_LIMIT (the stub is one host)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub LLM seconds per request")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="stub Tavily seconds per request")
+    args = parser.parse_args()
+
+    queries = [record["query"] for record in load_queries(args.corpus)]
+    llm = FakeLLMServer(latency=args.llm_latency, handoff_target="transfer_to_research_coordinator").start()
+    tavily = FakeTavilyServer(latency=args.search_latency).start()
+    env = dict(
+        os.environ,
+        GEMINI_API_KEY="bench", BASE_URL=llm.base_url, MODEL="bench-model",
+        TAVILY_API_KEY="bench", TAVILY_API_URL=tavily.base_url,
+        SERVICE_MAX_ACTIVE=str(args.max_active), SERVICE_MAX_QUEUED=str(args.max_queued),
+        SERVICE_MAX_QUEUED_PER_TENANT=str(args.max_queued),
+        SEARCH_MAX_CONCURRENCY=str(args.search_concurrency), SEARCH_PER_HOST_LIMIT=str(args.search_concurrency),
+        CPU_POOL_WORKERS=args.cpu_workers,
+        SEARCH_CACHE_PATH="", ARTIFACT_CACHE_PATH="",
+    )
+    if args.workers > 1:
+        # Workers share their caches through SQLite; keep those files out of the default location
+        scratch = Path(tempfile.mkdtemp(prefix="load_test_"))
+        env.update(SEARCH_CACHE_PATH=str(scratch / "search.sqlite"), ARTIFACT_CACHE_PATH=str(scratch / "artifacts.sqlite"))
+    idle_cpu = idle_service_cpu(env, args.workers)
+
+    before = children_cpu()
+    process, base_url = start_service(env, args.workers)
+    try:
+        results, elapsed = asyncio.run(run_sessions(base_url, queries, args.sessions, args.concurrency,
+                                                    args.tenants, args.mode))
+    finally:
+        stop_service(process)
+        llm.stop()
+        tavily.stop()
+    cpu_seconds = max(0.0, children_cpu() - before - idle_cpu)
+
+    output = summarize(results, elapsed, cpu_seconds)
+    output.update(mode=args.mode, concurrency=args.concurrency, tenants=args.tenants, workers=args.workers,
+                  cpu_workers=args.cpu_workers,
+                  cores=os.cpu_count(), llm_requests=llm.request_count, tavily_requests=tavily.request_count)
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+End-to-end research benchmark against local stub servers.
+
+    python -m benchmarks.run_benchmarks --mode both --concurrency 4
+    python -m benchmarks.run_benchmarks --save-baseline     # store current numbers
+    python -m benchmarks.run_benchmarks --record            # capture live Tavily fixtures
+
+Tavily responses are replayed from benchmarks/fixtures/tavily.json when a
+recording exists (synthetic otherwise); the LLM is the scripted
+FakeLLMServer, so runs are deterministic and need no API keys.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.fake_tavily import FakeTavilyServer
+from batch_research import load_queries
+from query_dedup import canonicalize_query
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_CORPUS = HERE / "fixtures" / "queries.jsonl"
+DEFAULT_FIXTURES = HERE / "fixtures" / "tavily.json"
+DEFAULT_BASELINE = HERE / "baseline.json"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    # Nearest-rank percentile
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+async def run_corpus(system, records: list[dict], mode: str, concurrency: int) -> tuple[list[dict], float]:
+    queue = asyncio.Queue()
+    for record in records:
+        queue.put_nowait(record)
+    results = []
+
+    async def worker():
+        while not queue.empty():
+            record = queue.get_nowait()
+            started = time.perf_counter()
+            result = {"id": record["id"], "ok": False, "timings": {}}
+            try:
+                async for event in system.research_stream(record["query"], mode):
+                    if event["type"] == "done":
+                        result.update(ok=True, timings=event["timings"])
+            except Exception as e:
+                result["error"] = str(e)
+            result["latency"] = time.perf_counter() - started
+            results.append(result)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return results, time.perf_counter() - started
+
+
+def summarize(results: list[dict], elapsed: float) -> dict:
+    latencies = [result["latency"] for result in results if result["ok"]]
+    stages = {}
+    for result in results:
+        for stage, seconds in result["timings"].items():
+            stages.setdefault(stage, []).append(seconds)
+    return {
+        "queries": len(results),
+        "errors": sum(1 for result in results if not result["ok"]),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        "throughput_qps": len(latencies) / elapsed if elapsed else 0.0,
+        "wall_seconds": elapsed,
+        "stages_mean": {stage: sum(values) / len(values) for stage, values in stages.items()},
+    }
+
+
+def metric_means(name: str) -> dict:
+    from metrics import REGISTRY
+    return {
+        "/".join(entry["labels"].values()): entry["sum"] / entry["count"]
+        for entry in REGISTRY.to_dict().get(name, []) if entry["count"]
+    }
+
+
+def metric_totals(name: str) -> dict:
+    from metrics import REGISTRY
+    return {"/".join(entry["labels"].values()): entry["value"] for entry in REGISTRY.to_dict().get(name, [])}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Latency regressions beyond `tolerance` (fractional) per mode.
+    """
+    regressions = []
+    for mode, stats in current.items():
+        base = baseline.get(mode)
+        if not base:
+            continue
+        for key in ("p50", "p95"):
+            if base[key] and stats[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{mode} {key}: {stats[key]:.3f}s vs baseline {base[key]:.3f}s")
+    return regressions
+
+
+async def record_fixtures(records: list[dict], path: Path):
+    """
+    Run the corpus in pipeline mode against live Tavily and save every
+    raw response keyed by canonical query.
+    """
+    from deep_research_system import DeepResearchSystem
+    from search_engine import get_search_engine
+
+    search_engine = get_search_engine()
+
+    recorded = json.loads(path.read_text()) if path.exists() else {}
+    fetch = search_engine.fetch
+
+    async def recording_fetch(query, max_results=5):
+        response = await fetch(query, max_results)
+        recorded[canonicalize_query(query)] = response
+        return response
+
+    search_engine.fetch = recording_fetch
+    system = DeepResearchSystem()
+    for record in records:
+        await system.research(record["query"], mode="pipeline")
+    path.write_text(json.dumps(recorded, indent=1))
+    print(f"Recorded {len(recorded)} Tavily responses to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end research benchmark.")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="JSONL queries (e.g. requests.jsonl)")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--mode", choices=["handoff", "pipeline", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub LLM seconds per request")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="stub Tavily seconds per request")
+    parser.add_argument("--fixtures", default=str(DEFAULT_FIXTURES))
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional latency regression")
+    parser.add_argument("--record", action="store_true", help="record live Tavily fixtures instead")
+    args = parser.parse_args()
+
+    records = load_queries(args.corpus)[:args.limit]
+    fixtures_path = Path(args.fixtures)
+
+    if args.record:
+        asyncio.run(record_fixtures(records, fixtures_path))
+        return
+
+    fixtures = json.loads(fixtures_path.read_text()) if fixtures_path.exists() else {}
+    llm = FakeLLMServer(latency=args.llm_latency, handoff_target="transfer_to_research_coordinator").start()
+    tavily = FakeTavilyServer(latency=args.search_latency, fixtures=fixtures).start()
+    # Clients read their configuration when first built, so point it at the stubs first
+    os.environ.update({
+        "GEMINI_API_KEY": "bench", "BASE_URL": llm.base_url, "MODEL": "bench-model",
+        "TAVILY_API_KEY": "bench", "TAVILY_API_URL": tavily.base_url,
+        "SEARCH_CACHE_PATH": "",
+    })
+    from deep_research_system import DeepResearchSystem
+    from search_engine import get_search_engine
+
+    search_engine = get_search_engine()
+
+    system = DeepResearchSystem()
+    modes = ["pipeline", "handoff"] if args.mode == "both" else [args.mode]
+    report = {}
+    try:
+        for mode in modes:
+            # Each mode starts cold so the numbers are comparable
+            search_engine.cache.clear()
+            results, elapsed = asyncio.run(run_corpus(system, records, mode, args.concurrency))
+            report[mode] = summarize(results, elapsed)
+    finally:
+        llm.stop()
+        tavily.stop()
+
+    output = {
+        "results": report,
+        "agent_turn_mean": metric_means("agent_turn_seconds"),
+        "tool_mean": metric_means("tool_seconds"),
+        "llm_tokens": metric_totals("llm_tokens_total"),
+        "handoff_prompt_tokens": metric_totals("handoff_prompt_tokens"),
+        "peak_rss_mb": peak_rss_mb(),
+        "llm_requests": llm.request_count,
+        "tavily_requests": tavily.request_count,
+    }
+    print(json.dumps(output, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Saved baseline to {baseline_path}")
+    elif baseline_path.exists():
+        regressions = compare(report, json.loads(baseline_path.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
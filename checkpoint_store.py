@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+
+from artifact_cache import digest
+from sqlite_store import SQLiteConnection
+
+# Run states. A run that is not "done" can be resumed from its checkpoints.
+RUNNING, FAILED, DONE = "running", "failed", "done"
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, query TEXT NOT NULL, "
+    "mode TEXT NOT NULL, tenant TEXT, user_profile TEXT, status TEXT NOT NULL, "
+    "error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS checkpoints (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "run_id TEXT NOT NULL, stage TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+    "created_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS checkpoints_run ON checkpoints (run_id, seq)",
+)
+
+
+class RunCheckpoint:
+    """
+    The checkpoints of one research run: a (stage, key) -> value map that
+    is appended to the store as each stage completes. Stages are "plan",
+    "task" (keyed by task id), "search" (keyed by query), "synthesis",
+    "report" and "output"; a resumed run reads back whatever its earlier
+    attempt finished and only computes the rest. Reads come from memory;
+    writes go to the store on a worker thread, off the event loop.
+    """
+
+    def __init__(self, store, run: dict, values: dict = None):
+        self.store = store
+        self.run = run
+        self.run_id = run["run_id"]
+        self._values = values or {}
+        # Stages restored from an earlier attempt, for reporting
+        self.resumed = sorted({stage for stage, _ in self._values})
+
+    def get(self, stage: str, key: str = ""):
+        return self._values.get((stage, key))
+
+    async def put(self, stage: str, value, key: str = ""):
+        self._values[(stage, key)] = value
+        if self.store is not None:
+            await asyncio.to_thread(self.store.append, self.run_id, stage, key, value)
+
+    async def finish(self, status: str = DONE, error: str = None):
+        if self.store is not None:
+            await asyncio.to_thread(self.store.finish, self.run_id, status, error)
+
+
+class CheckpointStore:
+    """
+    Durable, append-only log of research run checkpoints in SQLite.
+    Every completed stage adds one row; nothing is updated in place, so a
+    crash can at worst lose the stage that was being written. Reading a
+    run back takes the newest row per (stage, key). Several processes can
+    share one file (WAL mode). compact() drops superseded rows, the stage
+    rows of finished runs and runs older than a cut-off.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = SQLiteConnection(path, SCHEMA, synchronous="NORMAL")
+        self._lock = threading.Lock()
+
+    def begin(self, query: str, mode: str, tenant: str = None, user_profile: dict = None,
+              run_id: str = None) -> RunCheckpoint:
+        """
+        Start a run, or resume run_id if it exists and has not finished.
+        A finished run comes back with its output checkpoint, so "resuming"
+        it just returns the stored result.
+        """
+        if run_id is not None:
+            checkpoint = self.load(run_id)
+            if checkpoint is not None:
+                if checkpoint.run["status"] != DONE:
+                    self._set_status(run_id, RUNNING)
+                return checkpoint
+
+        now = time.time()
+        run = {
+            "run_id": run_id or uuid.uuid4().hex,
+            "query": query,
+            "mode": mode,
+            "tenant": tenant,
+            "user_profile": user_profile,
+            "status": RUNNING,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self._lock:
+            db = self._db.get()
+            db.execute(
+                "INSERT INTO runs (run_id, query, mode, tenant, user_profile, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (run["run_id"], query, mode, tenant, json.dumps(user_profile), RUNNING, now, now),
+            )
+            db.commit()
+        return RunCheckpoint(self, run)
+
+    def get_run(self, run_id: str) -> dict:
+        """
+        The run's record (query, mode, tenant, user_profile, status, ...), or None.
+        """
+        with self._lock:
+            row = self._db.get().execute(
+                "SELECT run_id, query, mode, tenant, user_profile, status, error, created_at, updated_at "
+                "FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        return self._run(row) if row else None
+
+    def load(self, run_id: str) -> RunCheckpoint:
+        """
+        The run with every checkpoint written so far, or None if it is unknown.
+        """
+        run = self.get_run(run_id)
+        if run is None:
+            return None
+        with self._lock:
+            rows = self._db.get().execute(
+                "SELECT stage, key, value FROM checkpoints WHERE run_id = ? ORDER BY seq", (run_id,)
+            ).fetchall()
+        # Later rows supersede earlier ones for the same stage and key
+        return RunCheckpoint(self, run, {(stage, key): json.loads(value) for stage, key, value in rows})
+
+    def append(self, run_id: str, stage: str, key: str, value):
+        now = time.time()
+        with self._lock:
+            db = self._db.get()
+            db.execute(
+                "INSERT INTO checkpoints (run_id, stage, key, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, stage, key, json.dumps(value), now),
+            )
+            db.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+            db.commit()
+
+    def finish(self, run_id: str, status: str, error: str = None):
+        self._set_status(run_id, status, error)
+
+    def _set_status(self, run_id: str, status: str, error: str = None):
+        with self._lock:
+            db = self._db.get()
+            db.execute("UPDATE runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                       (status, error, time.time(), run_id))
+            db.commit()
+
+    def runs(self, status: str = None, limit: int = 50) -> list[dict]:
+        """
+        The most recently updated runs, optionally only those with `status`.
+        """
+        query = ("SELECT run_id, query, mode, tenant, user_profile, status, error, created_at, updated_at "
+                 "FROM runs")
+        params = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._db.get().execute(query + " ORDER BY updated_at DESC LIMIT ?", params + (limit,)).fetchall()
+        return [self._run(row) for row in rows]
+
+    @staticmethod
+    def _run(row) -> dict:
+        keys = ("run_id", "query", "mode", "tenant", "user_profile", "status", "error", "created_at", "updated_at")
+        run = dict(zip(keys, row))
+        run["user_profile"] = json.loads(run["user_profile"]) if run["user_profile"] else None
+        return run
+
+    def compact(self, max_age: float = 7 * 24 * 3600) -> dict:
+        """
+        Reclaim space: delete runs (with their checkpoints) not updated for
+        max_age seconds, keep only the output of finished runs, and drop
+        rows superseded by a newer one for the same stage and key. Returns
+        the number of runs and checkpoint rows removed.
+        """
+        cutoff = time.time() - max_age
+        with self._lock:
+            db = self._db.get()
+            old = [row[0] for row in db.execute("SELECT run_id FROM runs WHERE updated_at < ?", (cutoff,))]
+            removed = 0
+            for run_id in old:
+                removed += db.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,)).rowcount
+                db.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            removed += db.execute(
+                "DELETE FROM checkpoints WHERE stage != 'output' AND run_id IN "
+                "(SELECT run_id FROM runs WHERE status = ?)", (DONE,)
+            ).rowcount
+            removed += db.execute(
+                "DELETE FROM checkpoints WHERE seq NOT IN "
+                "(SELECT MAX(seq) FROM checkpoints GROUP BY run_id, stage, key)"
+            ).rowcount
+            db.commit()
+            db.execute("VACUUM")
+        return {"runs_removed": len(old), "checkpoints_removed": removed}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def create_checkpoint_store() -> CheckpointStore:
+    """
+    The store at CHECKPOINT_PATH, or None (no checkpointing) when it is not
+    set. Checkpoints hold full search results, reports and user profiles,
+    so they are opt-in and go wherever the operator points them.
+    """
+    path = os.getenv("CHECKPOINT_PATH")
+    return CheckpointStore(path) if path else None
+
+
+def checkpoint_key(*parts) -> str:
+    """
+    Key for a checkpoint computed from tool arguments.
+    """
+    return digest(parts)
+
+
+_current_checkpoint = contextvars.ContextVar("run_checkpoint", default=None)
+
+
+def current_checkpoint() -> RunCheckpoint:
+    """
+    The checkpoints of the active research run, or None outside a
+    checkpointed run.
+    """
+    return _current_checkpoint.get()
+
+
+def start_run_checkpoint(checkpoint: RunCheckpoint) -> contextvars.Token:
+    return _current_checkpoint.set(checkpoint)
+
+
+def reset_run_checkpoint(token: contextvars.Token):
+    try:
+        _current_checkpoint.reset(token)
+    except ValueError:
+        # As in payload_store.reset_run_store
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and compact research run checkpoints.")
+    parser.add_argument("--path", help="checkpoint database (default: CHECKPOINT_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("list", help="show recent runs")
+    listing.add_argument("--status", choices=[RUNNING, FAILED, DONE])
+    listing.add_argument("--limit", type=int, default=20)
+    compacting = commands.add_parser("compact", help="drop old runs and superseded checkpoints")
+    compacting.add_argument("--max-age-days", type=float, default=7.0)
+    args = parser.parse_args()
+
+    store = CheckpointStore(args.path) if args.path else create_checkpoint_store()
+    if store is None:
+        parser.error("no checkpoint database: pass --path or set CHECKPOINT_PATH")
+    if args.command == "list":
+        for run in store.runs(args.status, args.limit):
+            print(f"{run['run_id']}  {run['status']:<7}  {run['mode']:<8}  {run['query'][:60]}")
+    else:
+        print(json.dumps(store.compact(args.max_age_days * 24 * 3600)))
+
+
+if __name__ == "__main__":
+    main()
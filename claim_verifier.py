@@ -0,0 +1,111 @@
+import json
+import re
+
+from text_index import BM25Index, split_passages
+
+SUPPORTED = 0.7
+PARTIAL = 0.4
+
+_NEGATION_RE = re.compile(r"\b(not|no|never|none|false|myth|debunked|disproved|incorrect|unfounded)\b", re.I)
+
+
+class ClaimVerifier:
+    """
+    Batch claim verification against a fixed set of sources.
+    All source content is split into passages and indexed once (BM25 over
+    words and bigrams); each claim then scores every passage from the
+    index postings in one pass. Support is the share of the claim's IDF
+    weight found in its best passage, so paraphrases with the same key
+    terms still match where an exact substring test would not.
+    """
+
+    def __init__(self, sources: list[dict], passage_words: int = 80):
+        self.sources = [source for source in sources if source.get("content")]
+        self.index = BM25Index()
+        self.passages = []  # (source position, passage text)
+        for position, source in enumerate(self.sources):
+            for passage in split_passages(source["content"], passage_words):
+                self.index.add(passage)
+                self.passages.append((position, passage))
+
+    def verify(self, claims: list[str], top_k: int = 2) -> list[dict]:
+        return [self.verify_claim(claim, top_k) for claim in claims]
+
+    def verify_claim(self, claim: str, top_k: int = 2) -> dict:
+        query_terms = self.index.query_terms(claim)
+        scores = self.index.scores(query_terms)
+
+        # Best passage per source, by support then BM25
+        best = {}
+        for doc, score in scores.items():
+            position = self.passages[doc][0]
+            support = self.index.coverage(query_terms, doc)
+            if position not in best or (support, score) > best[position][:2]:
+                best[position] = (support, score, doc)
+
+        ranked = sorted(best.items(), key=lambda item: item[1][:2], reverse=True)
+        claim_negated = bool(_NEGATION_RE.search(claim))
+        evidence = []
+        for position, (support, score, doc) in ranked[:top_k]:
+            source = self.sources[position]
+            passage = self.passages[doc][1]
+            evidence.append({
+                "title": source.get("title", ""),
+                "url": source.get("url", ""),
+                "support": round(support, 3),
+                "bm25": round(score, 3),
+                "passage": passage,
+                # Negation the claim lacks (or vice versa) may mean the source disputes it
+                "possible_contradiction": support >= PARTIAL and claim_negated != bool(_NEGATION_RE.search(passage)),
+            })
+
+        matched = {position for position, (support, _, _) in best.items() if support >= PARTIAL}
+        support = evidence[0]["support"] if evidence else 0.0
+        return {
+            "claim": claim,
+            "support_score": support,
+            "verdict": "supported" if support >= SUPPORTED else "partially supported" if support >= PARTIAL else "not supported",
+            "supporting_sources": [self._ref(position) for position in sorted(matched)],
+            "other_sources": [self._ref(position) for position in range(len(self.sources)) if position not in matched],
+            "evidence": evidence,
+        }
+
+    def _ref(self, position: int) -> dict:
+        source = self.sources[position]
+        return {"title": source.get("title", ""), "url": source.get("url", "")}
+
+
+def verify_claims(claims: list[str], sources: list[dict], top_k: int = 2) -> list[dict]:
+    """
+    Verify every claim against every source with one shared index.
+    """
+    return ClaimVerifier(sources).verify(claims, top_k)
+
+
+def _source_list(sources) -> list[dict]:
+    # Search results as a list, or JSON of a list or a search_web payload
+    if isinstance(sources, str):
+        data = json.loads(sources)
+        return data if isinstance(data, list) else data.get("results", [])
+    return sources
+
+
+def fact_check_json(claim: str, sources) -> str:
+    """
+    fact_finder's JSON assessment of one claim, as run by run_cpu.
+    """
+    result = ClaimVerifier(_source_list(sources)).verify_claim(claim)
+    confidence = "High" if result["verdict"] == "supported" else "Medium" if result["verdict"] == "partially supported" else "Low"
+    return json.dumps({
+        "claim": claim,
+        "supporting_sources": result["supporting_sources"],
+        "contradicting_sources": result["other_sources"],
+        "confidence": confidence,
+        "support_score": result["support_score"],
+        "evidence": result["evidence"],
+        "assessment": f"Claim is {'supported' if confidence == 'High' else 'contested' if confidence == 'Medium' else 'not supported'} by available sources",
+    })
+
+
+def verify_claims_json(claims: list[str], sources, top_k: int = 2) -> str:
+    return json.dumps(verify_claims(claims, _source_list(sources), top_k))
@@ -0,0 +1,145 @@
+import asyncio
+import marshal
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+# Payloads at least this large travel through shared memory instead of the pool's pipe
+SHM_THRESHOLD = int(os.getenv("CPU_POOL_SHM_THRESHOLD", str(256 * 1024)))
+
+_MARSHAL, _PICKLE = b"m", b"p"
+
+
+def _encode(value) -> bytes:
+    # marshal handles the dict/list/str/number payloads tools pass around and is
+    # several times faster than pickle or JSON; anything else falls back to pickle
+    try:
+        return _MARSHAL + marshal.dumps(value)
+    except ValueError:
+        return _PICKLE + pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(data) -> object:
+    tag, body = bytes(data[:1]), data[1:]
+    return marshal.loads(body) if tag == _MARSHAL else pickle.loads(body)
+
+
+def pack(value):
+    """
+    Encode a value for another process: ("bytes", data) for small payloads,
+    ("shm", name, size) for large ones. The caller of pack() owns a shared
+    memory block and must release() it once the receiver is done.
+    """
+    data = _encode(value)
+    if len(data) < SHM_THRESHOLD:
+        return ("bytes", data)
+    # track=False: the block outlives this process's resource tracker and is unlinked explicitly
+    block = SharedMemory(create=True, size=len(data), track=False)
+    block.buf[:len(data)] = data
+    block.close()
+    return ("shm", block.name, len(data))
+
+
+def unpack(handle):
+    if handle[0] == "bytes":
+        return _decode(handle[1])
+    block = SharedMemory(name=handle[1], track=False)
+    try:
+        return _decode(block.buf[:handle[2]])
+    finally:
+        block.close()
+
+
+def release(handle):
+    if handle[0] == "shm":
+        try:
+            block = SharedMemory(name=handle[1], track=False)
+        except FileNotFoundError:
+            return
+        block.close()
+        block.unlink()
+
+
+def _call(fn, handle):
+    # Runs in the worker: read the arguments, run, hand the result back the same way
+    args, kwargs = unpack(handle)
+    return pack(fn(*args, **kwargs))
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    """
+    CPU_POOL_WORKERS: 0 (the default) runs CPU work inline, "auto" uses every core.
+    """
+    workers = os.getenv("CPU_POOL_WORKERS", "0")
+    return (os.cpu_count() or 1) if workers == "auto" else int(workers)
+
+
+def get_pool():
+    """
+    The process-wide worker pool, or None when offloading is off.
+    """
+    global _pool, _pool_pid
+    workers = pool_size()
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        # A pool does not survive fork; a forked service worker builds its own
+        if _pool is None or _pool_pid != os.getpid():
+            # Spawned workers inherit none of the parent's threads, sockets or event loop
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+async def warm_up():
+    """
+    Start every pool worker now instead of on the first offloaded call.
+    """
+    pool = get_pool()
+    if pool is not None:
+        await asyncio.gather(*(asyncio.wrap_future(pool.submit(os.getpid)) for _ in range(pool_size())))
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs) on the CPU pool and return its result, or run
+    it inline when the pool is off. fn must be a module-level function and
+    its arguments and result plain data (dicts, lists, strings, numbers).
+    Arguments and results are marshalled, through shared memory when
+    large, so the event loop never pickles or copies big payloads through
+    a pipe.
+    """
+    pool = get_pool()
+    if pool is None:
+        return fn(*args, **kwargs)
+
+    handle = pack((args, kwargs))
+    future = pool.submit(_call, fn, handle)
+    try:
+        result = await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        # The worker may still finish; free its result block when it does
+        future.add_done_callback(lambda done: done.cancelled() or done.exception() or release(done.result()))
+        raise
+    finally:
+        release(handle)
+    try:
+        return unpack(result)
+    finally:
+        release(result)
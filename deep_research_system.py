@@ -1,110 +1,348 @@
-from agents import Agent, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, set_tracing_disabled, function_tool, RunContextWrapper
 import asyncio
 import json
 import os
+import time
 from dotenv import load_dotenv
 
+# Only light modules load at import time. The agents SDK, the LLM client and
+# the agents themselves are built on first use, so pipeline runs and short CLI
+# invocations never pay for them.
+import cpu_pool
+from artifact_cache import query_key
+from checkpoint_store import DONE, FAILED, create_checkpoint_store, reset_run_checkpoint, start_run_checkpoint
+from pipeline import ResearchPipeline
+from metrics import INSTRUMENTS, Metrics, ResearchInstruments
+from payload_store import reset_run_store, start_run_store
+from research_context import ResearchContext, profile_from_env
+from search_engine import get_search_engine, open_connections
+
 # Load environment variables
 load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-BASE_URL= os.getenv("BASE_URL")
-MODEL= os.getenv("MODEL")
-USER_NAME = os.getenv("USER_NAME")
-USER_CITY = os.getenv("USER_CITY")
-USER_TOPIC= os.getenv("USER_TOPIC")
-USER_ID= os.getenv("USER_ID")
-
-os.environ["OPENAI_API_KEY"] = GEMINI_API_KEY
-set_tracing_disabled(disabled=True)
-
-# Gemini client
-external_client: AsyncOpenAI = AsyncOpenAI(
-    api_key=GEMINI_API_KEY,
-    base_url=BASE_URL,
-)
-# Model
-llm_model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
-    model=MODEL,
-    openai_client=external_client,
-)
+RESEARCH_MODE = os.getenv("RESEARCH_MODE", "handoff")
+
+_llm_http_client = None
+_llm_client = None
+_llm_model = None
+
+
+def get_llm_client():
+    """
+    The process-wide Gemini client (OpenAI-compatible), created on first use.
+    One pooled client serves every run, so concurrent sessions reuse
+    connections; retries are handled by the shared "llm" limiter.
+    """
+    global _llm_http_client, _llm_client
+    if _llm_client is None:
+        import httpx
+        from agents import AsyncOpenAI
+        from openai import DefaultAsyncHttpxClient
+
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise RuntimeError("GEMINI_API_KEY is not set; it is needed for handoff mode")
+        # The SDK reads OPENAI_API_KEY for its own clients
+        os.environ["OPENAI_API_KEY"] = api_key
+        connections = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+        _llm_http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        )
+        _llm_client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=os.getenv("BASE_URL"),
+            max_retries=0,
+            http_client=_llm_http_client,
+        )
+    return _llm_client
+
+
+def get_llm_model():
+    """
+    The shared rate-limited chat model over get_llm_client().
+    """
+    global _llm_model
+    if _llm_model is None:
+        from agents import set_tracing_disabled
+        from rate_limited_model import RateLimitedModel
+
+        # SDK tracing exports to OpenAI; opt in with TRACING_ENABLED=1
+        set_tracing_disabled(disabled=os.getenv("TRACING_ENABLED") != "1")
+        _llm_model = RateLimitedModel(model=os.getenv("MODEL"), openai_client=get_llm_client())
+    return _llm_model
+
 
+async def warm_up_llm(connections: int = 1):
+    """
+    Open pooled connections to the LLM endpoint before the first request.
+    """
+    client = get_llm_client()
+    await open_connections(_llm_http_client, str(client.base_url), connections)
 
-# Import agents
-from research_agents import research_coordinator, fact_checker_agent, source_evaluator_agent
-from planning_agent import planning_agent
-from synthesis_agent import synthesis_agent, conflict_resolver_agent
-from report_writer import report_writer
-
-
-# Force all agents to use Gemini model
-research_coordinator.model = llm_model
-fact_checker_agent.model = llm_model
-source_evaluator_agent.model = llm_model
-planning_agent.model = llm_model   
-
-# Main research coordinator
-lead_researcher = Agent(
-    name="Lead Research Coordinator",
-    instructions=(
-        "You are the lead research coordinator. You manage the entire research process:\n"
-        "1. First, hand off to the Planning Agent to break down complex questions\n"
-        "2. Then hand off to Research Coordinator to gather information\n"
-        "3. Use Fact Checker to verify important claims\n"
-        "4. Use Source Evaluator to assess source quality\n"
-        "5. Then hand off to Synthesis Agent to combine findings\n"
-        "6. Use Conflict Resolver for contradictory information\n"
-        "7. Finally hand off to Report Writer to create the final report\n\n"
-        "Monitor progress and ensure all research tasks are completed properly.\n"
-        "If any agent encounters issues, provide helpful guidance or redirect to appropriate specialist."
-    ),
-    handoffs=[planning_agent, research_coordinator, fact_checker_agent, 
-              source_evaluator_agent, synthesis_agent,conflict_resolver_agent, report_writer],
-    model=llm_model
+
+LEAD_INSTRUCTIONS = (
+    "You are the lead research coordinator. You manage the entire research process:\n"
+    "1. First, hand off to the Planning Agent to break down complex questions\n"
+    "2. Then hand off to Research Coordinator to gather information\n"
+    "3. Use Fact Checker to verify important claims\n"
+    "4. Then hand off to Synthesis Agent to combine findings\n"
+    "5. Use Conflict Resolver for contradictory information\n"
+    "6. Finally hand off to Report Writer to create the final report\n\n"
+    "Search results are already scored for source reliability and recency.\n"
+    "Monitor progress and ensure all research tasks are completed properly.\n"
+    "If any agent encounters issues, provide helpful guidance or redirect to appropriate specialist."
 )
 
+
+def build_lead_researcher(model):
+    """
+    The lead research coordinator with its specialists, all cloned onto
+    `model`. The module-level agents are templates and are never mutated,
+    so systems with different models can live in one process.
+    """
+    from agents import Agent
+    from planning_agent import planning_agent
+    from report_writer import report_writer
+    from research_agents import fact_checker_agent, research_coordinator
+    from synthesis_agent import conflict_resolver_agent, synthesis_agent
+
+    specialists = (planning_agent, research_coordinator, fact_checker_agent,
+                   synthesis_agent, conflict_resolver_agent, report_writer)
+    return Agent(
+        name="Lead Research Coordinator",
+        instructions=LEAD_INSTRUCTIONS,
+        handoffs=[agent.clone(model=model) for agent in specialists],
+        model=model,
+    )
+
+
 class DeepResearchSystem:
-    def __init__(self):
-        self.user_profile = {
-            "name": USER_NAME,
-            "city": USER_CITY,
-            "topic": USER_TOPIC,
-            "user_id": USER_ID
+    def __init__(self, user_profile: dict = None, model=None, checkpoints=None):
+        # Default profile for runs that do not bring their own (USER_* env vars)
+        self.user_profile = user_profile or profile_from_env()
+        self.model = model
+        self._lead_researcher = None
+        self.pipeline = ResearchPipeline(get_search_engine())
+        # Durable per-stage checkpoints (opt-in), so a failed run resumes instead of starting over
+        self.checkpoints = checkpoints or create_checkpoint_store()
+        # Mode, timings, token usage and metrics of the most recent run, for comparing modes.
+        # Concurrent callers should read the "run" field of their own done event instead.
+        self.last_run = None
+    
+    @property
+    def lead_researcher(self):
+        # Built on the first handoff run (or warm_up), not at construction
+        if self._lead_researcher is None:
+            self._lead_researcher = build_lead_researcher(self.model or get_llm_model())
+        return self._lead_researcher
+
+    async def _warm_up_agents(self):
+        self.lead_researcher
+
+    async def warm_up(self, agents: bool = True, connections: int = 2, timeout: float = 5.0) -> dict:
+        """
+        Do first-request work ahead of time: open search API connections,
+        start CPU pool workers and, with agents=True, build the agents and
+        open LLM connections. Returns seconds per step, or the error for a
+        step that failed or took longer than `timeout`; failures are not
+        fatal, the work just happens again on first use.
+        """
+        steps = {
+            "search": lambda: self.pipeline.search_engine.warm_up(connections),
+            "cpu_pool": cpu_pool.warm_up,
         }
-        self.search_cache = {}
+        if agents:
+            steps["agents"] = self._warm_up_agents
+            steps["llm"] = lambda: warm_up_llm(connections)
+
+        async def timed(name, step):
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(step(), timeout)
+            except Exception as e:
+                return name, f"error: {str(e) or type(e).__name__}"
+            return name, time.perf_counter() - started
+
+        return dict(await asyncio.gather(*(timed(name, step) for name, step in steps.items())))
     
-    async def research(self, query: str, stream_callback=None):
-        """Main research workflow with streaming support"""
-        print(f"👤 User: {self.user_profile['name']}")
+    async def research(self, query: str, stream_callback=None, mode: str = None, user_profile: dict = None,
+                       run_id: str = None):
+        """
+        Main research workflow with streaming support.
+        mode="handoff" lets the lead agent route between specialists;
+        mode="pipeline" runs the fixed plan/research/synthesize/report stages
+        without LLM routing turns. stream_callback receives every event
+        from research_stream(). Pass the run_id of a failed run to resume it.
+        """
+        print(f"👤 User: {(user_profile or self.user_profile).get('name')}")
         print(f"🔍 Query: {query}")
         
-        if stream_callback:
-            stream_callback(f"Starting research on: {query}")
-        
-        # Add user profile to context
-        context = {
-            "user": self.user_profile,
-            "query": query,
-        }
-        
         try:
-            result = await Runner.run(
-                lead_researcher, 
-                json.dumps(context),
-            )
-            return result.final_output
+            async for event in self.research_stream(query, mode, user_profile, run_id=run_id):
+                if event["type"] == "start":
+                    run_id = event.get("run_id")
+                if stream_callback:
+                    stream_callback(event)
+                if event["type"] == "done":
+                    return event["output"]
             
         except Exception as e:
             error_msg = f"Research failed: {str(e)}"
             print(f"❌ Error: {error_msg}")
-            return error_msg
-
-            
-        except Exception as e:
-            error_msg = f"Research failed: {str(e)}"
+            if run_id:
+                print(f"↩️  Resume with: research_system.resume({run_id!r})")
             if stream_callback:
-                stream_callback(f"❌ Error: {error_msg}")
+                stream_callback({"type": "error", "error": error_msg, "run_id": run_id})
             return error_msg
     
+    async def resume(self, run_id: str, stream_callback=None):
+        """
+        Finish a failed or interrupted run from its last checkpointed stage,
+        with the query, mode and profile it was started with.
+        """
+        run = await asyncio.to_thread(self.checkpoints.get_run, run_id) if self.checkpoints is not None else None
+        if run is None:
+            raise KeyError(f"No checkpointed run {run_id!r}")
+        return await self.research(run["query"], stream_callback, run["mode"], run["user_profile"], run_id)
+    
+    async def research_stream(self, query: str, mode: str = None, user_profile: dict = None,
+                              tenant: str = "default", run_id: str = None):
+        """
+        Run research as an async generator of progress events.
+        Yields start, stage, tool_start/tool_end, search_results, token or
+        report_delta events, and ends with a done event holding the output
+        and the run's stats. Runs are independent: each gets its own
+        ResearchContext (profile, payload store), so many can be in flight
+        on one system at once.
+        With checkpointing on (CHECKPOINT_PATH set), every run is
+        checkpointed under the run_id in its start event. Passing the run_id of an unfinished
+        run resumes it with its original query, mode and profile, skipping
+        every stage it completed.
+        """
+        user_profile = user_profile or self.user_profile
+        mode = mode or RESEARCH_MODE
+        checkpoint = None
+        if self.checkpoints is not None:
+            checkpoint = await asyncio.to_thread(self.checkpoints.begin, query, mode, tenant, user_profile, run_id)
+            run = checkpoint.run
+            query, mode, user_profile = run["query"], run["mode"], run["user_profile"] or user_profile
+        elif run_id is not None:
+            raise ValueError("Cannot resume: checkpointing is off (set CHECKPOINT_PATH)")
+        
+        context = ResearchContext(query, user_profile, mode, tenant, checkpoint=checkpoint)
+        # Full search results for this run live here; the LLM sees source ids
+        store_token = start_run_store(context.store)
+        checkpoint_token = start_run_checkpoint(checkpoint)
+        finished = False
+        try:
+            async for event in self._research_events(context):
+                if event["type"] == "done" and checkpoint is not None:
+                    await checkpoint.put("output", event["output"])
+                    await checkpoint.finish(DONE)
+                    finished = True
+                yield event
+        except BaseException as e:
+            # Includes cancellation and a consumer closing the stream: the run stays resumable
+            if checkpoint is not None and not finished:
+                await checkpoint.finish(FAILED, str(e) or type(e).__name__)
+            raise
+        finally:
+            reset_run_checkpoint(checkpoint_token)
+            reset_run_store(store_token)
+    
+    async def _research_events(self, context: ResearchContext):
+        query, mode, user_profile = context.query, context.mode, context.user_profile
+        checkpoint = context.checkpoint
+        resumed = checkpoint.resumed if checkpoint is not None else []
+        yield {"type": "start", "query": query, "mode": mode, "run_id": context.run_id, "resumed": resumed}
+        run_metrics = ResearchInstruments(Metrics())
+        
+        output = checkpoint.get("output") if checkpoint is not None else None
+        if output is not None:
+            # Finished by an earlier attempt
+            self.last_run = {"mode": mode, "timings": {"total": 0.0}, "usage": None, "cached": {},
+                             "run_id": context.run_id, "resumed": resumed, "metrics": run_metrics.registry.to_dict()}
+            yield {"type": "done", "output": output, "timings": {"total": 0.0}, "run": self.last_run}
+            return
+        
+        if mode == "pipeline":
+            async for event in self.pipeline.run_stream(query, user_profile):
+                if event["type"] == "tool_end":
+                    for instruments in (INSTRUMENTS, run_metrics):
+                        instruments.tool.labels(event["tool"]).observe(event["duration"])
+                if event["type"] != "done":
+                    yield event
+                    continue
+                run = event["result"]
+                for instruments in (INSTRUMENTS, run_metrics):
+                    for stage, seconds in run["timings"].items():
+                        if stage != "total":
+                            instruments.stage.labels(stage).observe(seconds)
+                    instruments.run.labels(mode).observe(run["timings"]["total"])
+                self.last_run = {"mode": mode, "timings": run["timings"], "usage": None, "cached": run["cached"],
+                                 "run_id": context.run_id, "resumed": run["resumed"],
+                                 "metrics": run_metrics.registry.to_dict()}
+                yield {"type": "done", "output": run["report"], "timings": run["timings"], "run": self.last_run}
+            return
+        
+        if mode != "handoff":
+            raise ValueError(f"Unknown research mode: {mode}")
+        
+        start = time.perf_counter()
+        # The agents' final report is cached whole; there are no separate artifacts to reuse
+        artifacts = self.pipeline.artifact_cache
+        report_key = artifacts.key("report", mode, query_key(query), user_profile)
+        output = await artifacts.get("report", report_key)
+        if output is not None:
+            timings = {"total": time.perf_counter() - start}
+            self.last_run = {"mode": mode, "timings": timings, "usage": None, "cached": {"report": True},
+                             "run_id": context.run_id, "resumed": resumed, "metrics": run_metrics.registry.to_dict()}
+            yield {"type": "done", "output": output, "timings": timings, "run": self.last_run}
+            return
+        
+        from agents import RunConfig, Runner
+        from handoff_filters import create_handoff_filter
+        from metrics_hooks import MetricsHooks
+        from streaming import handoff_events
+        
+        # Each specialist gets the request and the artifacts it needs, not every raw search result
+        handoff_filter = create_handoff_filter(run_metrics)
+        # The profile travels in the input for the model and in the run context for tools
+        result = Runner.run_streamed(
+            self.lead_researcher,
+            json.dumps({"user": user_profile, "query": query}),
+            context=context,
+            hooks=MetricsHooks(run_metrics),
+            run_config=RunConfig(handoff_input_filter=handoff_filter),
+        )
+        async for event in handoff_events(result):
+            yield event
+        
+        # Only a run that rendered a report is worth replaying; a final answer without
+        # one (an apology, a failure message) is not
+        output = result.final_output
+        if context.report is not None and isinstance(output, str) and output.strip():
+            await artifacts.set("report", report_key, output)
+        usage = result.context_wrapper.usage
+        timings = {"total": time.perf_counter() - start}
+        for instruments in (INSTRUMENTS, run_metrics):
+            instruments.run.labels(mode).observe(timings["total"])
+        run = {
+            "mode": mode,
+            "timings": timings,
+            "usage": {
+                "requests": usage.requests,
+                "input_tokens": usage.input_tokens,
+                "output_tokens": usage.output_tokens,
+                "total_tokens": usage.total_tokens,
+            },
+            "cached": {"report": False},
+            "run_id": context.run_id,
+            "resumed": resumed,
+            "handoffs": handoff_filter.log,
+            "metrics": run_metrics.registry.to_dict(),
+        }
+        self.last_run = run
+        yield {"type": "done", "output": result.final_output, "timings": timings, "run": run}
+    
   
 async def main():
     research_system = DeepResearchSystem()
@@ -0,0 +1,190 @@
+import json
+import os
+
+from agents import HandoffInputData
+from agents.items import HandoffOutputItem
+
+from metrics import INSTRUMENTS
+from payload_store import approx_tokens, current_store
+
+ARTIFACTS_MARKER = "[research artifacts]"
+SUMMARY_MARKER = "[earlier turns]"
+
+# Tool outputs kept as structured artifacts; lists collect every call
+ARTIFACT_TOOLS = {
+    "create_research_plan": "plan",
+    "synthesize_findings": "synthesis",
+    "resolve_conflicts": "conflicts",
+    "fact_finder": "fact_checks",
+    "verify_claims": "fact_checks",
+    "source_checker": "source_checks",
+}
+LIST_ARTIFACTS = ("fact_checks", "source_checks")
+
+# What each specialist needs from earlier stages (unknown agents get everything)
+AGENT_ARTIFACTS = {
+    "Planning Agent": (),
+    "Research Coordinator": ("plan",),
+    "Fact Checker": ("plan", "sources", "fact_checks"),
+    "Source Evaluator": ("sources", "source_checks"),
+    "Synthesis Agent": ("plan", "sources", "fact_checks", "source_checks"),
+    "Conflict Resolver": ("sources", "synthesis"),
+    "Report Writer": ("plan", "sources", "synthesis", "conflicts", "fact_checks"),
+}
+
+MAX_SOURCES = 30
+
+
+def _as_dict(item):
+    if isinstance(item, dict):
+        return item
+    if hasattr(item, "model_dump"):
+        return item.model_dump(exclude_unset=True)
+    return {"role": "user", "content": str(item)}
+
+
+def _text(item: dict) -> str:
+    content = item.get("content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+def _summarize_turn(item: dict, max_chars: int = 200) -> str:
+    text = " ".join(_text(item).split())
+    if len(text) > max_chars:
+        text = text[:max_chars] + "..."
+    return f"{item.get('role', 'assistant')}: {text}"
+
+
+class HandoffFilter:
+    """
+    Handoff input filter that replaces the accumulated history with what
+    the next agent needs: the original request, the structured artifacts
+    produced so far (plan, source list, synthesis, ...) and, in "summary"
+    mode, a rolling summary of older turns plus the most recent ones.
+    Raw search payloads never travel past the agent that fetched them;
+    sources are listed by id and can be dereferenced with get_sources.
+
+    mode is "full" (no filtering), "artifacts" or "summary". Use one
+    filter per run. Every handoff records approximate prompt tokens
+    before and after filtering.
+    """
+
+    def __init__(self, mode: str = "artifacts", keep_recent: int = 4, summary_tokens: int = 400,
+                 instruments=()):
+        if mode not in ("full", "artifacts", "summary"):
+            raise ValueError(f"Unknown handoff history mode: {mode}")
+        self.mode = mode
+        self.keep_recent = keep_recent
+        self.summary_tokens = summary_tokens
+        self.targets = (INSTRUMENTS, *instruments)
+        # Artifacts and summary roll forward across the handoffs of one run
+        self.artifacts = {}
+        self.summary = []
+        self.log = []
+
+    def __call__(self, data: HandoffInputData) -> HandoffInputData:
+        history = data.input_history
+        if isinstance(history, str):
+            history = ({"role": "user", "content": history},)
+        items = [_as_dict(item) for item in history]
+        items += [_as_dict(item.to_input_item()) for item in data.pre_handoff_items]
+        target = next((item.target_agent.name for item in data.new_items
+                       if isinstance(item, HandoffOutputItem)), "unknown")
+
+        full_tokens = approx_tokens(json.dumps(items, default=str))
+        if self.mode == "full":
+            self._record(target, full_tokens, full_tokens)
+            return data
+
+        compact = self.compact(items, target)
+        self._record(target, full_tokens, approx_tokens(json.dumps(compact, default=str)))
+        # Dropping new_items keeps the handoff call out of the next prompt; these are the
+        # only fields HandoffInputData has on every supported openai-agents release
+        return data.clone(input_history=tuple(compact), pre_handoff_items=(), new_items=())
+
+    def compact(self, items: list[dict], target: str) -> list[dict]:
+        request = None
+        turns = []
+        tool_names = {}
+
+        for item in items:
+            kind = item.get("type")
+            if kind == "function_call":
+                tool_names[item.get("call_id")] = item.get("name")
+            elif kind == "function_call_output":
+                name = ARTIFACT_TOOLS.get(tool_names.get(item.get("call_id")))
+                if name:
+                    self._add_artifact(name, item.get("output", ""))
+            elif item.get("role") in ("user", "assistant", "system", "developer"):
+                text = _text(item)
+                if text.startswith((ARTIFACTS_MARKER, SUMMARY_MARKER)):
+                    # Written by an earlier handoff; the filter already holds its content
+                    continue
+                if request is None and item.get("role") == "user":
+                    request = item
+                elif text.strip():
+                    turns.append(item)
+
+        store = current_store()
+        if len(store):
+            self.artifacts["sources"] = [
+                {"id": source_id, "title": store.get(source_id).get("title", ""),
+                 "url": store.get(source_id).get("url", "")}
+                for source_id in store.ids()[:MAX_SOURCES]
+            ]
+
+        wanted = AGENT_ARTIFACTS.get(target)
+        artifacts = {name: value for name, value in self.artifacts.items() if wanted is None or name in wanted}
+
+        compact = [request] if request else []
+        if artifacts:
+            compact.append({"role": "user", "content": ARTIFACTS_MARKER + json.dumps(artifacts)})
+
+        if self.mode == "summary":
+            split = max(0, len(turns) - self.keep_recent)
+            for item in turns[:split]:
+                line = _summarize_turn(item)
+                # Turns kept verbatim last time come back in the history
+                if line not in self.summary:
+                    self.summary.append(line)
+            # Rolling: drop the oldest lines once the summary outgrows its budget
+            while self.summary and approx_tokens("\n".join(self.summary)) > self.summary_tokens:
+                self.summary.pop(0)
+            if self.summary:
+                compact.append({"role": "user", "content": SUMMARY_MARKER + "\n" + "\n".join(self.summary)})
+            compact.extend(turns[split:])
+        elif turns:
+            # The delegating agent's latest message usually says what to do next
+            compact.append(turns[-1])
+        return compact
+
+    def _add_artifact(self, name: str, output: str):
+        try:
+            value = json.loads(output)
+        except (TypeError, ValueError):
+            value = output
+        if name in LIST_ARTIFACTS:
+            self.artifacts.setdefault(name, []).append(value)
+        else:
+            self.artifacts[name] = value
+
+    def _record(self, target: str, full_tokens: int, filtered_tokens: int):
+        self.log.append({"agent": target, "full_tokens": full_tokens, "filtered_tokens": filtered_tokens})
+        for instruments in self.targets:
+            instruments.handoff_tokens.labels(target, "full").inc(full_tokens)
+            instruments.handoff_tokens.labels(target, "filtered").inc(filtered_tokens)
+
+
+def create_handoff_filter(*instruments) -> HandoffFilter:
+    """
+    HandoffFilter configured from HANDOFF_HISTORY (full/artifacts/summary),
+    HANDOFF_KEEP_RECENT and HANDOFF_SUMMARY_TOKENS.
+    """
+    return HandoffFilter(
+        mode=os.getenv("HANDOFF_HISTORY", "artifacts"),
+        keep_recent=int(os.getenv("HANDOFF_KEEP_RECENT", "4")),
+        summary_tokens=int(os.getenv("HANDOFF_SUMMARY_TOKENS", "400")),
+        instruments=instruments,
+    )
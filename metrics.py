@@ -0,0 +1,205 @@
+import bisect
+import json
+
+# Seconds; covers cache hits through multi-minute agent turns
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Bucket counts are preallocated, so observe()
+    is a bisect plus two additions.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _Family:
+    """
+    A metric with labels. Children are created once per label combination
+    and reused, so steady-state recording allocates nothing.
+    """
+
+    def __init__(self, name, help, labels, factory):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._factory = factory
+        self._children = {}
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._factory()
+        return child
+
+    def _label_text(self, values, extra=""):
+        pairs = [f'{name}="{value}"' for name, value in zip(self.label_names, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class HistogramFamily(_Family):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels, lambda: Histogram(buckets))
+        self.buckets = buckets
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def prometheus(self) -> list[str]:
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self._label_text(values, f'le=\"{le}\"')} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(values)} {child.sum}")
+            lines.append(f"{self.name}_count{self._label_text(values)} {child.count}")
+        return lines
+
+    def snapshot(self) -> list[dict]:
+        return [{
+            "labels": dict(zip(self.label_names, values)),
+            "count": child.count,
+            "sum": child.sum,
+            "buckets": dict(zip([repr(b) for b in self.buckets] + ["+Inf"], child.counts)),
+        } for values, child in self._children.items()]
+
+
+class CounterFamily(_Family):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels, Counter)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def prometheus(self) -> list[str]:
+        return [f"{self.name}{self._label_text(values)} {child.value}" for values, child in self._children.items()]
+
+    def snapshot(self) -> list[dict]:
+        return [{"labels": dict(zip(self.label_names, values)), "value": child.value}
+                for values, child in self._children.items()]
+
+
+class GaugeCallback:
+    """
+    Gauge whose value is read from a callback at export time, so the
+    instrumented code pays nothing per call.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, fn):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def prometheus(self) -> list[str]:
+        return [f"{self.name} {float(self.fn())}"]
+
+    def snapshot(self) -> list[dict]:
+        return [{"labels": {}, "value": float(self.fn())}]
+
+
+class CounterCallback(GaugeCallback):
+    """
+    Counter read from a callback at export time; fn must never decrease.
+    """
+
+    kind = "counter"
+
+
+class Metrics:
+    """
+    Registry of metrics exportable as Prometheus text or as a JSON dict.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            return self._metrics[metric.name]
+        self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> HistogramFamily:
+        return self._register(HistogramFamily(name, help, labels, buckets))
+
+    def counter(self, name, help, labels=()) -> CounterFamily:
+        return self._register(CounterFamily(name, help, labels))
+
+    def gauge_callback(self, name, help, fn) -> GaugeCallback:
+        return self._register(GaugeCallback(name, help, fn))
+
+    def counter_callback(self, name, help, fn) -> CounterCallback:
+        return self._register(CounterCallback(name, help, fn))
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.prometheus())
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> dict:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+class ResearchInstruments:
+    """
+    The research-run metrics, defined on a given registry.
+    """
+
+    def __init__(self, registry: Metrics):
+        self.registry = registry
+        self.agent_turn = registry.histogram(
+            "agent_turn_seconds", "Wall time of one LLM turn per agent", ("agent",))
+        self.tool = registry.histogram(
+            "tool_seconds", "Wall time of one function tool invocation", ("tool",))
+        self.tokens = registry.counter(
+            "llm_tokens_total", "LLM tokens by agent and kind (prompt/completion)", ("agent", "kind"))
+        self.stage = registry.histogram(
+            "stage_seconds", "Wall time per pipeline stage", ("stage",))
+        self.run = registry.histogram(
+            "research_run_seconds", "Wall time of a whole research run", ("mode",))
+        self.handoff_tokens = registry.counter(
+            "handoff_prompt_tokens", "Approximate history tokens handed to an agent, before and after filtering",
+            ("agent", "kind"))
+
+
+REGISTRY = Metrics()
+INSTRUMENTS = ResearchInstruments(REGISTRY)
+tavily_latency = REGISTRY.histogram("tavily_request_seconds", "Latency of Tavily search HTTP calls")
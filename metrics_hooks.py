@@ -0,0 +1,42 @@
+import time
+
+from agents import RunHooks
+
+from metrics import INSTRUMENTS, ResearchInstruments
+
+
+class MetricsHooks(RunHooks):
+    """
+    RunHooks that time agent turns and tool calls and count LLM tokens.
+    Records into the process-wide registry and a per-run one.
+    """
+
+    def __init__(self, run_instruments: ResearchInstruments = None):
+        self.targets = (INSTRUMENTS, run_instruments) if run_instruments else (INSTRUMENTS,)
+        self._llm_started = {}
+        self._tool_started = {}
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items):
+        self._llm_started[agent.name] = time.perf_counter()
+
+    async def on_llm_end(self, context, agent, response):
+        elapsed = time.perf_counter() - self._llm_started.pop(agent.name, time.perf_counter())
+        usage = response.usage
+        for instruments in self.targets:
+            instruments.agent_turn.labels(agent.name).observe(elapsed)
+            instruments.tokens.labels(agent.name, "prompt").inc(usage.input_tokens)
+            instruments.tokens.labels(agent.name, "completion").inc(usage.output_tokens)
+
+    def _tool_key(self, context, tool):
+        return getattr(context, "tool_call_id", None) or tool.name
+
+    async def on_tool_start(self, context, agent, tool):
+        self._tool_started[self._tool_key(context, tool)] = time.perf_counter()
+
+    async def on_tool_end(self, context, agent, tool, result):
+        started = self._tool_started.pop(self._tool_key(context, tool), None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        for instruments in self.targets:
+            instruments.tool.labels(tool.name).observe(elapsed)
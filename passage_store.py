@@ -0,0 +1,150 @@
+import hashlib
+import os
+import threading
+import time
+
+from sqlite_store import SQLiteConnection
+from text_index import BM25Index, split_passages
+
+
+def source_id_for(url: str, content: str = "") -> str:
+    """
+    Stable short id for a source: the same URL gets the same id in every run.
+    """
+    key = url or content
+    return ("s" if url else "a") + hashlib.blake2b(key.encode(), digest_size=4).hexdigest()
+
+
+class PassageStore:
+    """
+    Chunked, BM25-indexed store of fetched documents.
+    Each document is split into passages once, when first added; lookup()
+    then answers follow-up questions from local content without another
+    search. With disk_path set, documents are also written to SQLite and
+    reloaded on startup, so later runs (and other processes) can reuse them.
+    At most max_documents are kept in memory; the oldest half is dropped
+    and the index rebuilt when the limit is reached.
+    """
+
+    def __init__(self, passage_words: int = 80, max_documents: int = 5000, disk_path: str = None):
+        self.passage_words = passage_words
+        self.max_documents = max_documents
+        self.disk_path = disk_path
+        self._lock = threading.Lock()
+        self._db = SQLiteConnection(disk_path, (
+            "CREATE TABLE IF NOT EXISTS passage_documents "
+            "(source_id TEXT PRIMARY KEY, url TEXT, title TEXT, content TEXT NOT NULL, added_at REAL NOT NULL)",
+        )) if disk_path else None
+        self._reset()
+        if disk_path:
+            self._load()
+
+    def _reset(self):
+        self.index = BM25Index()
+        # passage position -> (source_id, passage text)
+        self.passages = []
+        # source_id -> {"title", "url"}, in insertion order
+        self.documents = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, url: str, title: str, content: str) -> bool:
+        """
+        Chunk and index a document. Returns False if it was already stored.
+        """
+        if not content:
+            return False
+        source_id = source_id_for(url, content)
+        with self._lock:
+            if source_id in self.documents:
+                return False
+            if len(self.documents) >= self.max_documents:
+                self._shrink()
+            self._index(source_id, url, title, content)
+        if self.disk_path:
+            db = self._db.get()
+            db.execute(
+                "INSERT OR IGNORE INTO passage_documents (source_id, url, title, content, added_at) VALUES (?, ?, ?, ?, ?)",
+                (source_id, url, title, content, time.time()),
+            )
+            db.commit()
+        return True
+
+    def add_result(self, result: dict) -> bool:
+        """
+        Add one search_web result; Tavily's direct answers are not sources.
+        """
+        if result.get("is_direct_answer"):
+            return False
+        return self.add(result.get("url", ""), result.get("title", ""), result.get("content", ""))
+
+    def lookup(self, query: str, k: int = 5) -> list[dict]:
+        """
+        The k passages that best match the query, best first.
+        """
+        with self._lock:
+            ranked = self.index.top(query, k)
+            matches = []
+            for position, score in ranked:
+                source_id, text = self.passages[position]
+                document = self.documents[source_id]
+                matches.append({
+                    "id": source_id,
+                    "title": document["title"],
+                    "url": document["url"],
+                    "passage": text,
+                    "score": round(score, 3),
+                })
+            return matches
+
+    def stats(self) -> dict:
+        return {"documents": len(self.documents), "passages": len(self.passages), "terms": len(self.index.postings)}
+
+    def _index(self, source_id, url, title, content):
+        self.documents[source_id] = {"title": title, "url": url, "content": content}
+        for text in split_passages(content, self.passage_words):
+            self.index.add(text)
+            self.passages.append((source_id, text))
+
+    def _shrink(self):
+        # BM25 postings cannot drop a document cheaply, so rebuild from the newer half
+        kept = list(self.documents.items())[len(self.documents) // 2:]
+        self._reset()
+        for source_id, document in kept:
+            self._index(source_id, document["url"], document["title"], document["content"])
+
+    # Disk tier
+
+    def _load(self):
+        rows = self._db.get().execute(
+            "SELECT source_id, url, title, content FROM "
+            "(SELECT * FROM passage_documents ORDER BY added_at DESC LIMIT ?) ORDER BY added_at",
+            (self.max_documents,),
+        ).fetchall()
+        for source_id, url, title, content in rows:
+            self._index(source_id, url, title, content)
+
+
+_shared_store = None
+
+
+def create_passage_store() -> PassageStore:
+    """
+    Passage store for a new research run.
+    Runs get their own store unless PASSAGE_STORE_SCOPE=global or
+    PASSAGE_STORE_PATH is set; then every run shares one process-wide
+    store (persisted to SQLite at PASSAGE_STORE_PATH, if given).
+    """
+    global _shared_store
+    passage_words = int(os.getenv("PASSAGE_WORDS", "80"))
+    disk_path = os.getenv("PASSAGE_STORE_PATH") or None
+    if os.getenv("PASSAGE_STORE_SCOPE", "run") != "global" and not disk_path:
+        return PassageStore(passage_words)
+    if _shared_store is None:
+        _shared_store = PassageStore(
+            passage_words,
+            max_documents=int(os.getenv("PASSAGE_STORE_MAX_DOCUMENTS", "5000")),
+            disk_path=disk_path,
+        )
+    return _shared_store
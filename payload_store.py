@@ -0,0 +1,192 @@
+import contextvars
+import json
+import os
+
+from passage_store import create_passage_store, source_id_for
+
+# Approximate token budgets for what each tool hands back to the LLM
+TOOL_TOKEN_BUDGETS = {
+    "search_web": int(os.getenv("SEARCH_WEB_TOKEN_BUDGET", "700")),
+    "search_many": int(os.getenv("SEARCH_MANY_TOKEN_BUDGET", "1800")),
+    "execute_research_plan": int(os.getenv("EXECUTE_PLAN_TOKEN_BUDGET", "2400")),
+    "get_sources": int(os.getenv("GET_SOURCES_TOKEN_BUDGET", "3000")),
+}
+
+MIN_SNIPPET_CHARS = 80
+
+# Source scores added by source_reliability.annotate_results
+ANNOTATION_FIELDS = ("reliability", "trust_score", "recency", "rank")
+
+
+def approx_tokens(text: str) -> int:
+    # ~4 characters per token
+    return len(text) // 4
+
+
+class PayloadStore:
+    """
+    Side store for full search results within one research run.
+    Tools hand the LLM short source IDs plus a snippet; the full content
+    stays here and downstream tools dereference the IDs. Each URL is
+    stored once, however many searches return it. New results are also
+    chunked into the run's PassageStore for lookup().
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._id_by_url = {}
+        self._passages = None
+
+    @property
+    def passages(self):
+        if self._passages is None:
+            self._passages = create_passage_store()
+        return self._passages
+
+    def put(self, result: dict) -> tuple[str, bool]:
+        """
+        Store a result and return (source_id, is_new).
+        """
+        url = result.get("url", "")
+        if url and url in self._id_by_url:
+            return self._id_by_url[url], False
+        source_id = source_id_for(url, result.get("content", ""))
+        is_new = source_id not in self._by_id
+        self._by_id[source_id] = result
+        if url:
+            self._id_by_url[url] = source_id
+        if is_new:
+            self.passages.add_result(result)
+        return source_id, is_new
+
+    def get(self, source_id: str):
+        return self._by_id.get(source_id)
+
+    def resolve(self, source_ids) -> list[dict]:
+        """
+        Full results for the given IDs ("all" for everything), skipping unknown IDs.
+        """
+        if source_ids == "all":
+            return list(self._by_id.values())
+        return [self._by_id[source_id] for source_id in source_ids if source_id in self._by_id]
+
+    def research_data(self, source_ids) -> dict:
+        """
+        Build synthesize() input ({"sources", "findings"}) from stored ids.
+        """
+        results = [result for result in self.resolve(source_ids) if result.get("url")]
+        return {
+            "sources": [{"title": result.get("title", ""), "url": result["url"]} for result in results],
+            "findings": [{"content": result.get("content", ""), "title": result.get("title", ""),
+                          "url": result["url"], "trust_score": result.get("trust_score")} for result in results],
+        }
+
+    def ids(self) -> list[str]:
+        return list(self._by_id)
+
+    def __len__(self):
+        return len(self._by_id)
+
+
+_current_store = contextvars.ContextVar("payload_store", default=None)
+_fallback_store = PayloadStore()
+
+
+def current_store() -> PayloadStore:
+    """
+    The store of the active research run (or a process-wide fallback).
+    """
+    # Not `or`: an empty run store is falsy (it has __len__) but is still the run's
+    store = _current_store.get()
+    return store if store is not None else _fallback_store
+
+
+def start_run_store(store: PayloadStore = None) -> contextvars.Token:
+    """
+    Give the current context a fresh store (or the run's own); tasks
+    started afterwards (tool calls, scheduled searches) inherit it.
+    """
+    return _current_store.set(store if store is not None else PayloadStore())
+
+
+def reset_run_store(token: contextvars.Token):
+    try:
+        _current_store.reset(token)
+    except ValueError:
+        # Generator finalized from another context; nothing to restore there
+        pass
+
+
+def compact_search(payload: dict, store: PayloadStore, budget_tokens: int) -> dict:
+    """
+    Compact one search_web payload: new results become {id, title, url,
+    snippet, ...} with snippets trimmed to fit the token budget; URLs
+    already returned earlier in the run are listed only by ID.
+    """
+    if "error" in payload:
+        return payload
+
+    fresh, seen = [], []
+    for result in payload.get("results", []):
+        source_id, is_new = store.put(result)
+        (fresh if is_new else seen).append((source_id, result))
+
+    # Share the budget evenly across new results, leaving room for metadata
+    overhead = 40 + 30 * len(fresh) + 10 * len(seen)
+    per_result = max(MIN_SNIPPET_CHARS, (budget_tokens - overhead) * 4 // max(1, len(fresh)))
+
+    compact = []
+    for source_id, result in fresh:
+        content = result.get("content", "")
+        entry = {
+            "id": source_id,
+            "title": result.get("title", ""),
+            "url": result.get("url", ""),
+            "snippet": content if len(content) <= per_result else content[:per_result] + "...",
+        }
+        if result.get("published_date"):
+            entry["published_date"] = result["published_date"]
+        for field in ANNOTATION_FIELDS:
+            if field in result:
+                entry[field] = result[field]
+        if result.get("is_direct_answer"):
+            entry["is_direct_answer"] = True
+        compact.append(entry)
+
+    return {
+        "query": payload.get("query", ""),
+        "results": compact,
+        "already_seen": [source_id for source_id, _ in seen],
+        "total_results": len(compact) + len(seen),
+    }
+
+
+def compact_many(payloads: list[dict], store: PayloadStore, budget_tokens: int) -> list[dict]:
+    """
+    Compact several payloads under one shared budget.
+    """
+    share = budget_tokens // max(1, len(payloads))
+    return [compact_search(payload, store, share) for payload in payloads]
+
+
+def parse_source_refs(text: str):
+    """
+    Interpret a tool argument that may reference stored sources.
+    Accepts a JSON list of IDs, {"source_ids": [...]} / {"source_ids": "all"},
+    a comma-separated ID string, or "all". Returns the ID list, "all", or None
+    if the text is not an ID reference.
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        if text.strip() == "all":
+            return "all"
+        parts = [part.strip() for part in text.split(",")]
+        if parts and all(part[:1] in ("s", "a") and len(part) == 9 for part in parts):
+            return parts
+        return None
+    if isinstance(data, list) and all(isinstance(item, str) for item in data):
+        return data
+    if isinstance(data, dict) and "source_ids" in data:
+        return data["source_ids"]
+    return None
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import os
+import time
+
+from artifact_cache import create_artifact_cache, query_key
+from checkpoint_store import current_checkpoint
+from cpu_pool import run_cpu
+from payload_store import current_store
+from research_plan import build_research_plan
+from report_renderer import build_report, render_chunks
+from scheduler import TaskScheduler
+from source_reliability import annotate_results
+from synthesis_engine import synthesize
+
+
+def collect_findings(search_payloads: list[str]) -> dict:
+    """
+    Merge search_web payloads into the research_data shape used by
+    synthesize(): a deduplicated source list plus one finding per result.
+    Every result is also stored in the run's payload/passage store and
+    scored for reliability.
+    """
+    store = current_store()
+    sources = []
+    findings = []
+    seen_urls = set()
+    for payload in search_payloads:
+        data = json.loads(payload)
+        for result in annotate_results(data.get("results", [])):
+            store.put(result)
+            url = result.get("url", "")
+            if result.get("is_direct_answer") or not url or url in seen_urls:
+                continue
+            seen_urls.add(url)
+            sources.append({"title": result.get("title", ""), "url": url,
+                            "reliability": result["reliability"], "trust_score": result["trust_score"]})
+            findings.append({
+                "content": result.get("content", ""),
+                "title": result.get("title", ""),
+                "url": url,
+                "query": data.get("query", ""),
+                "trust_score": result["trust_score"],
+            })
+    return {"sources": sources, "findings": findings}
+
+
+class ResearchPipeline:
+    """
+    Deterministic plan -> research -> synthesize -> report executor.
+    Calls the same planning, synthesis and report functions the agents use as
+    tools, but in a fixed order with no LLM routing turns in between, and
+    records wall time per stage. Research tasks run through a TaskScheduler,
+    so independent tasks are searched concurrently, and synthesis runs on the
+    CPU pool when one is configured. Every stage's output is
+    kept in an ArtifactCache, so a repeated query skips straight to its
+    cached report and a query with the same plan skips research. Inside a
+    checkpointed run, the plan, each task's search results, the synthesis
+    and the report are also checkpointed as they complete, and a resumed
+    run picks up after the last one.
+    """
+
+    def __init__(self, search_engine, max_results=5, scheduler=None, report_format=None, artifact_cache=None):
+        self.search_engine = search_engine
+        self.artifact_cache = artifact_cache or create_artifact_cache()
+        self.max_results = max_results
+        self.report_format = report_format or os.getenv("REPORT_FORMAT", "text")
+        self.scheduler = scheduler or TaskScheduler(
+            max_concurrency=int(os.getenv("RESEARCH_MAX_CONCURRENCY", "4")),
+            time_budget=float(os.getenv("RESEARCH_TIME_BUDGET")) if os.getenv("RESEARCH_TIME_BUDGET") else None,
+        )
+
+    async def run(self, query: str, user_profile: dict, stream_callback=None) -> dict:
+        """
+        Run the pipeline to completion and return the final result dict.
+        stream_callback, if given, receives every progress event.
+        """
+        async for event in self.run_stream(query, user_profile):
+            if stream_callback:
+                stream_callback(event)
+            if event["type"] == "done":
+                return event["result"]
+
+    async def run_stream(self, query: str, user_profile: dict):
+        """
+        Run the pipeline as an async generator of progress events: stage,
+        tool_start, tool_end, search_results (as each task's search lands),
+        report_delta (the report in chunks) and finally done with the result.
+        """
+        timings = {}
+        cache = self.artifact_cache
+        cached = {}
+        checkpoint = current_checkpoint()
+        resumed = []
+
+        def restore(stage, key=""):
+            value = checkpoint.get(stage, key) if checkpoint is not None else None
+            if value is not None and stage not in resumed:
+                resumed.append(stage)
+            return value
+
+        async def save(stage, value, key=""):
+            if checkpoint is not None:
+                await checkpoint.put(stage, value, key)
+
+        yield {"type": "stage", "stage": "plan"}
+        start = time.perf_counter()
+        plan = restore("plan")
+        if plan is None:
+            plan_key = cache.key("plan", query_key(query))
+            plan = await cache.get("plan", plan_key)
+            cached["plan"] = plan is not None
+            if plan is None:
+                plan = build_research_plan(query)
+                await cache.set("plan", plan_key, plan)
+            await save("plan", plan)
+        timings["plan"] = time.perf_counter() - start
+
+        yield {"type": "stage", "stage": "research"}
+        start = time.perf_counter()
+        tasks = plan.get("research_tasks", [])
+        # The plan's tasks are the research strategy: the same tasks find the same sources
+        findings_key = cache.key("findings", [task["task"] for task in tasks], self.max_results)
+        findings = await cache.get("findings", findings_key)
+        cached["findings"] = findings is not None
+        if findings is None:
+            events = asyncio.Queue()
+
+            async def research_task(task, upstream):
+                # A task finished by an earlier attempt of this run is not searched again
+                payload = restore("task", task["id"])
+                if payload is None:
+                    events.put_nowait({"type": "tool_start", "tool": "search_web", "task_id": task["id"],
+                                       "query": task["task"]})
+                    task_started = time.perf_counter()
+                    payload = await self.search_engine.search(task["task"], self.max_results)
+                    events.put_nowait({"type": "tool_end", "tool": "search_web", "task_id": task["id"],
+                                       "duration": time.perf_counter() - task_started})
+                    if "error" not in json.loads(payload):
+                        await save("task", payload, task["id"])
+                results = json.loads(payload)
+                events.put_nowait({"type": "search_results", "task_id": task["id"], "results": results})
+                # search() reports failures as payloads; the scheduler must see them as failed tasks
+                if "error" in results:
+                    raise RuntimeError(f"Search failed for task {task['id']}: {results['error']}")
+                return payload
+
+            scheduling = asyncio.ensure_future(self.scheduler.run(tasks, research_task))
+            try:
+                # Forward events while tasks are still running
+                while not scheduling.done() or not events.empty():
+                    getter = asyncio.ensure_future(events.get())
+                    done, _ = await asyncio.wait({getter, scheduling}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter in done:
+                        yield getter.result()
+                    else:
+                        getter.cancel()
+                scheduled = scheduling.result()
+            finally:
+                if not scheduling.done():
+                    scheduling.cancel()
+
+            # Keep plan order; tasks cut by the time budget simply contribute nothing
+            payloads = [scheduled["results"][task["id"]] for task in tasks if task["id"] in scheduled["results"]]
+            findings = {"research_data": collect_findings(payloads), "task_status": scheduled["status"]}
+            # Partial research (failed or timed out tasks) is not worth reusing, nor is
+            # anything built from it: a transient outage must not outlive its error TTL
+            complete = (all(status == "done" for status in scheduled["status"].values())
+                        and bool(findings["research_data"]["sources"]))
+            if complete:
+                await cache.set("findings", findings_key, findings)
+        else:
+            complete = True
+            # Cached findings still back get_sources and lookup_passages for this run
+            store = current_store()
+            for finding in findings["research_data"]["findings"]:
+                store.put(finding)
+        research_data = findings["research_data"]
+        timings["research"] = time.perf_counter() - start
+
+        yield {"type": "stage", "stage": "synthesize"}
+        start = time.perf_counter()
+        synthesis_key = cache.key("synthesis", research_data)
+        synthesis = restore("synthesis")
+        if synthesis is None:
+            synthesis = await cache.get("synthesis", synthesis_key)
+            cached["synthesis"] = synthesis is not None
+            if synthesis is None:
+                synthesis = await run_cpu(synthesize, research_data)
+                synthesis["sources"] = research_data["sources"]
+                if complete:
+                    await cache.set("synthesis", synthesis_key, synthesis)
+            await save("synthesis", synthesis)
+        timings["synthesize"] = time.perf_counter() - start
+
+        yield {"type": "stage", "stage": "report"}
+        start = time.perf_counter()
+        report_key = cache.key("report", synthesis_key, query, user_profile, self.report_format)
+        report = restore("report")
+        if report is None:
+            report = await cache.get("report", report_key)
+            cached["report"] = report is not None
+        if report is None:
+            chunks = []
+            for chunk in render_chunks(build_report(synthesis, query, user_profile), self.report_format):
+                chunks.append(chunk)
+                yield {"type": "report_delta", "delta": chunk}
+            report = "".join(chunks)
+            if complete:
+                await cache.set("report", report_key, report)
+            await save("report", report)
+        else:
+            yield {"type": "report_delta", "delta": report}
+        timings["report"] = time.perf_counter() - start
+
+        timings["total"] = sum(timings.values())
+        yield {"type": "done", "result": {
+            "query": query,
+            "plan": plan,
+            "task_status": findings["task_status"],
+            "synthesis": synthesis,
+            "report": report,
+            "timings": timings,
+            "cached": cached,
+            "resumed": resumed,
+        }}
@@ -0,0 +1,130 @@
+import random
+import re
+import zlib
+from collections import OrderedDict
+
+# Interrogatives (who, when, why, ...) and negations are deliberately not
+# stopwords: "who founded X" and "when was X founded" are different questions
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have i in is it its
+me of on or our should that the their them these this those to was
+will with you your about please tell find search
+""".split())
+
+# Letters and digits of any script; "_" is not a word character for queries
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def _singular(token: str) -> str:
+    # Porter step 1a: fold plurals so "businesses" and "business" match
+    if token.endswith("sses"):
+        return token[:-2]
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")) and len(token) > 3:
+        return token[:-1]
+    return token
+
+
+def canonicalize_query(query: str) -> str:
+    """
+    Normalize a search query so trivially different phrasings share one key.
+    Casefolds, strips punctuation and stopwords, folds plurals, and sorts
+    the remaining tokens so word order does not matter. Words in any script
+    are kept; a query with no word characters at all keys on its
+    whitespace-normalized text, so it never shares an empty key.
+    """
+    folded = query.casefold()
+    tokens = _TOKEN_RE.findall(folded)
+    kept = sorted({_singular(token) for token in tokens if token not in STOPWORDS})
+    # A query made only of stopwords still needs a stable key
+    if kept:
+        return " ".join(kept)
+    return " ".join(tokens) or " ".join(folded.split())
+
+
+class QuerySimilarityIndex:
+    """
+    MinHash/LSH index over character n-grams of canonical queries.
+    Finds a previously seen query whose estimated Jaccard similarity is at
+    least `threshold`, so near-duplicate searches can reuse cached results.
+    """
+
+    _PRIME = (1 << 61) - 1
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, ngram=3, max_entries=4096, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.max_entries = max_entries
+
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, self._PRIME), rng.randrange(0, self._PRIME)) for _ in range(num_perm)]
+        # key -> signature, in insertion order for eviction
+        self._signatures = OrderedDict()
+        self._buckets = [{} for _ in range(bands)]
+
+        self.lookups = 0
+        self.similar_hits = 0
+
+    def _shingles(self, text: str) -> set:
+        padded = f" {text} "
+        if len(padded) <= self.ngram:
+            return {padded}
+        return {padded[i:i + self.ngram] for i in range(len(padded) - self.ngram + 1)}
+
+    def signature(self, text: str) -> tuple:
+        hashes = [zlib.crc32(shingle.encode()) for shingle in self._shingles(text)]
+        prime = self._PRIME
+        return tuple(min((a * h + b) % prime for h in hashes) for a, b in self._perms)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows] for i in range(self.bands)]
+
+    def add(self, key: str):
+        if key in self._signatures:
+            self._signatures.move_to_end(key)
+            return
+        signature = self.signature(key)
+        self._signatures[key] = signature
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band, set()).add(key)
+
+        while len(self._signatures) > self.max_entries:
+            oldest, old_signature = self._signatures.popitem(last=False)
+            for bucket, band in zip(self._buckets, self._band_keys(old_signature)):
+                members = bucket.get(band)
+                if members is not None:
+                    members.discard(oldest)
+                    if not members:
+                        del bucket[band]
+
+    def find_similar(self, key: str):
+        """
+        Return (matching_key, similarity) for the closest indexed key at or
+        above the threshold, or None.
+        """
+        self.lookups += 1
+        signature = self.signature(key)
+        candidates = set()
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band, ()))
+        candidates.discard(key)
+
+        best = None
+        for candidate in candidates:
+            other = self._signatures[candidate]
+            similarity = sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        if best is not None:
+            self.similar_hits += 1
+        return best
+
+    def __len__(self):
+        return len(self._signatures)
@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+from agents import OpenAIChatCompletionsModel
+from openai import APIConnectionError
+
+from rate_limiter import get_limiter
+
+
+def estimate_tokens(system_instructions, input) -> int:
+    # ~4 characters per token is close enough for budgeting
+    text = input if isinstance(input, str) else json.dumps(input, default=str)
+    return (len(system_instructions or "") + len(text)) // 4
+
+
+class RateLimitedModel(OpenAIChatCompletionsModel):
+    """
+    Chat completions model whose calls go through the shared "llm"
+    ProviderLimiter: requests/min and tokens/min budgets, jittered backoff
+    honoring Retry-After, and a circuit breaker. A 429 retries just this
+    model call instead of failing the whole research run.
+    """
+
+    def __init__(self, *args, limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter or get_limiter("llm", retry_on=(APIConnectionError,))
+
+    async def get_response(self, system_instructions, input, *args, **kwargs):
+        estimated = estimate_tokens(system_instructions, input)
+        response = await self.limiter.call(
+            lambda: super(RateLimitedModel, self).get_response(system_instructions, input, *args, **kwargs),
+            tokens=estimated,
+        )
+        self.limiter.record_tokens(response.usage.total_tokens, estimated)
+        return response
+
+    async def stream_response(self, system_instructions, input, *args, **kwargs):
+        estimated = estimate_tokens(system_instructions, input)
+        attempt = 0
+        while True:
+            await self.limiter.acquire(estimated)
+            self.limiter.calls += 1
+            started = False
+            try:
+                async for event in super().stream_response(system_instructions, input, *args, **kwargs):
+                    started = True
+                    if getattr(event, "type", None) == "response.completed" and event.response.usage:
+                        self.limiter.record_tokens(event.response.usage.total_tokens, estimated)
+                    yield event
+            except Exception as e:
+                # Once events have reached the caller the stream cannot be replayed
+                delay = None if started else self.limiter.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.limiter.breaker.record_success()
+            return
@@ -0,0 +1,244 @@
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is rejecting calls."""
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`.
+    acquire() reserves tokens up front (the balance may go negative) and
+    sleeps until the reservation is covered, so concurrent callers queue
+    fairly without a lock.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """
+        Take `amount` tokens and return how long to wait before using them.
+        """
+        self._refill()
+        # Never reserve more than a full bucket or a large request would wait forever
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self, amount: float = 1.0):
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def debit(self, amount: float):
+        """
+        Charge tokens after the fact (e.g. actual usage above the estimate).
+        """
+        self._refill()
+        self.tokens -= amount
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive retryable failures and
+    rejects calls for `reset_timeout` seconds. After that it is half open:
+    calls go through, one success closes it and a failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def check(self):
+        if self.state == "open":
+            raise CircuitOpenError(f"circuit open, retry in {self.reset_timeout - (time.monotonic() - self.opened_at):.1f}s")
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.state == "half_open":
+            self.opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, capped at max_delay.
+    A server-provided Retry-After always wins over the computed delay.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def _status_and_headers(exc):
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or {}
+    return status, headers
+
+
+def parse_retry_after(headers) -> float:
+    """
+    Seconds to wait from a Retry-After (or retry-after-ms) header, or None.
+    """
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderLimiter:
+    """
+    Rate limiting, retries and circuit breaking for one upstream provider.
+    Requests/min and tokens/min are enforced with token buckets; failed
+    calls with a retryable status (429, 5xx, ...) or a transport error are
+    retried here, per call, instead of failing the whole research run.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = None, tokens_per_minute: float = None,
+                 retry: RetryPolicy = None, breaker: CircuitBreaker = None, retry_on: tuple = ()):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_on = (httpx.TransportError, TimeoutError, ConnectionError) + tuple(retry_on)
+
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+
+    async def acquire(self, tokens: float = 0):
+        self.breaker.check()
+        if self.requests is not None:
+            await self.requests.acquire()
+        if self.tokens is not None and tokens:
+            await self.tokens.acquire(tokens)
+
+    def record_tokens(self, used: float, estimated: float = 0):
+        """
+        Charge the token bucket for usage beyond what acquire() reserved.
+        """
+        if self.tokens is not None and used > estimated:
+            self.tokens.debit(used - estimated)
+
+    def retry_delay(self, exc, attempt: int):
+        """
+        Record a failed attempt and return the backoff before the next one,
+        or None if the error is not retryable or attempts are exhausted.
+        """
+        status, headers = _status_and_headers(exc)
+        retryable = status in RETRYABLE_STATUS or (status is None and isinstance(exc, self.retry_on))
+        if not retryable:
+            return None
+        self.breaker.record_failure()
+        if status == 429:
+            self.throttled += 1
+        if attempt + 1 >= self.retry.max_attempts:
+            return None
+        self.retries += 1
+        return self.retry.delay(attempt, parse_retry_after(headers))
+
+    async def call(self, fn, tokens: float = 0):
+        """
+        Await fn() under the limits, retrying retryable failures.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(tokens)
+            self.calls += 1
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "circuit": self.breaker.state,
+        }
+
+
+_limiters = {}
+
+
+def _env_float(name):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def get_limiter(provider: str, retry_on: tuple = ()) -> ProviderLimiter:
+    """
+    Shared limiter for a provider ("tavily", "llm", ...), configured from
+    <PROVIDER>_RPM, <PROVIDER>_TPM, <PROVIDER>_MAX_RETRIES and
+    <PROVIDER>_BREAKER_THRESHOLD environment variables.
+    """
+    if provider not in _limiters:
+        prefix = provider.upper()
+        _limiters[provider] = ProviderLimiter(
+            provider,
+            requests_per_minute=_env_float(f"{prefix}_RPM"),
+            tokens_per_minute=_env_float(f"{prefix}_TPM"),
+            retry=RetryPolicy(max_attempts=int(os.getenv(f"{prefix}_MAX_RETRIES", "4")) + 1),
+            breaker=CircuitBreaker(failure_threshold=int(os.getenv(f"{prefix}_BREAKER_THRESHOLD", "8"))),
+            retry_on=retry_on,
+        )
+    return _limiters[provider]
@@ -0,0 +1,229 @@
+import html
+import json
+from datetime import datetime
+from string import Template
+from urllib.parse import urlsplit
+
+FORMATS = ("text", "markdown", "html", "json")
+
+
+def build_report(synthesis: dict, query: str, profile: dict, now: datetime = None) -> dict:
+    """
+    The structured report: every section as data, so renderers and the
+    executive summary read fields instead of reparsing text. Citations
+    reference the synthesis source list rather than copying it.
+    """
+    now = now or datetime.now()
+    return {
+        "title": "RESEARCH REPORT",
+        "date": now.strftime("%Y-%m-%d"),
+        "generated_at": now.isoformat(),
+        "prepared_for": {
+            "name": profile.get("name") or "User",
+            "city": profile.get("city") or "Unknown",
+            "topic": profile.get("topic") or "General",
+        },
+        "query": query,
+        "sources_analyzed": synthesis.get("sources_analyzed", "multiple"),
+        "confidence_level": synthesis.get("confidence_level", "Unknown"),
+        "summary": synthesis.get("summary", "No summary available"),
+        "key_findings": synthesis.get("key_insights", []),
+        "consensus": synthesis.get("consensus_points") or ["No consensus data available"],
+        "conflicts": synthesis.get("conflicting_points") or ["No conflicts identified"],
+        "citations": synthesis.get("sources", []),
+        "conclusion": (f"This research provides a comprehensive overview of '{query}'. Further "
+                       "investigation may be needed for specific applications or contexts."),
+    }
+
+
+def executive_summary(model: dict, max_findings: int = 3) -> dict:
+    """
+    Executive summary straight from the report model.
+    """
+    return {
+        "query": model["query"],
+        "date": model["date"],
+        "confidence_level": model["confidence_level"],
+        "sources_analyzed": model["sources_analyzed"],
+        "summary": model["summary"],
+        "top_findings": model["key_findings"][:max_findings],
+        "consensus": model["consensus"][:1],
+        "conflicts": model["conflicts"][:1],
+        "citations": len(model["citations"]),
+    }
+
+
+def executive_summary_text(model: dict, max_findings: int = 3) -> str:
+    summary = executive_summary(model, max_findings)
+    lines = [
+        f"Query: {summary['query']}",
+        f"Date: {summary['date']}",
+        f"Confidence Level: {summary['confidence_level']}",
+        f"Sources analyzed: {summary['sources_analyzed']}",
+        f"Summary: {summary['summary']}",
+        "KEY FINDINGS:",
+        *[f"• {finding}" for finding in summary["top_findings"]],
+        *[f"Consensus: {point}" for point in summary["consensus"]],
+        *[f"Conflict: {point}" for point in summary["conflicts"]],
+        f"Citations: {summary['citations']}",
+    ]
+    return "\n".join(lines)
+
+
+# Templates are parsed once at import; rendering only substitutes fields
+
+_TEXT = {
+    "header": Template(
+        "RESEARCH REPORT\n================\n\n"
+        "Date: $date\nPrepared for: $name\nLocation: $city\nResearch Interest: $topic\nOriginal Query: $query\n\n"
+        "EXECUTIVE SUMMARY\n-----------------\n"
+        "This report presents findings on '$query' based on comprehensive research\n"
+        "from $sources_analyzed sources. Key insights have been\n"
+        "synthesized to provide a balanced perspective on the topic.\n\n"
+        "Confidence Level: $confidence_level\n\n"
+        "KEY FINDINGS\n------------\n$summary\n\n"
+    ),
+    "section": Template("\n$title\n$rule\n"),
+    "item": Template("• $text\n"),
+    "citation": Template("[$number] $title - $url\n"),
+    "footer": Template("\n\nCONCLUSION\n----------\n$conclusion\n\nReport generated by Deep Research Agent System on $generated_at\n"),
+}
+
+_MARKDOWN = {
+    "header": Template(
+        "# Research Report\n\n"
+        "| | |\n|---|---|\n| Date | $date |\n| Prepared for | $name |\n| Location | $city |\n"
+        "| Research Interest | $topic |\n| Original Query | $query |\n\n"
+        "## Executive Summary\n\n"
+        "This report presents findings on '$query' based on comprehensive research "
+        "from $sources_analyzed sources.\n\n**Confidence Level:** $confidence_level\n\n"
+        "## Key Findings\n\n$summary\n\n"
+    ),
+    "section": Template("\n## $title\n\n"),
+    "item": Template("- $text\n"),
+    "citation": Template("$number. [$title]($url)\n"),
+    "citation_unlinked": Template("$number. $title\n"),
+    "footer": Template("\n## Conclusion\n\n$conclusion\n\n_Report generated by Deep Research Agent System on ${generated_at}_\n"),
+}
+
+_HTML = {
+    "header": Template(
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Research Report: $query</title></head><body>\n"
+        "<h1>Research Report</h1>\n<dl><dt>Date</dt><dd>$date</dd><dt>Prepared for</dt><dd>$name</dd>"
+        "<dt>Location</dt><dd>$city</dd><dt>Research Interest</dt><dd>$topic</dd>"
+        "<dt>Original Query</dt><dd>$query</dd></dl>\n"
+        "<h2>Executive Summary</h2>\n<p>This report presents findings on '$query' based on comprehensive research "
+        "from $sources_analyzed sources.</p>\n<p><strong>Confidence Level:</strong> $confidence_level</p>\n"
+        "<h2>Key Findings</h2>\n<p>$summary</p>\n"
+    ),
+    "section": Template("<h2>$title</h2>\n"),
+    "list_open": Template("<ul>\n"),
+    "list_close": Template("</ul>\n"),
+    "item": Template("<li>$text</li>\n"),
+    "citations_open": Template("<ol>\n"),
+    "citations_close": Template("</ol>\n"),
+    "citation": Template("<li><a href=\"$url\">$title</a></li>\n"),
+    "citation_unlinked": Template("<li>$title</li>\n"),
+    "empty": Template("<p>$text</p>\n"),
+    "footer": Template("<h2>Conclusion</h2>\n<p>$conclusion</p>\n"
+                       "<footer>Report generated by Deep Research Agent System on $generated_at</footer>\n</body></html>\n"),
+}
+
+_SECTIONS = (("key_findings", None), ("consensus", "AREAS OF CONSENSUS"), ("conflicts", "AREAS OF CONFLICT"))
+_TITLES = {"AREAS OF CONSENSUS": "Areas of Consensus", "AREAS OF CONFLICT": "Areas of Conflict", "CITATIONS": "Citations"}
+
+
+def _fields(model: dict, escape) -> dict:
+    # Every field is escaped: in handoff mode the synthesis (counts and confidence included) comes from the LLM
+    profile = model["prepared_for"]
+    return {
+        "date": escape(str(model["date"])), "generated_at": escape(str(model["generated_at"])),
+        "name": escape(str(profile["name"])), "city": escape(str(profile["city"])), "topic": escape(str(profile["topic"])),
+        "query": escape(str(model["query"])), "sources_analyzed": escape(str(model["sources_analyzed"])),
+        "confidence_level": escape(str(model["confidence_level"])), "summary": escape(str(model["summary"])),
+        "conclusion": escape(str(model["conclusion"])),
+    }
+
+
+def _link(url) -> str:
+    # Only web URLs become links; javascript:, data: and the like from search results do not
+    url = str(url or "")
+    try:
+        scheme = urlsplit(url).scheme.lower()
+    except ValueError:
+        return None
+    return url if scheme in ("http", "https") else None
+
+
+def _render_markup(model: dict, templates: dict, escape, title_case: bool):
+    fields = _fields(model, escape)
+    yield templates["header"].substitute(fields)
+    for key, title in _SECTIONS:
+        if title:
+            heading = _TITLES[title] if title_case else title
+            yield templates["section"].substitute(title=heading, rule="-" * len(title))
+        if "list_open" in templates:
+            yield templates["list_open"].substitute()
+        for text in model[key]:
+            yield templates["item"].substitute(text=escape(str(text)))
+        if "list_close" in templates:
+            yield templates["list_close"].substitute()
+
+    yield templates["section"].substitute(title=_TITLES["CITATIONS"] if title_case else "CITATIONS", rule="-" * 9)
+    if not model["citations"]:
+        yield templates.get("empty", templates["item"]).substitute(text="No sources cited")
+    if "citations_open" in templates:
+        yield templates["citations_open"].substitute()
+    for number, source in enumerate(model["citations"], 1):
+        title = escape(str(source.get("title") or "Unknown title"))
+        url = _link(source.get("url"))
+        if url is None and "citation_unlinked" in templates:
+            yield templates["citation_unlinked"].substitute(number=number, title=title)
+            continue
+        yield templates["citation"].substitute(number=number, title=title,
+                                               url=escape(url or str(source.get("url") or "No URL")))
+    if "citations_close" in templates:
+        yield templates["citations_close"].substitute()
+    yield templates["footer"].substitute(fields)
+
+
+def _render_json(model: dict):
+    # Everything but citations in one piece, then citations one by one
+    head = {key: value for key, value in model.items() if key != "citations"}
+    head["executive_summary"] = executive_summary(model)
+    yield json.dumps(head)[:-1] + ', "citations": ['
+    for number, source in enumerate(model["citations"]):
+        yield (", " if number else "") + json.dumps({"title": source.get("title", ""), "url": source.get("url", "")})
+    yield "]}"
+
+
+def _markdown_escape(text: str) -> str:
+    return text.replace("|", "\\|")
+
+
+def render_chunks(model: dict, fmt: str = "text"):
+    """
+    Render a report model incrementally as a generator of string chunks.
+    Each section and citation is its own chunk, so memory stays flat
+    however many citations there are.
+    """
+    if fmt == "text":
+        return _render_markup(model, _TEXT, lambda text: text, title_case=False)
+    if fmt == "markdown":
+        return _render_markup(model, _MARKDOWN, _markdown_escape, title_case=True)
+    if fmt == "html":
+        return _render_markup(model, _HTML, html.escape, title_case=True)
+    if fmt == "json":
+        return _render_json(model)
+    raise ValueError(f"Unknown report format: {fmt} (expected one of {', '.join(FORMATS)})")
+
+
+def render(synthesis: dict, query: str, profile: dict, fmt: str = "text") -> str:
+    return "".join(render_chunks(build_report(synthesis, query, profile), fmt))
+
+
+def render_json(synthesis_data: str, query: str, profile: dict, fmt: str = "text") -> str:
+    """
+    Render from synthesis JSON; the run_cpu entry point for reports.
+    """
+    return render(json.loads(synthesis_data), query, profile, fmt)
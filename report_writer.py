@@ -1,69 +1,30 @@
-from agents import Agent, function_tool
+from agents import Agent, RunContextWrapper, function_tool
 import json
-from datetime import datetime
+from checkpoint_store import checkpoint_key, current_checkpoint
+from cpu_pool import run_cpu
+from report_renderer import build_report, executive_summary_text, render_json
+from research_context import ResearchContext, run_profile
 
 @function_tool
-def generate_research_report(synthesis_data: str, query: str, user_profile: str) -> str:
+async def generate_research_report(ctx: RunContextWrapper, synthesis_data: str, query: str, user_profile: str = "{}",
+                             format: str = "text") -> str:
     """
     Generate a professional research report from synthesized data.
+    format is text, markdown, html or json.
     Returns a formatted research report with citations.
     """
     try:
-        synthesis = json.loads(synthesis_data)
-        profile = json.loads(user_profile)
-        
-        # Create citations
-        sources = synthesis.get("sources", [])
-        citations = []
-        
-        for i, source in enumerate(sources, 1):
-            citations.append(f"[{i}] {source.get('title', 'Unknown title')} - {source.get('url', 'No URL')}")
-        
-        report = f"""
-        RESEARCH REPORT
-        ================
-        
-        Date: {datetime.now().strftime("%Y-%m-%d")}
-        Prepared for: {profile.get('name', 'User')}
-        Location: {profile.get('city', 'Unknown')}
-        Research Interest: {profile.get('topic', 'General')}
-        Original Query: {query}
-        
-        EXECUTIVE SUMMARY
-        -----------------
-        This report presents findings on '{query}' based on comprehensive research
-        from {synthesis.get('sources_analyzed', 'multiple')} sources. Key insights have been 
-        synthesized to provide a balanced perspective on the topic.
-        
-        Confidence Level: {synthesis.get('confidence_level', 'Unknown')}
-        
-        KEY FINDINGS
-        ------------
-        {synthesis.get('summary', 'No summary available')}
-        
-        {"".join([f"• {insight}\\n" for insight in synthesis.get('key_insights', [])])}
-        
-        AREAS OF CONSENSUS
-        ------------------
-        {"".join([f"• {point}\\n" for point in synthesis.get('consensus_points', ['No consensus data available'])])}
-        
-        AREAS OF CONFLICT
-        -----------------
-        {"".join([f"• {point}\\n" for point in synthesis.get('conflicting_points', ['No conflicts identified'])])}
-        
-        CITATIONS
-        ---------
-        {"\\n".join(citations) if citations else "No sources cited"}
-        
-        
-        CONCLUSION
-        ----------
-        This research provides a comprehensive overview of '{query}'. Further
-        investigation may be needed for specific applications or contexts.
-        
-        Report generated by Deep Research Agent System on {datetime.now().isoformat()}
-        """
-        
+        # Within a run the report is for that run's user, whatever profile the model passes
+        profile = run_profile(ctx) or json.loads(user_profile or "{}")
+        checkpoint = current_checkpoint()
+        key = checkpoint_key(synthesis_data, query, profile, format)
+        report = checkpoint.get("report", key) if checkpoint is not None else None
+        if report is None:
+            report = await run_cpu(render_json, synthesis_data, query, profile, format)
+            if checkpoint is not None:
+                await checkpoint.put("report", report, key)
+        if isinstance(ctx.context, ResearchContext):
+            ctx.context.report = report
         return report
     except Exception as e:
         return f"Error generating report: {str(e)}"
@@ -72,10 +33,20 @@ def generate_research_report(synthesis_data: str, query: str, user_profile: str)
 def generate_executive_summary(detailed_report: str) -> str:
     """
     Generate an executive summary from a detailed report.
+    detailed_report may be the synthesis JSON or a JSON-format report.
     Returns a concise summary for quick reading.
     """
     try:
-        # Extract key sections from the report
+        try:
+            data = json.loads(detailed_report)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            # A JSON report is already the model; a synthesis is turned into one
+            model = data if "key_findings" in data else build_report(data, data.get("query", ""), {})
+            return executive_summary_text(model)
+        
+        # Plain-text report: keep the labelled lines
         lines = detailed_report.split('\n')
         summary = []
         
@@ -96,7 +67,7 @@ report_writer = Agent(
         "Use the generate_research_report tool to format the final report.\n"
         "Include an executive summary, key findings, and conclusions.\n"
         "Add proper citations for all sources used in the research.\n"
-        "Use generate_executive_summary for a concise version.\n"
+        "Use generate_executive_summary with the synthesis JSON for a concise version.\n"
         "Format the report professionally for the end user."
     ),
     tools=[generate_research_report, generate_executive_summary],
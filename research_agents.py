@@ -1,74 +1,136 @@
 from agents import Agent, function_tool
-from tavily import TavilyClient
 import json
 import asyncio
 import os
 from dotenv import load_dotenv
+from search_engine import get_search_engine
+from checkpoint_store import checkpoint_key, current_checkpoint
+from scheduler import TaskScheduler
+from claim_verifier import fact_check_json, verify_claims_json
+from cpu_pool import run_cpu
+from source_reliability import annotate_results, rank_results, score_source, score_sources as score_source_batch
+from payload_store import TOOL_TOKEN_BUDGETS, compact_many, compact_search, current_store, parse_source_refs
 
 # Load environment variables
 load_dotenv()
-tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+search_engine = get_search_engine()
 
-# Cache for search results to avoid duplicate API calls
-search_cache = {}
+# Bounded, TTL-aware cache shared by all searches in this process
+search_cache = search_engine.cache
+
+def _scored(payload_json: str, sort_by: str = "rank", min_trust: float = 0.0, max_age_days: float = 0) -> dict:
+    # Annotate with reliability/trust/recency/rank and apply the caller's filter and order
+    payload = json.loads(payload_json)
+    if "results" in payload:
+        payload["results"] = rank_results(annotate_results(payload["results"]), sort_by, min_trust, max_age_days)
+    return payload
+
+async def _search(query: str, max_results: int = 5) -> str:
+    # In a checkpointed run, searches an earlier attempt finished are replayed, not repeated
+    checkpoint = current_checkpoint()
+    key = checkpoint_key(query, max_results)
+    payload = checkpoint.get("search", key) if checkpoint is not None else None
+    if payload is None:
+        payload = await search_engine.search(query, max_results)
+        if checkpoint is not None and "error" not in json.loads(payload):
+            await checkpoint.put("search", payload, key)
+    return payload
 
 @function_tool
-async def search_web(query: str, max_results: int = 5) -> str:
+async def search_web(query: str, max_results: int = 5, sort_by: str = "rank", min_trust: float = 0.0,
+                     max_age_days: int = 0) -> str:
     """
     Search the web for information using Tavily API.
-    Returns search results as JSON.
-    """
-    # Check cache first
-    cache_key = f"{query}_{max_results}"
-    if cache_key in search_cache:
-        print(f"Using cached results for: {query}")
-        return search_cache[cache_key]
-    
+    Each result carries reliability, trust_score (0-1), recency (0-1) and
+    a combined rank. sort_by is rank, relevance, trust or recency;
+    min_trust drops less trusted sources and max_age_days (0 = any age)
+    drops older dated results.
+    Returns compact results as JSON: each source has a short id and a
+    snippet; pass ids to other tools and use get_sources for full text.
+    """
     try:
-        response = tavily_client.search(
-            query=query, 
-            search_depth="advanced", 
-            max_results=max_results,
-            include_answer=True
-        )
-        
-        results = []
-        for result in response.get("results", []):
-            results.append({
-                "title": result.get("title", ""),
-                "url": result.get("url", ""),
-                "content": result.get("content", "")[:1000] + "..." if len(result.get("content", "")) > 1000 else result.get("content", ""),
-                "score": result.get("score", 0),
-                "published_date": result.get("published_date", ""),
-            })
-        
-        # Include direct answer if available
-        if response.get("answer"):
-            results.insert(0, {
-                "title": "Direct Answer",
-                "url": "",
-                "content": response["answer"],
-                "score": 1.0,
-                "is_direct_answer": True
-            })
-        
-        result_json = json.dumps({
-            "query": query,
-            "results": results,
-            "total_results": len(results),
-        })
+        payload = _scored(await _search(query, max_results), sort_by, min_trust, max_age_days)
+    except ValueError as e:
+        return json.dumps({"error": str(e), "query": query})
+    return json.dumps(compact_search(payload, current_store(), TOOL_TOKEN_BUDGETS["search_web"]))
+
+@function_tool
+async def search_many(queries: list[str], max_results: int = 5) -> str:
+    """
+    Search the web for several queries at once using Tavily API.
+    Queries run in parallel. Returns a JSON list with one compact result
+    set per query, each ordered by combined rank.
+    """
+    results = await asyncio.gather(*(_search(query, max_results) for query in queries))
+    payloads = [_scored(result) for result in results]
+    return json.dumps(compact_many(payloads, current_store(), TOOL_TOKEN_BUDGETS["search_many"]))
+
+@function_tool
+async def execute_research_plan(plan: str, max_results: int = 5) -> str:
+    """
+    Run every task of a research plan (the JSON from create_research_plan).
+    Independent tasks are searched in parallel, high priority first.
+    Returns a JSON object with each task's compact search results and
+    status; a task whose search failed is "failed", with its error in
+    task_errors.
+    """
+    try:
+        tasks = json.loads(plan).get("research_tasks", [])
+        errors = {}
         
-        # Cache the result
-        search_cache[cache_key] = result_json
-        return result_json
+        async def research_task(task, upstream):
+            payload = _scored(await _search(task["task"], max_results))
+            # search() reports failures as payloads; the scheduler must see them as failed tasks
+            if "error" in payload:
+                errors[task["id"]] = payload["error"]
+                raise RuntimeError(f"Search failed for task {task['id']}: {payload['error']}")
+            return payload
         
+        scheduled = await TaskScheduler(max_concurrency=int(os.getenv("RESEARCH_MAX_CONCURRENCY", "4"))).run(tasks, research_task)
+        task_ids = list(scheduled["results"])
+        compact = compact_many([scheduled["results"][task_id] for task_id in task_ids], current_store(),
+                               TOOL_TOKEN_BUDGETS["execute_research_plan"])
+        result = {
+            "task_results": dict(zip(task_ids, compact)),
+            "task_status": scheduled["status"],
+        }
+        if errors:
+            result["task_errors"] = errors
+        return json.dumps(result)
     except Exception as e:
-        error_result = json.dumps({
-            "error": str(e), 
-            "query": query,
+        return json.dumps({
+            "error": str(e),
         })
-        search_cache[cache_key] = error_result
-        return error_result
+
+@function_tool
+def get_sources(source_ids: list[str], max_chars: int = 1000) -> str:
+    """
+    Fetch the full content of sources returned by the search tools.
+    Returns a JSON list of sources (content trimmed to max_chars each).
+    """
+    store = current_store()
+    sources = []
+    budget_chars = TOOL_TOKEN_BUDGETS["get_sources"] * 4
+    for source_id in source_ids:
+        source = store.get(source_id)
+        if source is None:
+            continue
+        content = source.get("content", "")[:max_chars]
+        entry = {"id": source_id, "title": source.get("title", ""), "url": source.get("url", ""), "content": content}
+        budget_chars -= len(content) + 100
+        if budget_chars < 0 and sources:
+            break
+        sources.append(entry)
+    return json.dumps(sources)
+
+@function_tool
+def lookup_passages(query: str, k: int = 5) -> str:
+    """
+    Find the passages most relevant to a question in the content already
+    fetched by earlier searches. Much faster than a new web search; use it
+    for follow-up questions. Returns a JSON list of passages with source ids.
+    """
+    return json.dumps(current_store().passages.lookup(query, k))
 
 @function_tool
 def source_checker(url: str) -> str:
@@ -76,87 +138,71 @@ def source_checker(url: str) -> str:
     Check the reliability of a source based on its domain and characteristics.
     Returns reliability assessment as JSON.
     """
-    reliable_domains = [".edu", ".gov", ".org", "wikipedia.org", "bbc.com", "reuters.com", 
-                       "nytimes.com", "nature.com", "science.org", "who.int"]
-    questionable_domains = [".blog", "medium.com", "quora.com", "reddit.com", "personal.website"]
-    
-    reliability = "Medium"
-    reason = "Standard website"
-    trust_score = 0.5
-    
-    # Check domain patterns
-    for domain in reliable_domains:
-        if domain in url:
-            reliability = "High"
-            trust_score = 0.9
-            reason = f"Known reliable domain: {domain}"
-            break
-            
-    for domain in questionable_domains:
-        if domain in url:
-            reliability = "Low"
-            trust_score = 0.3
-            reason = f"User-generated content domain: {domain}"
-            break
-    
-    # Additional checks
-    if "research" in url or "study" in url:
-        trust_score = min(1.0, trust_score + 0.1)
-        reason += " | Contains research/study content"
-    
-    if "news" in url or "article" in url:
-        trust_score = min(1.0, trust_score + 0.05)
-    
-    return json.dumps({
-        "url": url,
-        "reliability": reliability,
-        "trust_score": trust_score,
-        "reason": reason,
-    })
+    return json.dumps(score_source(url))
+
+@function_tool
+def score_sources(urls: list[str]) -> str:
+    """
+    Check the reliability of many sources at once (e.g. every URL from a search).
+    Returns a JSON list of reliability assessments, in input order.
+    """
+    return json.dumps(score_source_batch(urls))
+
+def _compact_source_ids(data) -> list[str]:
+    # Ids in search tool output (search_web, search_many or execute_research_plan JSON)
+    if isinstance(data, list):
+        return [source_id for item in data for source_id in _compact_source_ids(item)]
+    if not isinstance(data, dict):
+        return []
+    if isinstance(data.get("task_results"), dict):
+        return _compact_source_ids(list(data["task_results"].values()))
+    ids = [result["id"] for result in data.get("results", []) if isinstance(result, dict) and "id" in result]
+    return ids + [source_id for source_id in data.get("already_seen", []) if isinstance(source_id, str)]
+
+def _resolve_sources(sources: str):
+    # Source ids (or "all") come from the payload store. So does search tool output:
+    # it only carries snippets, and claims must be checked against the full text.
+    # Raw search results JSON is passed through and parsed by the worker
+    refs = parse_source_refs(sources)
+    if refs is None:
+        try:
+            refs = list(dict.fromkeys(_compact_source_ids(json.loads(sources)))) or None
+        except ValueError:
+            pass
+    return current_store().resolve(refs) if refs is not None else sources
 
 @function_tool
-def fact_finder(claim: str, sources: str) -> str:
+async def fact_finder(claim: str, sources: str) -> str:
     """
     Fact-check a specific claim against provided sources.
+    sources may be a JSON list of source ids or the output of search_web,
+    search_many or execute_research_plan; sources are looked up by id and
+    checked in full, not by snippet.
     Returns fact-check assessment as JSON.
     """
     try:
-        sources_data = json.loads(sources)
-        
-        supporting_sources = []
-        contradicting_sources = []
-        
-        for source in sources_data.get("results", [])[:3]:  # Check top 3 sources
-            content = source.get("content", "").lower()
-            claim_lower = claim.lower()
-            
-            if claim_lower in content:
-                supporting_sources.append({
-                    "title": source.get("title", ""),
-                    "url": source.get("url", "")
-                })
-            else:
-                contradicting_sources.append({
-                    "title": source.get("title", ""),
-                    "url": source.get("url", "")
-                })
-        
-        confidence = "High" if len(supporting_sources) > len(contradicting_sources) else "Medium"
-        if len(supporting_sources) == 0:
-            confidence = "Low"
-        
+        return await run_cpu(fact_check_json, claim, _resolve_sources(sources))
+    except Exception as e:
         return json.dumps({
+            "error": str(e),
             "claim": claim,
-            "supporting_sources": supporting_sources,
-            "contradicting_sources": contradicting_sources,
-            "confidence": confidence,
-            "assessment": f"Claim is {'supported' if confidence == 'High' else 'contested' if confidence == 'Medium' else 'not supported'} by available sources",
         })
-        
+
+@function_tool
+async def verify_claims(claims: list[str], sources: str = "all") -> str:
+    """
+    Verify many claims at once against the same sources.
+    sources is a JSON list of source ids, "all" for every source found so
+    far, or the output of a search tool (its sources are looked up by id
+    and checked in full). Returns a JSON list with a support score,
+    verdict and best-matching passages per claim.
+    """
+    try:
+        return await run_cpu(verify_claims_json, claims, _resolve_sources(sources))
     except Exception as e:
         return json.dumps({
             "error": str(e),
-            "claim": claim,
+            "claims": claims,
         })
 
 # Research coordinator agent
@@ -165,13 +211,19 @@ research_coordinator = Agent(
     instructions=(
         "You coordinate research tasks using web search and source checking.\n"
         "Use search_web to gather information on research tasks.\n"
-        "Use check_source_reliability to assess source credibility.\n"
+        "Use search_many to search several research tasks in parallel.\n"
+        "Use execute_research_plan to run a whole research plan at once.\n"
+        "Search results give each source a short id; refer to sources by id\n"
+        "and use get_sources only when you need a source's full text.\n"
+        "Use lookup_passages for follow-up questions before searching again.\n"
+        "Search results already carry reliability, trust_score, recency and rank;\n"
+        "use search_web's sort_by/min_trust/max_age_days to favour strong sources.\n"
         "Gather multiple perspectives on each research task.\n"
         "Look for conflicts between sources and note them.\n"
         "Prioritize recent sources when available.\n"
         "Return comprehensive research findings as structured JSON."
     ),
-    tools=[search_web, source_checker],
+    tools=[search_web, search_many, execute_research_plan, lookup_passages, get_sources, source_checker],
     handoffs=[]
 )
 
@@ -181,11 +233,14 @@ fact_checker_agent = Agent(
     instructions=(
         "You verify specific claims and facts using available sources.\n"
         "Use fact_check_claim to validate important statements.\n"
+        "Use verify_claims to check many claims in a single call.\n"
+        "Pass sources as a JSON list of source ids from the search results, or \"all\";\n"
+        "claims are checked against the full stored text of each source, not its snippet.\n"
         "Provide confidence levels for each fact check.\n"
         "Note when sources contradict each other.\n"
         "Return structured fact-checking reports."
     ),
-    tools=[fact_finder],
+    tools=[fact_finder, verify_claims, lookup_passages, get_sources],
     handoffs=[]
 )
 
@@ -195,10 +250,11 @@ source_evaluator_agent = Agent(
     instructions=(
         "You specialize in evaluating source quality and reliability.\n"
         "Use check_source_reliability to assess websites and publications.\n"
+        "Use score_sources to assess every URL from a search in one call.\n"
         "Consider factors like domain authority, publication date, and content type.\n"
         "Provide detailed reliability assessments for research sources.\n"
         "Return structured evaluation reports."
     ),
-    tools=[source_checker],
+    tools=[source_checker, score_sources],
     handoffs=[]
 )
\ No newline at end of file
@@ -0,0 +1,48 @@
+import os
+
+from checkpoint_store import RunCheckpoint
+from payload_store import PayloadStore
+
+
+def profile_from_env() -> dict:
+    """
+    The single-user profile from USER_NAME, USER_CITY, USER_TOPIC and USER_ID.
+    """
+    return {
+        "name": os.getenv("USER_NAME"),
+        "city": os.getenv("USER_CITY"),
+        "topic": os.getenv("USER_TOPIC"),
+        "user_id": os.getenv("USER_ID"),
+    }
+
+
+class ResearchContext:
+    """
+    Per-run state handed to agents and tools as RunContextWrapper.context.
+    Every run gets its own profile and payload store, so concurrent runs in
+    one process never read each other's user or search results. A
+    checkpointed run also carries its RunCheckpoint.
+    """
+
+    def __init__(self, query: str, user_profile: dict, mode: str = "handoff", tenant: str = "default",
+                 store: PayloadStore = None, checkpoint: RunCheckpoint = None):
+        self.query = query
+        self.user_profile = user_profile
+        self.mode = mode
+        self.tenant = tenant
+        self.store = store if store is not None else PayloadStore()
+        self.checkpoint = checkpoint
+        # The last report generate_research_report produced in this run
+        self.report = None
+
+    @property
+    def run_id(self) -> str:
+        return self.checkpoint.run_id if self.checkpoint is not None else None
+
+
+def run_profile(ctx) -> dict:
+    """
+    The user profile of the run a tool was called in, or None outside a run.
+    """
+    context = getattr(ctx, "context", None)
+    return context.user_profile if isinstance(context, ResearchContext) else None
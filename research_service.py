@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import aclosing, suppress
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from cpu_pool import shutdown_pool
+from metrics import REGISTRY
+from tenant_queue import AdmissionError, create_tenant_queue
+
+MODES = ("handoff", "pipeline")
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADER_LINES = 100
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str = None, headers: dict = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.message = message or status.phrase
+        self.headers = headers or {}
+
+
+async def read_request(reader: asyncio.StreamReader):
+    """
+    Parse one HTTP/1.1 request into (method, path, headers, body), or None
+    if the client closed the connection without sending one.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method.upper(), urlsplit(target).path, headers, body
+
+
+def _head(status: HTTPStatus, content_type: str, headers: dict, length: int = None) -> bytes:
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}", "Connection: close"]
+    lines.append(f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked")
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+class ResearchService:
+    """
+    Multi-tenant HTTP front end for one shared DeepResearchSystem.
+
+        POST /research  {"query", "mode"?, "user_profile"?, "tenant"?, "stream"?, "run_id"?}
+        GET  /healthz   queue state and process CPU seconds
+        GET  /metrics   Prometheus text
+
+    Every request runs with its own profile and ResearchContext, so one
+    process serves many users at once while sharing the pooled LLM and
+    search clients, caches and rate limiters. Runs are admitted through a
+    TenantQueue: tenants (X-Tenant-ID header, "tenant", or the profile's
+    user_id) are served round-robin, and a full queue answers 429 with
+    Retry-After instead of queueing without bound. With "stream": true the
+    response is chunked NDJSON, one progress event per line. Every run
+    reports its run_id; posting it back as "run_id" resumes a failed run
+    from its checkpoints.
+    """
+
+    def __init__(self, system=None, queue=None):
+        if system is None:
+            from deep_research_system import DeepResearchSystem
+            system = DeepResearchSystem()
+        self.system = system
+        self.queue = queue or create_tenant_queue()
+        REGISTRY.gauge_callback("service_runs_active", "Research runs executing", lambda: self.queue.active)
+        REGISTRY.gauge_callback("service_runs_queued", "Research runs waiting for a slot", lambda: self.queue.queued)
+        REGISTRY.counter_callback("service_runs_rejected_total", "Research runs refused by admission control",
+                                  lambda: self.queue.rejected)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await read_request(reader)
+            if request is not None:
+                await self.route(*request, writer)
+        except HTTPError as e:
+            with suppress(ConnectionError):
+                await self.respond(writer, e.status, {"error": e.message}, e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # Client went away; its run (if any) was cancelled with the generator
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def route(self, method: str, path: str, headers: dict, body: bytes, writer: asyncio.StreamWriter):
+        if path == "/research":
+            if method != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, headers={"Allow": "POST"})
+            await self.research(headers, body, writer)
+        elif path == "/healthz":
+            await self.respond(writer, HTTPStatus.OK, {
+                "status": "ok", "queue": self.queue.stats(), "cpu_seconds": time.process_time(),
+            })
+        elif path == "/metrics":
+            await self.respond(writer, HTTPStatus.OK, REGISTRY.to_prometheus(), content_type="text/plain; version=0.0.4")
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    async def respond(self, writer, status: HTTPStatus, payload, headers: dict = None,
+                      content_type: str = "application/json"):
+        data = (payload if isinstance(payload, str) else json.dumps(payload, default=str)).encode("utf-8")
+        writer.write(_head(status, content_type, headers or {}, len(data)) + data)
+        await writer.drain()
+
+    async def research(self, headers: dict, body: bytes, writer: asyncio.StreamWriter):
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+        if not isinstance(request, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        run_id = request.get("run_id")
+        if run_id is not None and not isinstance(run_id, str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "run_id must be a string")
+        checkpoints = self.system.checkpoints
+        resumed_run = (await asyncio.to_thread(checkpoints.get_run, run_id)
+                       if run_id is not None and checkpoints is not None else None)
+        # Resuming a known run reuses its query; anything else needs one
+        query = request.get("query")
+        if resumed_run is None and (not isinstance(query, str) or not query.strip()):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "A non-empty \"query\" is required")
+        mode = request.get("mode")
+        if mode is not None and mode not in MODES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"mode must be one of {', '.join(MODES)}")
+        profile = request.get("user_profile")
+        if profile is not None and not isinstance(profile, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "user_profile must be an object")
+        tenant = str(headers.get("x-tenant-id") or request.get("tenant") or (profile or {}).get("user_id") or "anonymous")
+        if resumed_run is not None and resumed_run["tenant"] != tenant:
+            # Runs are private to their tenant
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No run {run_id!r} for this tenant")
+
+        submitted = time.perf_counter()
+        try:
+            async with self.queue.slot(tenant):
+                queue_wait = time.perf_counter() - submitted
+                events = self.system.research_stream(query, mode, profile, tenant, run_id)
+                if request.get("stream"):
+                    await self.stream(writer, events, queue_wait)
+                else:
+                    await self.complete(writer, events, tenant, queue_wait)
+        except AdmissionError as e:
+            raise HTTPError(HTTPStatus.TOO_MANY_REQUESTS, str(e), {"Retry-After": f"{e.retry_after:g}"})
+
+    async def complete(self, writer, events, tenant: str, queue_wait: float):
+        done = None
+        run_id = None
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    if event["type"] == "start":
+                        run_id = event.get("run_id")
+                    elif event["type"] == "done":
+                        done = event
+        except Exception as e:
+            # The client can post run_id back to resume from the last completed stage
+            await self.respond(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Research failed: {e}", "run_id": run_id})
+            return
+        if done is None:
+            await self.respond(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Research ended without a result"})
+            return
+        run = dict(done.get("run") or {})
+        # Per-run metric snapshots are large; /metrics has the aggregate
+        run.pop("metrics", None)
+        await self.respond(writer, HTTPStatus.OK, {
+            "output": done["output"], "timings": done["timings"], "run": run,
+            "tenant": tenant, "queue_wait": queue_wait,
+        })
+
+    async def stream(self, writer, events, queue_wait: float):
+        writer.write(_head(HTTPStatus.OK, "application/x-ndjson", {}))
+
+        async def send(event):
+            data = (json.dumps(event, default=str) + "\n").encode("utf-8")
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            # Waiting for the socket here is the backpressure on a slow client
+            await writer.drain()
+
+        await send({"type": "admitted", "queue_wait": queue_wait})
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    if event["type"] == "done" and event.get("run"):
+                        event = dict(event, run={key: value for key, value in event["run"].items() if key != "metrics"})
+                    await send(event)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            await send({"type": "error", "error": f"Research failed: {e}"})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8000, reuse_port: bool = False) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port, reuse_port=reuse_port or None,
+                                          backlog=int(os.getenv("SERVICE_BACKLOG", "512")))
+
+
+async def run_service(host: str, port: int, reuse_port: bool = False):
+    service = ResearchService()
+    if os.getenv("SERVICE_WARM_UP", "1") == "1":
+        # Open connections, start CPU workers and build the agents before taking traffic
+        warmed = await service.system.warm_up()
+        print(f"Warm-up: {json.dumps(warmed, default=str)}", flush=True)
+    server = await service.serve(host, port, reuse_port)
+    address = server.sockets[0].getsockname()
+    # Tools (and benchmarks.load_test) read the bound port from this line
+    print(f"Listening on http://{address[0]}:{address[1]}", flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        shutdown_pool()
+
+
+def run_workers(host: str, port: int, workers: int):
+    """
+    Run `workers` service processes accepting on one port (SO_REUSEPORT),
+    so one host can use all its cores. Unless configured otherwise they
+    share the search and artifact caches through SQLite files, so a search
+    made by one process is a cache hit in every other.
+    """
+    for name, filename in (("SEARCH_CACHE_PATH", "search_cache.sqlite"), ("ARTIFACT_CACHE_PATH", "artifact_cache.sqlite")):
+        if name not in os.environ:
+            os.environ[name] = os.path.join(tempfile.gettempdir(), f"deep_research_{filename}")
+
+    # Hold the port so every worker binds the same one, even when 0 picked it
+    holder = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    holder.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    holder.bind((host, port))
+    port = holder.getsockname()[1]
+
+    command = [sys.executable, os.path.abspath(__file__), "--host", host, "--port", str(port), "--reuse-port"]
+    children = [subprocess.Popen(command) for _ in range(workers)]
+
+    def stop(signum, frame):
+        for child in children:
+            child.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        for child in children:
+            child.wait()
+    finally:
+        holder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve research runs over HTTP to many users at once.")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8000")), help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVICE_WORKERS", "1")),
+                        help="service processes sharing the port and caches (e.g. one per core)")
+    parser.add_argument("--reuse-port", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.workers > 1:
+        run_workers(args.host, args.port, args.workers)
+    else:
+        asyncio.run(run_service(args.host, args.port, args.reuse_port))
+
+
+if __name__ == "__main__":
+    main()
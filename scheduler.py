@@ -0,0 +1,155 @@
+import asyncio
+import heapq
+import re
+
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+
+_ESTIMATE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "": 60}
+
+
+def parse_time_estimate(estimate) -> float:
+    """
+    Convert a plan time estimate such as "10m", "90s" or "1h" into seconds.
+    A bare number, whether 10 or "10", is in minutes like the plans' own
+    estimates. Returns 0.0 when the estimate is missing or unreadable.
+    """
+    if isinstance(estimate, (int, float)):
+        return float(estimate) * _UNIT_SECONDS[""]
+    match = _ESTIMATE_RE.match(estimate or "")
+    if not match:
+        return 0.0
+    return float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+def _check_acyclic(dependencies: dict):
+    visiting, done = set(), set()
+
+    def visit(task_id):
+        if task_id in done:
+            return
+        if task_id in visiting:
+            raise ValueError(f"Dependency cycle through task {task_id}")
+        visiting.add(task_id)
+        for dependency in dependencies[task_id]:
+            visit(dependency)
+        visiting.discard(task_id)
+        done.add(task_id)
+
+    for task_id in dependencies:
+        visit(task_id)
+
+
+class TaskScheduler:
+    """
+    Runs research plan tasks as a dependency DAG.
+
+    Tasks may list prerequisite task ids in "depends_on"; everything else
+    runs concurrently up to max_concurrency. Ready tasks start in priority
+    order, then shortest time_estimate first. With a time_budget (seconds)
+    the scheduler learns how plan estimates map to real wall time, skips
+    tasks that can no longer finish in time, and cancels whatever is still
+    running when the budget expires, returning partial results.
+    """
+
+    def __init__(self, max_concurrency=4, time_budget=None):
+        self.max_concurrency = max_concurrency
+        self.time_budget = time_budget
+
+    async def run(self, tasks: list[dict], worker) -> dict:
+        """
+        Execute tasks with worker(task, upstream_results) and return
+        {"results": {id: result}, "status": {id: status}, "elapsed": seconds}.
+        Status is one of done, failed, timed_out, skipped or blocked.
+        """
+        by_id = {task["id"]: task for task in tasks}
+        dependencies = {}
+        for task_id, task in by_id.items():
+            missing = [dep for dep in task.get("depends_on", []) if dep not in by_id]
+            if missing:
+                raise ValueError(f"Task {task_id} depends on unknown tasks: {missing}")
+            dependencies[task_id] = set(task.get("depends_on", []))
+        _check_acyclic(dependencies)
+
+        dependents = {task_id: [] for task_id in by_id}
+        for task_id, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(task_id)
+        waiting_on = {task_id: len(deps) for task_id, deps in dependencies.items()}
+        estimates = {task_id: parse_time_estimate(task.get("time_estimate")) for task_id, task in by_id.items()}
+
+        ready = []
+        order = {task_id: index for index, task_id in enumerate(by_id)}
+
+        def push(task_id):
+            rank = PRIORITY_RANK.get(by_id[task_id].get("priority"), len(PRIORITY_RANK))
+            heapq.heappush(ready, (rank, estimates[task_id], order[task_id], task_id))
+
+        for task_id, count in waiting_on.items():
+            if count == 0:
+                push(task_id)
+
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        deadline = started_at + self.time_budget if self.time_budget else None
+        # Observed wall seconds per estimated second, learned from completions
+        observed_seconds = 0.0
+        observed_estimate = 0.0
+
+        results, status = {}, {}
+        running = {}
+
+        try:
+            while ready or running:
+                now = loop.time()
+                while ready and len(running) < self.max_concurrency:
+                    _, estimate, _, task_id = heapq.heappop(ready)
+                    if deadline and observed_estimate and estimate:
+                        expected = estimate * observed_seconds / observed_estimate
+                        if now + expected > deadline:
+                            status[task_id] = "skipped"
+                            continue
+                    upstream = {dep: results[dep] for dep in dependencies[task_id]}
+                    running[asyncio.ensure_future(worker(by_id[task_id], upstream))] = (task_id, now)
+
+                if not running:
+                    break
+                timeout = max(0.0, deadline - loop.time()) if deadline else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+
+                for future in done:
+                    task_id, task_started = running.pop(future)
+                    if future.exception() is not None:
+                        status[task_id] = "failed"
+                        continue
+                    results[task_id] = future.result()
+                    status[task_id] = "done"
+                    if estimates[task_id]:
+                        observed_seconds += loop.time() - task_started
+                        observed_estimate += estimates[task_id]
+                    for dependent in dependents[task_id]:
+                        waiting_on[dependent] -= 1
+                        if waiting_on[dependent] == 0:
+                            push(dependent)
+        except asyncio.CancelledError:
+            # The caller gave up (client disconnect, closed stream): stop every search still in flight
+            for future in running:
+                future.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+
+        # Time budget expired: cancel stragglers and keep partial results
+        for future, (task_id, _) in running.items():
+            future.cancel()
+            status[task_id] = "timed_out"
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+        for task_id in by_id:
+            if task_id not in status:
+                blocked = any(status.get(dep) != "done" for dep in dependencies[task_id])
+                status[task_id] = "blocked" if blocked else "skipped"
+
+        return {"results": results, "status": status, "elapsed": loop.time() - started_at}
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_store import SQLiteConnection
+
+
+class SearchCache:
+    """
+    Bounded cache for search payloads.
+    An in-memory LRU (capped by entry count and by bytes) sits in front of an
+    optional SQLite tier that several processes can share. Every entry has a
+    TTL; error payloads get a much shorter one so a transient failure does
+    not poison a query.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, ttl=24 * 3600,
+                 error_ttl=60, disk_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.disk_path = disk_path
+
+        # key -> (value, expires_at, size)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # Memory tier lock; the database has its own, so a slow disk read on a
+        # worker thread never holds up memory hits on the event loop
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = SQLiteConnection(disk_path, (
+            "CREATE TABLE IF NOT EXISTS search_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)",
+        )) if disk_path else None
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # Memory tier
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key, value, expires_at):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    # Disk tier
+
+    def _disk_get(self, key, now):
+        row = self._db.get().execute(
+            "SELECT value, expires_at FROM search_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        return row
+
+    def _disk_set(self, key, value, expires_at):
+        db = self._db.get()
+        db.execute(
+            "INSERT OR REPLACE INTO search_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, expires_at),
+        )
+        db.commit()
+
+    # Tier access
+
+    def _memory_get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._drop(key)
+            self.expirations += 1
+            return None
+
+    def _disk_lookup(self, key, now):
+        with self._db_lock:
+            return self._disk_get(key, now)
+
+    def _disk_result(self, key, row):
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self._store(key, row[0], row[1])
+            self.hits += 1
+            self.disk_hits += 1
+            return row[0]
+
+    def _expiry(self, error, ttl):
+        if ttl is None:
+            ttl = self.error_ttl if error else self.ttl
+        return time.time() + ttl if ttl > 0 else None
+
+    def _disk_store(self, key, value, expires_at):
+        with self._db_lock:
+            self._disk_set(key, value, expires_at)
+
+    # Public API
+
+    def get(self, key):
+        """
+        Return the cached payload for key, or None on a miss.
+        Blocks on the disk tier; event loop code uses aget().
+        """
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+        return self._disk_result(key, self._disk_lookup(key, now) if self.disk_path else None)
+
+    async def aget(self, key):
+        """
+        get() for the event loop: memory hits return at once and the disk
+        tier is read on a worker thread, so a busy shared database never
+        stalls other requests.
+        """
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+        row = await asyncio.to_thread(self._disk_lookup, key, now) if self.disk_path else None
+        return self._disk_result(key, row)
+
+    def set(self, key, value, error=False, ttl=None):
+        """
+        Cache a payload. Errors use error_ttl unless ttl is given.
+        Blocks on the disk tier; event loop code uses aset().
+        """
+        expires_at = self._expiry(error, ttl)
+        if expires_at is None:
+            return
+        with self._lock:
+            self._store(key, value, expires_at)
+        # Errors stay process-local; only good results are shared
+        if self.disk_path and not error:
+            self._disk_store(key, value, expires_at)
+
+    async def aset(self, key, value, error=False, ttl=None):
+        """
+        set() for the event loop; the disk write runs on a worker thread.
+        """
+        expires_at = self._expiry(error, ttl)
+        if expires_at is None:
+            return
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self.disk_path and not error:
+            await asyncio.to_thread(self._disk_store, key, value, expires_at)
+
+    def purge_expired(self):
+        """
+        Drop expired entries from both tiers.
+        """
+        now = time.time()
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[1] <= now]:
+                self._drop(key)
+                self.expirations += 1
+        if self.disk_path:
+            with self._db_lock:
+                db = self._db.get()
+                db.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+                db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk_path:
+            with self._db_lock:
+                db = self._db.get()
+                db.execute("DELETE FROM search_cache")
+                db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_search_cache() -> SearchCache:
+    """
+    Build a SearchCache from environment variables.
+    Set SEARCH_CACHE_PATH to enable the shared SQLite tier.
+    """
+    return SearchCache(
+        max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+        ttl=float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600))),
+        error_ttl=float(os.getenv("SEARCH_CACHE_ERROR_TTL", "60")),
+        disk_path=os.getenv("SEARCH_CACHE_PATH") or None,
+    )
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from metrics import REGISTRY, tavily_latency
+from query_dedup import QuerySimilarityIndex, canonicalize_query
+from rate_limiter import get_limiter
+from search_cache import create_search_cache
+from singleflight import SingleFlight
+
+TAVILY_API_URL = "https://api.tavily.com"
+
+
+async def open_connections(client: httpx.AsyncClient, url: str, connections: int = 1):
+    """
+    Fill an httpx client's pool with up to `connections` live connections
+    to url by sending concurrent HEAD requests.
+    """
+    async def connect():
+        try:
+            await client.head(url)
+        except httpx.HTTPError:
+            # Only the connection matters; the endpoint may not answer HEAD
+            pass
+
+    await asyncio.gather(*(connect() for _ in range(max(1, connections))))
+
+
+def format_results(query: str, response: dict) -> str:
+    """
+    Turn a raw Tavily response into the JSON payload returned by search_web.
+    """
+    results = []
+    for result in response.get("results", []):
+        content = result.get("content", "")
+        results.append({
+            "title": result.get("title", ""),
+            "url": result.get("url", ""),
+            "content": content[:1000] + "..." if len(content) > 1000 else content,
+            "score": result.get("score", 0),
+            "published_date": result.get("published_date", ""),
+        })
+
+    # Include direct answer if available
+    if response.get("answer"):
+        results.insert(0, {
+            "title": "Direct Answer",
+            "url": "",
+            "content": response["answer"],
+            "score": 1.0,
+            "is_direct_answer": True
+        })
+
+    return json.dumps({
+        "query": query,
+        "results": results,
+        "total_results": len(results),
+    })
+
+
+class SearchEngine:
+    """
+    Non-blocking Tavily backend.
+    Requests go through a pooled httpx.AsyncClient, bounded by a global
+    concurrency cap and a per-host cap so a burst of searches cannot
+    open an unbounded number of connections.
+    Calls pass through an optional ProviderLimiter for rate limiting,
+    retries and circuit breaking. Results are memoized in an optional SearchCache under a canonicalized
+    query key; an optional QuerySimilarityIndex lets near-duplicate queries
+    reuse those results too. Concurrent misses for the same key share one
+    upstream request.
+    """
+
+    def __init__(self, api_key=None, base_url=None, max_concurrency=8, per_host_limit=4, timeout=30.0,
+                 cache=None, similarity_index=None, limiter=None):
+        self.api_key = api_key
+        self.limiter = limiter
+        self.cache = cache
+        self.similarity_index = similarity_index
+        self.base_url = (base_url or TAVILY_API_URL).rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self._client = None
+        self._loop = None
+        self._global_limit = None
+        self._host_limits = {}
+        self._inflight = SingleFlight()
+
+        # Upstream calls avoided by query normalization / similarity lookup
+        self.canonical_hits = 0
+        self.similar_hits = 0
+
+    def _bind_loop(self):
+        # httpx clients and asyncio semaphores belong to one event loop, so
+        # rebuild them when the engine is reused under a new asyncio.run()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+            self._host_limits = {}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def fetch(self, query: str, max_results: int = 5) -> dict:
+        """
+        Run one raw Tavily search and return the decoded response.
+        Retryable failures are retried by the limiter; anything left raises.
+        """
+        self._bind_loop()
+        url = f"{self.base_url}/search"
+        payload = {
+            "query": query,
+            "search_depth": "advanced",
+            "max_results": max_results,
+            "include_answer": True,
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        async def attempt():
+            # Hold connection slots only for the request itself, not for backoff
+            async with self._global_limit, self._host_limit(url):
+                started = time.perf_counter()
+                response = await self._client.post(url, json=payload, headers=headers)
+                tavily_latency.observe(time.perf_counter() - started)
+            response.raise_for_status()
+            return response.json()
+
+        if self.limiter is None:
+            return await attempt()
+        return await self.limiter.call(attempt)
+
+    async def search(self, query: str, max_results: int = 5) -> str:
+        """
+        Search Tavily and return results as the search_web JSON payload.
+        Errors are returned as JSON instead of raised.
+        """
+        canonical = canonicalize_query(query)
+        cache_key = f"{canonical}_{max_results}"
+        if self.cache is not None:
+            cached = await self.cache.aget(cache_key)
+            if cached is not None:
+                # Payloads start with the raw query that filled the entry; a negative-cached
+                # error is not a result another phrasing got for free
+                if not cached.startswith(('{"error"', json.dumps({"query": query})[:-1])):
+                    self.canonical_hits += 1
+                return cached
+
+            if self.similarity_index is not None:
+                match = self.similarity_index.find_similar(canonical)
+                cached = await self.cache.aget(f"{match[0]}_{max_results}") if match else None
+                if cached is not None:
+                    self.similar_hits += 1
+                    return cached
+
+        try:
+            return await self._inflight.do(cache_key, lambda: self._load(query, max_results, canonical, cache_key))
+        except Exception as e:
+            return json.dumps({
+                "error": str(e),
+                "query": query,
+            })
+
+    async def _load(self, query, max_results, canonical, cache_key):
+        # Runs once per in-flight key; failures are negative-cached and then
+        # re-raised so every coalesced caller sees the same error
+        try:
+            response = await self.fetch(query, max_results)
+        except Exception as e:
+            if self.cache is not None:
+                await self.cache.aset(cache_key, json.dumps({"error": str(e), "query": query}), error=True)
+            raise
+
+        result_json = format_results(query, response)
+        if self.cache is not None:
+            await self.cache.aset(cache_key, result_json)
+            if self.similarity_index is not None:
+                self.similarity_index.add(canonical)
+        return result_json
+
+    async def search_many(self, queries: list[str], max_results: int = 5) -> list[str]:
+        """
+        Run several searches concurrently.
+        Returns one JSON payload per query, in input order.
+        """
+        return await asyncio.gather(*(self.search(query, max_results) for query in queries))
+
+    def dedup_stats(self) -> dict:
+        return {
+            "canonical_hits": self.canonical_hits,
+            "similar_hits": self.similar_hits,
+            "coalesced": self._inflight.coalesced,
+            "calls_saved": self.canonical_hits + self.similar_hits + self._inflight.coalesced,
+        }
+
+    async def warm_up(self, connections: int = 1):
+        """
+        Open up to `connections` pooled connections to the search API now,
+        so the first searches do not pay for TCP and TLS setup.
+        """
+        self._bind_loop()
+        await open_connections(self._client, self.base_url, min(connections, self.max_concurrency))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+
+def create_search_engine() -> SearchEngine:
+    """
+    Build a SearchEngine from environment variables.
+    SEARCH_SIMILARITY_THRESHOLD enables near-duplicate reuse (e.g. 0.8).
+    """
+    threshold = os.getenv("SEARCH_SIMILARITY_THRESHOLD")
+    return SearchEngine(
+        api_key=os.getenv("TAVILY_API_KEY"),
+        base_url=os.getenv("TAVILY_API_URL"),
+        max_concurrency=int(os.getenv("SEARCH_MAX_CONCURRENCY", "8")),
+        per_host_limit=int(os.getenv("SEARCH_PER_HOST_LIMIT", "4")),
+        cache=create_search_cache(),
+        similarity_index=QuerySimilarityIndex(threshold=float(threshold)) if threshold else None,
+        limiter=get_limiter("tavily"),
+    )
+
+
+_shared_engine = None
+
+
+def get_search_engine() -> SearchEngine:
+    """
+    The process-wide SearchEngine, built from the environment on first use.
+    Its cache and dedup counters are exported as metrics.
+    """
+    global _shared_engine
+    if _shared_engine is None:
+        engine = create_search_engine()
+        cache = engine.cache
+        # Read at export time only, so searches pay nothing for these
+        REGISTRY.gauge_callback("search_cache_hit_ratio", "Search cache hit ratio", lambda: cache.stats()["hit_ratio"])
+        REGISTRY.gauge_callback("search_cache_hits", "Search cache hits", lambda: cache.hits)
+        REGISTRY.gauge_callback("search_cache_misses", "Search cache misses", lambda: cache.misses)
+        REGISTRY.gauge_callback("search_cache_evictions", "Search cache evictions", lambda: cache.evictions)
+        REGISTRY.gauge_callback("search_calls_saved", "Upstream searches avoided by dedup and coalescing",
+                                lambda: engine.dedup_stats()["calls_saved"])
+        _shared_engine = engine
+    return _shared_engine
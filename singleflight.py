@@ -0,0 +1,55 @@
+import asyncio
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one shared task.
+
+    The first caller for a key starts the work; callers that arrive while it
+    is in flight await the same result. An exception is raised in every
+    waiter. Cancelling one waiter does not affect the others; the shared
+    task is only cancelled once every waiter has gone away.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key, fn):
+        """
+        Return the result of fn() for key, sharing it with concurrent callers.
+        fn must be a zero-argument callable returning an awaitable.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Forget it first: the done callback only runs on a later tick, and a caller
+                # arriving in between must start fresh work, not join the cancelled task
+                self._forget(key, call)
+                call.task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,264 @@
+import math
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Reliability labels and the trust score a rule gets unless it sets one
+LABEL_TRUST = {"High": 0.9, "Medium": 0.5, "Low": 0.3}
+
+# The rules source_checker always had; suffix rules ("gov") match any host under that suffix
+DEFAULT_RULES = {
+    "High": ["edu", "gov", "org", "wikipedia.org", "bbc.com", "reuters.com",
+             "nytimes.com", "nature.com", "science.org", "who.int"],
+    "Low": ["blog", "medium.com", "quora.com", "reddit.com", "personal.website"],
+}
+
+# Multi-label public suffixes, so "bbc.co.uk" registers as bbc.co.uk rather than co.uk.
+# Load the full Public Suffix List with SOURCE_SUFFIX_LIST for complete coverage.
+DEFAULT_SUFFIXES = frozenset("""
+co.uk org.uk ac.uk gov.uk ltd.uk plc.uk me.uk net.uk nhs.uk police.uk
+com.au net.au org.au edu.au gov.au asn.au id.au co.nz org.nz govt.nz ac.nz
+co.jp ne.jp or.jp ac.jp go.jp co.kr or.kr ac.kr go.kr com.cn net.cn org.cn edu.cn gov.cn
+com.br net.br org.br gov.br edu.br com.mx org.mx gob.mx edu.mx com.ar gob.ar
+co.in net.in org.in ac.in gov.in edu.in res.in co.za org.za ac.za gov.za
+com.sg edu.sg gov.sg com.hk edu.hk gov.hk com.tw edu.tw gov.tw com.tr edu.tr gov.tr
+co.il ac.il gov.il com.my edu.my gov.my com.pk edu.pk gov.pk com.ng edu.ng gov.ng
+github.io blogspot.com wordpress.com herokuapp.com appspot.com
+""".split())
+
+# Recency halves every RECENCY_HALF_LIFE_DAYS; undated results count as middling
+RECENCY_HALF_LIFE_DAYS = 365.0
+UNDATED_RECENCY = 0.5
+# Weights of search relevance, trust and recency in the combined rank
+RANK_WEIGHTS = {"relevance": 0.5, "trust": 0.35, "recency": 0.15}
+SORT_FIELDS = ("rank", "relevance", "trust", "recency")
+
+_RESEARCH_RE = re.compile(r"research|study")
+_NEWS_RE = re.compile(r"news|article")
+
+
+class ReliabilityEngine:
+    """
+    Domain reliability scorer.
+    URLs are parsed to their host and registrable domain; rules live in a
+    dict keyed by domain or suffix, and a host is scored by walking its
+    label suffixes from most to least specific (en.m.wikipedia.org,
+    m.wikipedia.org, wikipedia.org, org), so the longest matching rule
+    wins and nothing in the path can match a domain rule. Rules can be
+    loaded from large allow/blocklist files; results are memoized per host.
+    """
+
+    def __init__(self, rules: dict = None, suffixes=DEFAULT_SUFFIXES, max_memo: int = 65536):
+        # domain or suffix -> (reliability, trust_score, reason)
+        self.rules = {}
+        self.suffixes = set(suffixes)
+        self.max_memo = max_memo
+        self._memo = {}
+        for reliability, domains in (DEFAULT_RULES if rules is None else rules).items():
+            for domain in domains:
+                self.add_rule(domain, reliability)
+
+    def add_rule(self, domain: str, reliability: str, trust_score: float = None, reason: str = None):
+        domain = domain.strip().lower().lstrip("*.").strip(".")
+        if reason is None:
+            shown = domain if "." in domain else f".{domain}"
+            reason = f"Known reliable domain: {shown}" if reliability == "High" else \
+                f"User-generated content domain: {shown}" if reliability == "Low" else f"Listed domain: {shown}"
+        self.rules[domain] = (reliability, LABEL_TRUST[reliability] if trust_score is None else trust_score, reason)
+        self._memo.clear()
+
+    def load_rules(self, path: str, reliability: str = None) -> int:
+        """
+        Load rules from a text file, one per line: "domain [High|Medium|Low]
+        [trust_score] [reason...]". Lines with only a domain use
+        `reliability` (so a plain allowlist or blocklist works). "#" starts
+        a comment. Returns the number of rules loaded.
+        """
+        loaded = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.split("#", 1)[0].split(maxsplit=3)
+                if not parts:
+                    continue
+                label = parts[1].capitalize() if len(parts) > 1 else reliability
+                if label not in LABEL_TRUST:
+                    raise ValueError(f"{path}: no reliability for {parts[0]!r}")
+                trust_score = float(parts[2]) if len(parts) > 2 else None
+                self.add_rule(parts[0], label, trust_score, parts[3].strip() if len(parts) > 3 else None)
+                loaded += 1
+        return loaded
+
+    def load_suffixes(self, path: str) -> int:
+        """
+        Load public suffixes from a Public Suffix List style file.
+        """
+        loaded = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("//"):
+                    self.suffixes.add(line.lstrip("*!.").lower())
+                    loaded += 1
+        return loaded
+
+    def registrable_domain(self, host: str) -> str:
+        """
+        The domain a registrant controls: the public suffix plus one label.
+        """
+        labels = host.split(".")
+        for i in range(1, len(labels)):
+            if ".".join(labels[i:]) in self.suffixes:
+                return ".".join(labels[i - 1:])
+        return ".".join(labels[-2:])
+
+    def _host_rule(self, host: str):
+        rule = self._memo.get(host)
+        if rule is None:
+            labels = host.split(".")
+            for i in range(len(labels)):
+                rule = self.rules.get(".".join(labels[i:]))
+                if rule is not None:
+                    break
+            else:
+                rule = ("Medium", 0.5, "Standard website")
+            if len(self._memo) >= self.max_memo:
+                self._memo.clear()
+            self._memo[host] = rule
+        return rule
+
+    def score(self, url: str) -> dict:
+        try:
+            host = (urlsplit(url if "//" in url else f"//{url}").hostname or "").rstrip(".")
+        except ValueError:
+            # Unparseable (e.g. an unclosed IPv6 bracket): nothing to vouch for it
+            return {"url": url, "domain": "", "reliability": "Low", "trust_score": LABEL_TRUST["Low"],
+                    "reason": "Malformed URL"}
+        reliability, trust_score, reason = self._host_rule(host)
+
+        # Content hints in the path and host, as before
+        text = url.lower()
+        if _RESEARCH_RE.search(text):
+            trust_score = min(1.0, trust_score + 0.1)
+            reason += " | Contains research/study content"
+        if _NEWS_RE.search(text):
+            trust_score = min(1.0, trust_score + 0.05)
+
+        return {
+            "url": url,
+            "domain": self.registrable_domain(host) if host else "",
+            "reliability": reliability,
+            "trust_score": trust_score,
+            "reason": reason,
+        }
+
+    def score_many(self, urls: list[str]) -> list[dict]:
+        return [self.score(url) for url in urls]
+
+
+_engine = None
+
+
+def get_engine() -> ReliabilityEngine:
+    """
+    Shared engine, extended from SOURCE_RULES_PATH (rules file),
+    SOURCE_ALLOWLIST / SOURCE_BLOCKLIST (plain domain lists) and
+    SOURCE_SUFFIX_LIST (Public Suffix List file) when set.
+    """
+    global _engine
+    if _engine is None:
+        engine = ReliabilityEngine()
+        if os.getenv("SOURCE_SUFFIX_LIST"):
+            engine.load_suffixes(os.environ["SOURCE_SUFFIX_LIST"])
+        if os.getenv("SOURCE_RULES_PATH"):
+            engine.load_rules(os.environ["SOURCE_RULES_PATH"])
+        if os.getenv("SOURCE_ALLOWLIST"):
+            engine.load_rules(os.environ["SOURCE_ALLOWLIST"], "High")
+        if os.getenv("SOURCE_BLOCKLIST"):
+            engine.load_rules(os.environ["SOURCE_BLOCKLIST"], "Low")
+        _engine = engine
+    return _engine
+
+
+def score_source(url: str) -> dict:
+    return get_engine().score(url)
+
+
+def score_sources(urls: list[str]) -> list[dict]:
+    """
+    Score every URL from a search in one call.
+    """
+    return get_engine().score_many(urls)
+
+
+def parse_published_date(value: str):
+    """
+    Parse an ISO 8601 or RFC 2822 publication date; None if it is neither.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def recency_score(published_date: str, now: datetime = None):
+    """
+    1.0 for today, halving every RECENCY_HALF_LIFE_DAYS; None if undated.
+    """
+    published = parse_published_date(published_date)
+    if published is None:
+        return None
+    age_days = max(0.0, ((now or datetime.now(timezone.utc)) - published).total_seconds() / 86400)
+    return math.pow(0.5, age_days / RECENCY_HALF_LIFE_DAYS)
+
+
+def annotate_results(results: list[dict], now: datetime = None) -> list[dict]:
+    """
+    Add reliability, trust_score, recency and a combined rank to each
+    search_web result, in place. Direct answers are left as they are.
+    """
+    engine = get_engine()
+    now = now or datetime.now(timezone.utc)
+    for result in results:
+        if result.get("is_direct_answer") or not result.get("url"):
+            continue
+        scored = engine.score(result["url"])
+        recency = recency_score(result.get("published_date", ""), now)
+        result["reliability"] = scored["reliability"]
+        result["trust_score"] = round(scored["trust_score"], 3)
+        result["recency"] = None if recency is None else round(recency, 3)
+        result["rank"] = round(
+            RANK_WEIGHTS["relevance"] * float(result.get("score") or 0)
+            + RANK_WEIGHTS["trust"] * scored["trust_score"]
+            + RANK_WEIGHTS["recency"] * (UNDATED_RECENCY if recency is None else recency), 3)
+    return results
+
+
+def rank_results(results: list[dict], sort_by: str = "rank", min_trust: float = 0.0,
+                 max_age_days: float = 0) -> list[dict]:
+    """
+    Filter and order annotated results. Direct answers stay first;
+    min_trust drops less trusted sources, max_age_days (0 = no limit)
+    drops results published longer ago, keeping undated ones.
+    """
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"sort_by must be one of {', '.join(SORT_FIELDS)}")
+    field = "score" if sort_by == "relevance" else "trust_score" if sort_by == "trust" else sort_by
+    min_recency = math.pow(0.5, max_age_days / RECENCY_HALF_LIFE_DAYS) if max_age_days else None
+
+    answers = [result for result in results if "rank" not in result]
+    kept = [
+        result for result in results
+        if "rank" in result
+        and result["trust_score"] >= min_trust
+        and (min_recency is None or result["recency"] is None or result["recency"] >= min_recency)
+    ]
+    kept.sort(key=lambda result: result.get(field) if result.get(field) is not None else UNDATED_RECENCY, reverse=True)
+    return answers + kept
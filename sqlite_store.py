@@ -0,0 +1,39 @@
+import os
+import sqlite3
+
+
+class SQLiteConnection:
+    """
+    Lazily opened connection to a SQLite file that several processes may
+    share. The database runs in WAL mode, so readers never wait for a
+    writer, and `schema` (CREATE ... IF NOT EXISTS statements) is applied
+    on every open. SQLite connections must not cross a fork, so a process
+    that did not open the current connection opens its own. The
+    connection may be used from any thread; callers serialize access with
+    their own lock.
+    """
+
+    def __init__(self, path: str, schema=(), synchronous: str = None):
+        self.path = path
+        self.schema = tuple(schema)
+        self.synchronous = synchronous
+        self._db = None
+        self._pid = None
+
+    def get(self) -> sqlite3.Connection:
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            if self.synchronous:
+                self._db.execute(f"PRAGMA synchronous={self.synchronous}")
+            for statement in self.schema:
+                self._db.execute(statement)
+            self._db.commit()
+            self._pid = os.getpid()
+        return self._db
+
+    def close(self):
+        # A connection inherited across a fork belongs to the parent; just forget it
+        if self._db is not None and self._pid == os.getpid():
+            self._db.close()
+        self._db = None
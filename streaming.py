@@ -0,0 +1,53 @@
+import json
+import time
+
+SEARCH_TOOLS = ("search_web", "search_many", "execute_research_plan")
+
+
+def _field(item, name):
+    if isinstance(item, dict):
+        return item.get(name)
+    return getattr(item, name, None)
+
+
+async def handoff_events(result):
+    """
+    Translate a Runner.run_streamed result into research progress events.
+
+    Yields dicts with a "type" of:
+      stage          - a new agent took over ({"stage": agent name})
+      tool_start     - a tool call began ({"tool", "call_id"})
+      tool_end       - a tool call finished ({"tool", "call_id", "duration"})
+      search_results - parsed output of a search tool ({"tool", "results"})
+      token          - incremental model text ({"agent", "delta"})
+    """
+    agent_name = None
+    started = {}
+    tool_names = {}
+
+    async for event in result.stream_events():
+        if event.type == "agent_updated_stream_event":
+            agent_name = event.new_agent.name
+            yield {"type": "stage", "stage": agent_name}
+
+        elif event.type == "raw_response_event":
+            if getattr(event.data, "type", None) == "response.output_text.delta":
+                yield {"type": "token", "agent": agent_name, "delta": event.data.delta}
+
+        elif event.type == "run_item_stream_event":
+            raw = event.item.raw_item
+            call_id = _field(raw, "call_id")
+            if event.name == "tool_called":
+                started[call_id] = time.perf_counter()
+                tool_names[call_id] = _field(raw, "name")
+                yield {"type": "tool_start", "tool": tool_names[call_id], "call_id": call_id}
+
+            elif event.name == "tool_output":
+                tool = tool_names.pop(call_id, None)
+                duration = time.perf_counter() - started.pop(call_id, time.perf_counter())
+                yield {"type": "tool_end", "tool": tool, "call_id": call_id, "duration": duration}
+                if tool in SEARCH_TOOLS:
+                    try:
+                        yield {"type": "search_results", "tool": tool, "results": json.loads(event.item.output)}
+                    except (TypeError, ValueError):
+                        pass
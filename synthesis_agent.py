@@ -1,55 +1,34 @@
 from agents import Agent, function_tool
 import json
 from datetime import datetime
+from checkpoint_store import checkpoint_key, current_checkpoint
+from cpu_pool import run_cpu
+from payload_store import current_store, parse_source_refs
+from synthesis_engine import resolve_contradictions, synthesize_json, synthesize_research
 
 @function_tool
-def synthesize_findings(research_data: str) -> str:
+async def synthesize_findings(research_data: str) -> str:
     """
     Synthesize research findings from multiple sources.
+    research_data may be {"sources": [...], "findings": [...]} JSON or
+    {"source_ids": [...]} ("all" for every source found so far).
     Returns synthesized insights as JSON.
     """
     try:
-        data = json.loads(research_data)
-        
-        # In a real implementation, this would use an LLM for proper synthesis
-        # For this example, we'll create a structured synthesis
-        
-        # Extract key information from research data
-        sources = data.get("sources", [])
-        findings = data.get("findings", [])
-        
-        key_insights = []
-        consensus_points = []
-        conflicting_points = []
-        
-        # Simple synthesis logic
-        for finding in findings[:5]:  # Process first 5 findings
-            content = finding.get("content", "")
-            if "benefit" in content.lower() or "advantage" in content.lower():
-                key_insights.append(f"Positive aspect: {content[:200]}...")
-            elif "drawback" in content.lower() or "disadvantage" in content.lower():
-                key_insights.append(f"Negative aspect: {content[:200]}...")
+        refs = parse_source_refs(research_data)
+        data = current_store().research_data(refs) if refs is not None else None
+        # Keyed by the data itself: "all" names different sources as a run goes on
+        checkpoint = current_checkpoint()
+        key = checkpoint_key(data if refs is not None else research_data)
+        synthesis = checkpoint.get("synthesis", key) if checkpoint is not None else None
+        if synthesis is None:
+            if refs is None:
+                synthesis = await run_cpu(synthesize_json, research_data)
             else:
-                key_insights.append(f"Finding: {content[:200]}...")
-        
-        # Basic conflict detection
-        if len(sources) >= 2:
-            conflicting_points.append("Multiple perspectives found - need further analysis")
-            consensus_points.append("General agreement on core facts")
-        
-        confidence_level = "High" if len(sources) > 3 else "Medium" if len(sources) > 1 else "Low"
-        
-        synthesis = {
-            "key_insights": key_insights,
-            "consensus_points": consensus_points,
-            "conflicting_points": conflicting_points,
-            "confidence_level": confidence_level,
-            "sources_analyzed": len(sources),
-            "summary": f"Comprehensive synthesis of {len(sources)} sources with {confidence_level} confidence",
-            "synthesized_at": datetime.now().isoformat()
-        }
-        
-        return json.dumps(synthesis)
+                synthesis = await run_cpu(synthesize_json, data, data["sources"])
+            if checkpoint is not None:
+                await checkpoint.put("synthesis", synthesis, key)
+        return synthesis
     except Exception as e:
         return json.dumps({"error": str(e), "synthesis_failed": datetime.now().isoformat()})
 
@@ -57,18 +36,35 @@ def synthesize_findings(research_data: str) -> str:
 def resolve_conflicts(conflicting_data: str) -> str:
     """
     Resolve conflicts between different sources or findings.
+    conflicting_data may be a synthesis (with its contradictions), research
+    data with findings, or {"source_ids": [...]}.
     Returns conflict resolution analysis as JSON.
     """
     try:
-        data = json.loads(conflicting_data)
+        refs = parse_source_refs(conflicting_data)
+        data = current_store().research_data(refs) if refs is not None else json.loads(conflicting_data)
+        # A synthesis already lists its contradictions; raw research data is synthesized first
+        contradictions = data.get("contradictions")
+        if contradictions is None:
+            contradictions = synthesize_research(data)["contradictions"]
+        resolutions = resolve_contradictions(contradictions)
+        
+        if resolutions:
+            weakest = min(resolutions, key=lambda resolution: resolution["support_share"])
+            recommended = "; ".join(list(dict.fromkeys(resolution["recommended_claim"] for resolution in resolutions))[:3])
+            confidence = weakest["confidence"]
+        else:
+            recommended = "No contradictions found between sources"
+            confidence = "High"
         
-        # Simple conflict resolution logic
         resolution = {
-            "conflict_description": "Differences in perspectives or information between sources",
-            "resolution_approach": "Prioritized more recent and reliable sources",
-            "recommended_position": "Consider multiple perspectives and context",
-            "confidence_in_resolution": "Medium",
-            "suggested_further_research": "Verify with additional authoritative sources",
+            "conflict_description": f"{len(resolutions)} contradicting claim groups between sources",
+            "resolution_approach": "Prioritized the side backed by more, and more reliable, sources",
+            "recommended_position": recommended,
+            "confidence_in_resolution": confidence,
+            "suggested_further_research": ("Verify low-confidence resolutions with additional authoritative sources"
+                                           if any(r["confidence"] == "Low" for r in resolutions) else "None required"),
+            "resolutions": resolutions,
             "resolved_at": datetime.now().isoformat()
         }
         
@@ -83,6 +79,7 @@ synthesis_agent = Agent(
         "Identify key insights, consensus points, and conflicting information.\n"
         "Assess the overall confidence level in the findings.\n"
         "Use the synthesize_findings tool to create a comprehensive synthesis.\n"
+        "Pass {\"source_ids\": [...]} (or \"all\") instead of copying source text.\n"
         "Return structured JSON that can be used for report writing."
     ),
     tools=[synthesize_findings],
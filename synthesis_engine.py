@@ -0,0 +1,275 @@
+import json
+import math
+import re
+import zlib
+from collections import Counter
+from datetime import datetime
+
+from source_reliability import score_source
+from text_index import split_sentences, tokenize
+
+HASH_BUCKETS = 1 << 18
+MIN_CLAIM_WORDS = 5
+# Candidate clusters are looked up through a vector's strongest features only
+CANDIDATE_FEATURES = 6
+
+_NEGATION_RE = re.compile(r"\b(not|no|never|none|neither|nor|without|cannot|can't|won't|doesn't|didn't|isn't|aren't|wasn't|weren't|fails?|failed)\b", re.I)
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+_POSITIVE_RE = re.compile(r"benefit|advantage", re.I)
+_NEGATIVE_RE = re.compile(r"drawback|disadvantage", re.I)
+
+
+def _stem(token: str) -> str:
+    # Light suffix folding so "increased" and "increase" share a feature
+    for suffix in ("ing", "ed", "ly"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            token = token[:-len(suffix)]
+            break
+    return token[:-1] if token.endswith("e") and len(token) > 4 else token
+
+
+def _bucket(term: str) -> int:
+    return zlib.crc32(term.encode()) % HASH_BUCKETS
+
+
+def _top_features(vector: dict) -> list:
+    return sorted(vector, key=vector.get, reverse=True)[:CANDIDATE_FEATURES]
+
+
+def _cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(feature, 0.0) for feature, weight in a.items())
+
+
+class Claim:
+    __slots__ = ("text", "source", "trust", "vector", "negated", "numbers")
+
+    def __init__(self, text, source, trust):
+        self.text = text
+        self.source = source
+        self.trust = trust
+        self.vector = None
+        self.negated = bool(_NEGATION_RE.search(text))
+        self.numbers = frozenset(_NUMBER_RE.findall(text))
+
+
+class SynthesisEngine:
+    """
+    Local synthesis over research findings.
+    Findings are split into sentence claims and vectorized as TF-IDF
+    weighted hashing vectors (sparse dicts). Near-duplicate claims are
+    grouped by leader clustering, with candidates found through an
+    inverted index on features so each claim is only compared with
+    clusters it shares terms with. Agreement is weighted by source trust
+    (each source counted once per cluster), and topically similar
+    clusters with opposite polarity or disjoint figures are flagged as
+    contradictions.
+    """
+
+    def __init__(self, cluster_threshold: float = 0.5, related_threshold: float = 0.3):
+        self.cluster_threshold = cluster_threshold
+        self.related_threshold = related_threshold
+
+    def claims(self, findings: list[dict]) -> list[Claim]:
+        claims = []
+        for finding in findings:
+            url = finding.get("url", "")
+            trust = finding.get("trust_score")
+            if trust is None:
+                trust = score_source(url)["trust_score"] if url else 0.5
+            source = {"title": finding.get("title", ""), "url": url}
+            for sentence in split_sentences(finding.get("content", "")):
+                if len(sentence.split()) >= MIN_CLAIM_WORDS:
+                    claims.append(Claim(sentence.strip(), source, trust))
+        return claims
+
+    def vectorize(self, claims: list[Claim]):
+        # Unigrams only: word order varies between paraphrases of one claim
+        counts = [Counter(_bucket(_stem(token)) for token in tokenize(claim.text)) for claim in claims]
+        df = Counter(feature for count in counts for feature in count)
+        total = len(claims)
+        for claim, count in zip(claims, counts):
+            vector = {feature: (1 + math.log(tf)) * math.log(1 + total / df[feature]) for feature, tf in count.items()}
+            norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+            claim.vector = {feature: weight / norm for feature, weight in vector.items()}
+
+    def cluster(self, claims: list[Claim]) -> list[list[Claim]]:
+        """
+        Leader clustering: the most trusted claims seed clusters; every
+        other claim joins the most similar leader above the threshold.
+        """
+        clusters = []
+        leaders_by_feature = {}
+        for claim in sorted(claims, key=lambda claim: -claim.trust):
+            candidates = {index for feature in _top_features(claim.vector) for index in leaders_by_feature.get(feature, ())}
+            best, best_similarity = None, self.cluster_threshold
+            for index in candidates:
+                leader = clusters[index][0]
+                # A negated restatement is a disagreement, not a duplicate
+                if leader.negated != claim.negated:
+                    continue
+                similarity = _cosine(claim.vector, leader.vector)
+                if similarity >= best_similarity:
+                    best, best_similarity = index, similarity
+            if best is None:
+                for feature in _top_features(claim.vector):
+                    leaders_by_feature.setdefault(feature, []).append(len(clusters))
+                clusters.append([claim])
+            else:
+                clusters[best].append(claim)
+        return clusters
+
+    def contradictions(self, clusters: list[list[Claim]], summaries: list[dict]) -> list[dict]:
+        leaders_by_feature = {}
+        for index, cluster in enumerate(clusters):
+            for feature in _top_features(cluster[0].vector):
+                leaders_by_feature.setdefault(feature, []).append(index)
+
+        found = []
+        for index, cluster in enumerate(clusters):
+            leader = cluster[0]
+            candidates = {other for feature in _top_features(leader.vector) for other in leaders_by_feature[feature] if other > index}
+            for other in sorted(candidates):
+                rival = clusters[other][0]
+                if leader.source["url"] and leader.source["url"] == rival.source["url"] and len(cluster) == len(clusters[other]) == 1:
+                    # A single source qualifying itself is not a conflict between sources
+                    continue
+                similarity = _cosine(leader.vector, rival.vector)
+                if similarity < self.related_threshold:
+                    continue
+                if leader.negated != rival.negated:
+                    reason = "opposite claims about the same subject"
+                elif leader.numbers and rival.numbers and not leader.numbers & rival.numbers:
+                    reason = "different figures for the same subject"
+                else:
+                    continue
+                found.append({
+                    "clusters": [index, other],
+                    "claims": [leader.text, rival.text],
+                    "support": [summaries[index]["support"], summaries[other]["support"]],
+                    "sources": [summaries[index]["sources"], summaries[other]["sources"]],
+                    "similarity": round(similarity, 3),
+                    "reason": reason,
+                })
+        return found
+
+    def summarize_cluster(self, cluster: list[Claim], total_trust: float) -> dict:
+        sources = {}
+        for claim in cluster:
+            sources.setdefault(claim.source["url"] or claim.source["title"], (claim.source, claim.trust))
+        support = sum(trust for _, trust in sources.values())
+        return {
+            "claim": cluster[0].text,
+            "size": len(cluster),
+            "sources": [source for source, _ in sources.values()],
+            "support": round(support, 3),
+            "agreement": round(support / total_trust, 3) if total_trust else 0.0,
+        }
+
+    def run(self, findings: list[dict]) -> dict:
+        claims = self.claims(findings)
+        self.vectorize(claims)
+        clusters = self.cluster(claims)
+
+        trust_by_source = {}
+        for claim in claims:
+            trust_by_source.setdefault(claim.source["url"] or claim.source["title"], claim.trust)
+        total_trust = sum(trust_by_source.values())
+
+        summaries = [self.summarize_cluster(cluster, total_trust) for cluster in clusters]
+        contradictions = self.contradictions(clusters, summaries)
+        order = sorted(range(len(clusters)), key=lambda index: (-summaries[index]["support"], index))
+        return {
+            "claims": len(claims),
+            "clusters": [dict(summaries[index], id=index) for index in order],
+            "contradictions": contradictions,
+        }
+
+
+def _insight(text: str) -> str:
+    label = "Positive aspect" if _POSITIVE_RE.search(text) else "Negative aspect" if _NEGATIVE_RE.search(text) else "Finding"
+    return f"{label}: {text[:200]}{'...' if len(text) > 200 else ''}"
+
+
+def synthesize_research(data: dict, max_insights: int = 8, engine: SynthesisEngine = None) -> dict:
+    """
+    Synthesis dict (key insights, consensus, conflicts, confidence) for
+    research_data {"sources", "findings"}, plus the underlying clusters
+    and contradictions.
+    """
+    sources = data.get("sources", [])
+    result = (engine or SynthesisEngine()).run(data.get("findings", []))
+    clusters = result["clusters"]
+
+    key_insights = [_insight(cluster["claim"]) for cluster in clusters[:max_insights]]
+    consensus_points = [
+        f"{cluster['claim']} ({len(cluster['sources'])} sources, {cluster['agreement']:.0%} source-weighted agreement)"
+        for cluster in clusters if len(cluster["sources"]) >= 2
+    ][:max_insights]
+    conflicting_points = [
+        f"{contradiction['reason'].capitalize()}: \"{contradiction['claims'][0]}\" vs \"{contradiction['claims'][1]}\""
+        for contradiction in result["contradictions"]
+    ][:max_insights]
+
+    confidence_level = "High" if len(sources) > 3 else "Medium" if len(sources) > 1 else "Low"
+    # Open contradictions outweighing agreement lower confidence a step
+    if len(conflicting_points) > len(consensus_points):
+        confidence_level = {"High": "Medium", "Medium": "Low"}.get(confidence_level, confidence_level)
+
+    return {
+        "key_insights": key_insights,
+        "consensus_points": consensus_points,
+        "conflicting_points": conflicting_points,
+        "confidence_level": confidence_level,
+        "sources_analyzed": len(sources),
+        "summary": (f"Comprehensive synthesis of {len(sources)} sources with {confidence_level} confidence: "
+                    f"{result['claims']} claims in {len(clusters)} clusters, "
+                    f"{len(consensus_points)} points of agreement, {len(result['contradictions'])} contradictions"),
+        "clusters": clusters[:50],
+        "contradictions": result["contradictions"],
+    }
+
+
+def synthesize(data: dict) -> dict:
+    """
+    Synthesize research findings from multiple sources.
+    Returns synthesized insights as a dict.
+    """
+    synthesis = synthesize_research(data)
+    synthesis["synthesized_at"] = datetime.now().isoformat()
+    return synthesis
+
+
+def synthesize_json(research_data, sources: list = None) -> str:
+    """
+    synthesize_findings' JSON result for research data (JSON or dict);
+    sources, if given, become the synthesis' source list. The run_cpu
+    entry point for synthesis.
+    """
+    data = json.loads(research_data) if isinstance(research_data, str) else research_data
+    synthesis = synthesize(data)
+    if sources is not None:
+        synthesis["sources"] = sources
+    return json.dumps(synthesis)
+
+
+def resolve_contradictions(contradictions: list[dict]) -> list[dict]:
+    """
+    Pick the better supported side of each contradiction by source-weighted support.
+    """
+    resolutions = []
+    for contradiction in contradictions:
+        support = contradiction["support"]
+        winner = 0 if support[0] >= support[1] else 1
+        total = sum(support) or 1.0
+        margin = abs(support[0] - support[1]) / total
+        resolutions.append({
+            "claims": contradiction["claims"],
+            "reason": contradiction["reason"],
+            "recommended_claim": contradiction["claims"][winner],
+            "supporting_sources": contradiction["sources"][winner],
+            "support_share": round(support[winner] / total, 3),
+            "confidence": "High" if margin >= 0.5 else "Medium" if margin >= 0.2 else "Low",
+        })
+    return resolutions
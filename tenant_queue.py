@@ -0,0 +1,141 @@
+import asyncio
+import os
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+
+class AdmissionError(Exception):
+    """
+    Raised when a run is refused because its tenant's queue or the global
+    queue is full. retry_after is a hint in seconds.
+    """
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TenantQueue:
+    """
+    Fair admission queue for research runs from many tenants.
+    At most max_active runs execute at once (and at most
+    max_active_per_tenant per tenant). Waiting runs sit in per-tenant
+    FIFOs that are served round-robin, so a tenant submitting a burst
+    waits behind its own work, not in front of everyone else's. Admission
+    is bounded: a tenant with max_queued_per_tenant runs waiting, or a
+    queue holding max_queued runs overall, gets AdmissionError instead of
+    an unbounded wait.
+    """
+
+    def __init__(self, max_active: int = 8, max_queued: int = 64, max_queued_per_tenant: int = 8,
+                 max_active_per_tenant: int = None):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.max_queued_per_tenant = max_queued_per_tenant
+        self.max_active_per_tenant = max_active_per_tenant or max_active
+        # tenant -> deque of waiting futures; order is the round-robin order
+        self._waiting = OrderedDict()
+        self._active = {}
+        self._queued = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def active(self) -> int:
+        return sum(self._active.values())
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _dispatch(self):
+        # Grant free slots one tenant at a time, moving each served tenant to the back
+        while self.active < self.max_active:
+            for tenant, waiters in self._waiting.items():
+                if self._active.get(tenant, 0) < self.max_active_per_tenant:
+                    break
+            else:
+                return
+            waiter = waiters.popleft()
+            self._queued -= 1
+            if waiters:
+                self._waiting.move_to_end(tenant)
+            else:
+                del self._waiting[tenant]
+            if waiter.done():
+                # Cancelled while waiting; its task has not withdrawn it yet
+                continue
+            self._active[tenant] = self._active.get(tenant, 0) + 1
+            waiter.set_result(None)
+
+    def _release(self, tenant: str):
+        self._active[tenant] -= 1
+        if not self._active[tenant]:
+            del self._active[tenant]
+        self._dispatch()
+
+    def _withdraw(self, tenant: str, waiter: asyncio.Future):
+        waiters = self._waiting.get(tenant)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self._queued -= 1
+            if not waiters:
+                del self._waiting[tenant]
+
+    @asynccontextmanager
+    async def slot(self, tenant: str):
+        """
+        Wait for this tenant's turn and hold a run slot for the block.
+        Raises AdmissionError at once if the run cannot be queued.
+        """
+        waiters = self._waiting.get(tenant, ())
+        if len(waiters) >= self.max_queued_per_tenant:
+            self.rejected += 1
+            raise AdmissionError(f"Too many queued runs for tenant {tenant!r}")
+        if self._queued >= self.max_queued:
+            self.rejected += 1
+            raise AdmissionError("Research queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(tenant, deque()).append(waiter)
+        self._queued += 1
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted in the same tick the caller gave up; hand the slot on
+                self._release(tenant)
+            else:
+                self._withdraw(tenant, waiter)
+            raise
+
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self._release(tenant)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self._queued,
+            "tenants_active": len(self._active),
+            "tenants_waiting": len(self._waiting),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def create_tenant_queue() -> TenantQueue:
+    """
+    Build a TenantQueue from SERVICE_MAX_ACTIVE, SERVICE_MAX_QUEUED,
+    SERVICE_MAX_QUEUED_PER_TENANT and SERVICE_MAX_ACTIVE_PER_TENANT.
+    """
+    per_tenant = os.getenv("SERVICE_MAX_ACTIVE_PER_TENANT")
+    return TenantQueue(
+        max_active=int(os.getenv("SERVICE_MAX_ACTIVE", "8")),
+        max_queued=int(os.getenv("SERVICE_MAX_QUEUED", "64")),
+        max_queued_per_tenant=int(os.getenv("SERVICE_MAX_QUEUED_PER_TENANT", "8")),
+        max_active_per_tenant=int(per_tenant) if per_tenant else None,
+    )
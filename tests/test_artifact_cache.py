@@ -0,0 +1,25 @@
+import unittest
+
+from artifact_cache import ArtifactCache, query_key
+
+
+class QueryKeyTest(unittest.TestCase):
+    def test_queries_in_different_scripts_get_different_plan_keys(self):
+        cache = ArtifactCache()
+        self.assertNotEqual(cache.key("plan", query_key("погода в Москве")),
+                            cache.key("plan", query_key("東京 天気")))
+
+    def test_different_questions_get_different_report_keys(self):
+        self.assertNotEqual(query_key("who founded OpenAI"), query_key("when was OpenAI founded"))
+        self.assertNotEqual(query_key("remote work for small businesses"), query_key("small businesses for remote work"))
+
+    def test_case_and_whitespace_do_not_matter(self):
+        self.assertEqual(query_key("  Who founded   OpenAI"), query_key("who founded openai"))
+
+    def test_key_is_never_empty(self):
+        self.assertTrue(query_key(""))
+        self.assertNotEqual(query_key(""), query_key(" "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pipeline
+from artifact_cache import STAGES, ArtifactCache
+from benchmarks.fake_tavily import fake_response
+from checkpoint_store import DONE, FAILED, CheckpointStore, reset_run_checkpoint, start_run_checkpoint
+from pipeline import ResearchPipeline
+from search_engine import format_results
+
+QUERY = "What are the benefits of remote work for small businesses?"
+
+
+class CountingSearch:
+    def __init__(self):
+        self.queries = []
+
+    async def search(self, query, max_results=5):
+        self.queries.append(query)
+        return format_results(query, fake_response(query, max_results))
+
+
+class ResumeTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.store = CheckpointStore(os.path.join(scratch.name, "checkpoints.sqlite"))
+        self.addCleanup(self.store.close)
+        self.search = CountingSearch()
+        # Artifact caching off: every stage either comes from a checkpoint or is recomputed
+        self.pipeline = ResearchPipeline(self.search, artifact_cache=ArtifactCache(ttls=dict.fromkeys(STAGES, 0)))
+        planner = mock.patch("pipeline.build_research_plan", side_effect=pipeline.build_research_plan)
+        self.build_plan = planner.start()
+        self.addCleanup(planner.stop)
+
+    async def attempt(self, run_id=None, stop_after=None):
+        """
+        One attempt at the run; stop_after ends it once that stage has
+        started, as a crash or dropped client would.
+        """
+        checkpoint = await asyncio.to_thread(self.store.begin, QUERY, "pipeline", run_id=run_id)
+        token = start_run_checkpoint(checkpoint)
+        try:
+            async for event in self.pipeline.run_stream(QUERY, {}):
+                if event["type"] == "stage" and event["stage"] == stop_after:
+                    await checkpoint.finish(FAILED, "interrupted")
+                    return checkpoint.run_id, None
+                if event["type"] == "done":
+                    await checkpoint.finish(DONE)
+                    return checkpoint.run_id, event["result"]
+        finally:
+            reset_run_checkpoint(token)
+
+    async def test_failure_after_plan_resumes_at_research(self):
+        run_id, _ = await self.attempt(stop_after="research")
+        self.assertEqual(self.build_plan.call_count, 1)
+        self.assertEqual(self.search.queries, [])
+        self.assertEqual(self.store.get_run(run_id)["status"], FAILED)
+
+        _, result = await self.attempt(run_id)
+        self.assertEqual(self.build_plan.call_count, 1)
+        self.assertEqual(len(self.search.queries), len(result["plan"]["research_tasks"]))
+        self.assertEqual(result["resumed"], ["plan"])
+        self.assertTrue(result["report"])
+        self.assertEqual(self.store.get_run(run_id)["status"], DONE)
+
+    async def test_failure_after_research_only_synthesizes_and_reports(self):
+        with mock.patch("pipeline.run_cpu", side_effect=RuntimeError("worker died")):
+            with self.assertRaises(RuntimeError):
+                await self.attempt()
+        run_id = self.store.runs()[0]["run_id"]
+        searched = list(self.search.queries)
+        self.assertTrue(searched)
+
+        _, result = await self.attempt(run_id)
+        self.assertEqual(self.build_plan.call_count, 1)
+        self.assertEqual(self.search.queries, searched)
+        self.assertEqual(result["resumed"], ["plan", "task"])
+        self.assertTrue(result["report"])
+
+
+if __name__ == "__main__":
+    unittest.main()
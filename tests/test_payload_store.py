@@ -0,0 +1,52 @@
+import unittest
+
+from payload_store import PayloadStore, current_store, reset_run_store, start_run_store
+from research_context import ResearchContext
+
+
+def _run(url: str) -> list[str]:
+    # One research run: a fresh store scope that sees one search result
+    token = start_run_store()
+    try:
+        store = current_store()
+        store.put({"url": url, "title": url, "content": f"content of {url}"})
+        return [result["url"] for result in store.resolve("all")]
+    finally:
+        reset_run_store(token)
+
+
+class RunStoreIsolationTest(unittest.TestCase):
+    def test_empty_run_store_is_used(self):
+        token = start_run_store()
+        try:
+            # A new store is empty (falsy) but must still be the run's own
+            self.assertEqual(len(current_store()), 0)
+            self.assertIs(current_store(), current_store())
+        finally:
+            reset_run_store(token)
+
+    def test_given_empty_store_is_installed(self):
+        store = PayloadStore()
+        token = start_run_store(store)
+        try:
+            self.assertIs(current_store(), store)
+        finally:
+            reset_run_store(token)
+
+    def test_tools_write_to_the_run_context_store(self):
+        context = ResearchContext("query", {}, store=PayloadStore())
+        token = start_run_store(context.store)
+        try:
+            self.assertIs(current_store(), context.store)
+        finally:
+            reset_run_store(token)
+
+    def test_sequential_runs_do_not_share_sources(self):
+        first = _run("https://example.com/a")
+        second = _run("https://example.com/b")
+        self.assertEqual(first, ["https://example.com/a"])
+        self.assertEqual(second, ["https://example.com/b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from query_dedup import canonicalize_query
+
+
+class CanonicalizeQueryTest(unittest.TestCase):
+    def test_non_ascii_queries_keep_distinct_keys(self):
+        russian = canonicalize_query("погода в Москве")
+        japanese = canonicalize_query("東京 天気")
+        self.assertTrue(russian)
+        self.assertTrue(japanese)
+        self.assertNotEqual(russian, japanese)
+
+    def test_accented_words_are_kept_whole(self):
+        self.assertEqual(canonicalize_query("Café prices"), "café price")
+
+    def test_different_questions_about_one_subject_do_not_collide(self):
+        for first, second in (
+            ("who founded OpenAI", "when was OpenAI founded"),
+            ("when was OpenAI founded", "where was OpenAI founded"),
+            ("why did SVB fail", "when did SVB fail"),
+            ("how do vaccines work", "why do vaccines work"),
+        ):
+            with self.subTest(first=first, second=second):
+                self.assertNotEqual(canonicalize_query(first), canonicalize_query(second))
+
+    def test_negation_is_part_of_the_key(self):
+        self.assertNotEqual(canonicalize_query("did SVB fail"), canonicalize_query("did SVB not fail"))
+
+    def test_rephrasings_still_share_a_key(self):
+        self.assertEqual(canonicalize_query("Who founded OpenAI?"), canonicalize_query("who founded openai"))
+        self.assertEqual(canonicalize_query("remote work for small businesses"),
+                         canonicalize_query("small business remote work"))
+
+    def test_query_without_words_is_never_empty(self):
+        self.assertEqual(canonicalize_query("  ???  "), "???")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+from unittest import mock
+
+import httpx
+from agents import ModelSettings, ModelTracing
+from openai import AsyncOpenAI
+
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.fake_tavily import FakeTavilyServer
+from rate_limited_model import RateLimitedModel
+from rate_limiter import CircuitBreaker, CircuitOpenError, ProviderLimiter, RetryPolicy, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def recorded_delays(limiter: ProviderLimiter) -> list:
+    # Wrap the policy so a test sees each backoff the limiter chose
+    delays = []
+    delay = limiter.retry.delay
+
+    def record(attempt, retry_after=None):
+        delays.append(delay(attempt, retry_after))
+        return delays[-1]
+
+    limiter.retry.delay = record
+    return delays
+
+
+class TokenBucketTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("rate_limiter.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refills_at_the_configured_rate(self):
+        bucket = TokenBucket(rate_per_minute=60, capacity=2)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+        self.clock.now += 3
+        # Three seconds cover the one-token debt and refill to capacity, no further
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+    def test_large_reservation_waits_for_at_most_a_full_bucket(self):
+        bucket = TokenBucket(rate_per_minute=60, capacity=10)
+        bucket.reserve(10)
+        self.assertAlmostEqual(bucket.reserve(100), 10.0)
+
+    async def test_acquire_sleeps_until_the_reservation_is_covered(self):
+        bucket = TokenBucket(rate_per_minute=120, capacity=1)
+        with mock.patch("rate_limiter.asyncio.sleep") as sleep:
+            await bucket.acquire()
+            sleep.assert_not_called()
+            await bucket.acquire()
+            await bucket.acquire()
+        self.assertEqual([call.args[0] for call in sleep.await_args_list], [0.5, 1.0])
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("rate_limiter.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.check()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.check()
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_half_open_after_timeout_then_success_closes(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state, "half_open")
+        self.breaker.check()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_failure_while_half_open_reopens(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 30
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.clock.now += 29
+        self.assertEqual(self.breaker.state, "open")
+
+
+class RetryAfterTest(unittest.IsolatedAsyncioTestCase):
+    def serve(self, server):
+        # Stopped from a cleanup, outside the event loop: shutdown() blocks
+        self.addCleanup(server.stop)
+        return server.start()
+
+    async def test_provider_limiter_retries_429_after_retry_after(self):
+        # A computed backoff could be anything up to 10 s; Retry-After must win
+        limiter = ProviderLimiter("test", retry=RetryPolicy(base_delay=10, max_delay=10))
+        delays = recorded_delays(limiter)
+        server = self.serve(FakeTavilyServer(fail_first=2, retry_after=0.05))
+        async with httpx.AsyncClient(base_url=server.base_url) as client:
+            async def search():
+                response = await client.post("/search", json={"query": "retry"})
+                response.raise_for_status()
+                return response.json()
+
+            result = await limiter.call(search)
+        self.assertEqual(result["query"], "retry")
+        self.assertEqual(server.request_count, 3)
+        self.assertEqual(delays, [0.05, 0.05])
+        self.assertEqual(limiter.stats(), {"calls": 3, "retries": 2, "throttled": 2, "circuit": "closed"})
+
+    async def test_gives_up_after_max_attempts(self):
+        limiter = ProviderLimiter("test", retry=RetryPolicy(max_attempts=2))
+        server = self.serve(FakeTavilyServer(fail_first=5, retry_after=0.01))
+        async with httpx.AsyncClient(base_url=server.base_url) as client:
+            async def search():
+                response = await client.post("/search", json={"query": "retry"})
+                response.raise_for_status()
+                return response.json()
+
+            with self.assertRaises(httpx.HTTPStatusError):
+                await limiter.call(search)
+        self.assertEqual(server.request_count, 2)
+
+    async def test_rate_limited_model_retries_429(self):
+        limiter = ProviderLimiter("llm", retry=RetryPolicy(base_delay=10, max_delay=10))
+        delays = recorded_delays(limiter)
+        server = self.serve(FakeLLMServer(fail_first=1, retry_after=0.05))
+        client = AsyncOpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+        model = RateLimitedModel(model="fake", openai_client=client, limiter=limiter)
+        response = await model.get_response("Be brief.", "hello", ModelSettings(), [], None, [],
+                                            ModelTracing.DISABLED)
+        await client.close()
+        self.assertTrue(response.output)
+        self.assertEqual(server.request_count, 2)
+        self.assertEqual(delays, [0.05])
+        self.assertEqual(limiter.throttled, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from report_renderer import render
+
+PROFILE = {"name": "Ana", "city": "Lisbon", "topic": "Energy"}
+
+
+def _synthesis(**overrides):
+    synthesis = {
+        "sources_analyzed": 2,
+        "confidence_level": "High",
+        "key_insights": ["Solar capacity grew"],
+        "sources": [
+            {"title": "Good", "url": "https://example.com/a"},
+            {"title": "Bad", "url": "javascript:alert(1)"},
+        ],
+    }
+    synthesis.update(overrides)
+    return synthesis
+
+
+class HtmlReportTest(unittest.TestCase):
+    def test_llm_supplied_fields_are_escaped(self):
+        report = render(_synthesis(sources_analyzed="<script>x</script>", confidence_level="<b>High</b>"),
+                        "solar", PROFILE, "html")
+        self.assertNotIn("<script>", report)
+        self.assertNotIn("<b>High</b>", report)
+
+    def test_only_web_urls_are_linked(self):
+        report = render(_synthesis(), "solar", PROFILE, "html")
+        self.assertIn('href="https://example.com/a"', report)
+        self.assertNotIn("javascript:", report)
+
+    def test_markdown_does_not_link_script_urls(self):
+        report = render(_synthesis(), "solar", PROFILE, "markdown")
+        self.assertIn("(https://example.com/a)", report)
+        self.assertNotIn("javascript:", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import unittest
+from unittest import mock
+
+from agents.tool_context import ToolContext
+
+import research_agents
+from benchmarks.fake_tavily import fake_response
+from claim_verifier import fact_check_json
+from payload_store import compact_search, current_store, reset_run_store, start_run_store
+from research_agents import _resolve_sources, execute_research_plan
+from search_engine import format_results
+
+CONTENT = "Remote work increased productivity by 13 percent in a large randomized study of call center employees. " * 3
+CLAIM = "Remote work increased productivity by 13 percent in a large randomized study"
+
+
+class ResolveSourcesTest(unittest.TestCase):
+    def setUp(self):
+        self.token = start_run_store()
+        payload = {"query": "remote work", "results": [{"url": "https://a.org/x", "title": "A", "content": CONTENT}]}
+        # What search_web hands the model: ids and trimmed snippets only
+        self.search_output = json.dumps(compact_search(payload, current_store(), 100))
+
+    def tearDown(self):
+        reset_run_store(self.token)
+
+    def test_search_output_is_checked_against_full_text(self):
+        resolved = _resolve_sources(self.search_output)
+        self.assertEqual([source["content"] for source in resolved], [CONTENT])
+        self.assertEqual(json.loads(fact_check_json(CLAIM, resolved))["confidence"], "High")
+
+    def test_search_many_output_is_resolved(self):
+        resolved = _resolve_sources(json.dumps([json.loads(self.search_output)]))
+        self.assertEqual(len(resolved), 1)
+
+    def test_raw_results_pass_through(self):
+        raw = json.dumps({"results": [{"url": "https://b.org", "content": CONTENT}]})
+        self.assertEqual(_resolve_sources(raw), raw)
+
+
+class FailingSearch:
+    async def search(self, query, max_results=5):
+        if "broken" in query:
+            return json.dumps({"error": "upstream unavailable", "query": query})
+        return format_results(query, fake_response(query, max_results))
+
+
+class ExecuteResearchPlanTest(unittest.IsolatedAsyncioTestCase):
+    async def test_error_payloads_mark_tasks_failed(self):
+        plan = {"research_tasks": [{"id": "ok", "task": "remote work"},
+                                   {"id": "bad", "task": "broken query"},
+                                   {"id": "after", "task": "follow up", "depends_on": ["bad"]}]}
+        arguments = json.dumps({"plan": json.dumps(plan)})
+        token = start_run_store()
+        try:
+            with mock.patch.object(research_agents, "search_engine", FailingSearch()):
+                output = await execute_research_plan.on_invoke_tool(
+                    ToolContext(None, tool_name="execute_research_plan", tool_call_id="1", tool_arguments=arguments),
+                    arguments)
+        finally:
+            reset_run_store(token)
+        result = json.loads(output)
+        self.assertEqual(result["task_status"], {"ok": "done", "bad": "failed", "after": "blocked"})
+        self.assertEqual(list(result["task_results"]), ["ok"])
+        self.assertEqual(result["task_errors"], {"bad": "upstream unavailable"})
+
+
+if __name__ == "__main__":
+    unittest.main()
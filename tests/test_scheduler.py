@@ -0,0 +1,43 @@
+import asyncio
+import unittest
+
+from scheduler import TaskScheduler, parse_time_estimate
+
+
+class SchedulerCancellationTest(unittest.IsolatedAsyncioTestCase):
+    async def test_cancelling_run_cancels_running_tasks(self):
+        started, finished = [], []
+
+        async def worker(task, upstream):
+            started.append(task["id"])
+            await asyncio.sleep(0.2)
+            finished.append(task["id"])
+
+        tasks = [{"id": str(index), "task": f"task {index}"} for index in range(3)]
+        scheduling = asyncio.ensure_future(TaskScheduler(max_concurrency=3).run(tasks, worker))
+        await asyncio.sleep(0.05)
+        scheduling.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await scheduling
+
+        await asyncio.sleep(0.3)
+        self.assertEqual(len(started), 3)
+        self.assertEqual(finished, [])
+
+
+class TimeEstimateTest(unittest.TestCase):
+    def test_bare_numbers_are_minutes_whatever_their_type(self):
+        self.assertEqual(parse_time_estimate("10"), 600.0)
+        self.assertEqual(parse_time_estimate(10), 600.0)
+        self.assertEqual(parse_time_estimate(1.5), 90.0)
+
+    def test_units(self):
+        self.assertEqual(parse_time_estimate("90s"), 90.0)
+        self.assertEqual(parse_time_estimate("10m"), 600.0)
+        self.assertEqual(parse_time_estimate("1h"), 3600.0)
+        self.assertEqual(parse_time_estimate("soon"), 0.0)
+        self.assertEqual(parse_time_estimate(None), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
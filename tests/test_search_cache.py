@@ -0,0 +1,50 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from search_cache import SearchCache
+
+
+class AsyncDiskTierTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.path = os.path.join(scratch.name, "search.sqlite")
+
+    async def test_disk_tier_is_shared_between_caches(self):
+        writer = SearchCache(disk_path=self.path)
+        await writer.aset("q", "payload")
+        reader = SearchCache(disk_path=self.path)
+        self.assertEqual(await reader.aget("q"), "payload")
+        self.assertEqual(reader.disk_hits, 1)
+        self.assertIsNone(await reader.aget("missing"))
+        self.assertEqual(reader.misses, 1)
+
+    async def test_errors_are_not_written_to_disk(self):
+        await SearchCache(disk_path=self.path).aset("q", "{}", error=True)
+        self.assertIsNone(await SearchCache(disk_path=self.path).aget("q"))
+
+    async def test_disk_io_runs_off_the_event_loop(self):
+        cache = SearchCache(disk_path=self.path)
+        loop_thread = threading.get_ident()
+        threads = []
+        disk_get, disk_set = cache._disk_get, cache._disk_set
+
+        def record(method):
+            def wrapper(*args):
+                threads.append(threading.get_ident())
+                return method(*args)
+            return wrapper
+
+        with mock.patch.object(cache, "_disk_get", record(disk_get)), \
+                mock.patch.object(cache, "_disk_set", record(disk_set)):
+            await cache.aset("q", "payload")
+            await cache.aget("other")
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(loop_thread, threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
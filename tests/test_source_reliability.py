@@ -0,0 +1,18 @@
+import unittest
+
+from source_reliability import ReliabilityEngine, annotate_results
+
+
+class MalformedUrlTest(unittest.TestCase):
+    def test_unparseable_url_scores_low(self):
+        score = ReliabilityEngine().score("http://[::1")
+        self.assertEqual((score["reliability"], score["domain"]), ("Low", ""))
+
+    def test_one_bad_url_does_not_sink_a_search(self):
+        results = annotate_results([{"url": "https://[broken", "content": "a"},
+                                    {"url": "https://www.nature.com/articles/1", "content": "b"}])
+        self.assertEqual([result["reliability"] for result in results], ["Low", "High"])
+
+
+if __name__ == "__main__":
+    unittest.main()
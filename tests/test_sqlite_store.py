@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlite_store import SQLiteConnection
+
+
+class SQLiteConnectionTest(unittest.TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.db = SQLiteConnection(os.path.join(scratch.name, "test.sqlite"),
+                                   ("CREATE TABLE IF NOT EXISTS t (k TEXT PRIMARY KEY)",))
+        self.addCleanup(self.db.close)
+
+    def test_opens_once_per_process_in_wal_mode(self):
+        db = self.db.get()
+        self.assertIs(self.db.get(), db)
+        self.assertEqual(db.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        db.execute("INSERT INTO t VALUES ('a')")
+
+    def test_reopens_after_a_fork(self):
+        parent = self.db.get()
+        with mock.patch("sqlite_store.os.getpid", return_value=os.getpid() + 1):
+            child = self.db.get()
+            self.assertIsNot(child, parent)
+            self.assertIs(self.db.get(), child)
+            child.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import unittest
+
+from metrics import REGISTRY
+from research_service import ResearchService
+from tenant_queue import AdmissionError, TenantQueue
+
+
+class TenantQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def hold(self, queue, tenant, order, release):
+        async with queue.slot(tenant):
+            order.append(tenant)
+            await release.wait()
+
+    async def test_rejects_when_a_tenant_queue_is_full(self):
+        queue = TenantQueue(max_active=1, max_queued_per_tenant=1)
+        release = asyncio.Event()
+        order = []
+        running = asyncio.create_task(self.hold(queue, "a", order, release))
+        waiting = asyncio.create_task(self.hold(queue, "a", order, release))
+        await asyncio.sleep(0)
+        self.assertEqual((queue.active, queue.queued), (1, 1))
+
+        with self.assertRaises(AdmissionError):
+            async with queue.slot("a"):
+                pass
+        # Another tenant still gets in line
+        other = asyncio.create_task(self.hold(queue, "b", order, release))
+        await asyncio.sleep(0)
+        self.assertEqual(queue.queued, 2)
+
+        release.set()
+        await asyncio.gather(running, waiting, other)
+        self.assertEqual(queue.stats()["rejected"], 1)
+        self.assertEqual(queue.stats()["admitted"], 3)
+
+    async def test_rejects_when_the_global_queue_is_full(self):
+        queue = TenantQueue(max_active=1, max_queued=2)
+        release = asyncio.Event()
+        order = []
+        tasks = [asyncio.create_task(self.hold(queue, tenant, order, release)) for tenant in "abc"]
+        await asyncio.sleep(0)
+        with self.assertRaisesRegex(AdmissionError, "queue is full"):
+            async with queue.slot("d"):
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(queue.rejected, 1)
+
+    async def test_waiting_tenants_are_served_round_robin(self):
+        queue = TenantQueue(max_active=1)
+        order = []
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(self.hold(queue, "first", order, gate))
+        await asyncio.sleep(0)
+
+        done = asyncio.Event()
+        done.set()
+        tasks = [asyncio.create_task(self.hold(queue, tenant, order, done)) for tenant in ("a", "a", "a", "b", "c")]
+        await asyncio.sleep(0)
+        self.assertEqual(queue.queued, 5)
+
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+        # The burst from "a" does not run ahead of b and c
+        self.assertEqual(order, ["first", "a", "b", "c", "a", "a"])
+
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        queue = TenantQueue(max_active=1)
+        release = asyncio.Event()
+        order = []
+        running = asyncio.create_task(self.hold(queue, "a", order, release))
+        waiting = asyncio.create_task(self.hold(queue, "b", order, release))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(queue.queued, 0)
+        release.set()
+        await running
+        self.assertEqual((queue.active, order), (0, ["a"]))
+
+
+class ServiceMetricsTest(unittest.TestCase):
+    def test_rejected_runs_are_exported_as_a_counter(self):
+        ResearchService(system=object(), queue=TenantQueue())
+        text = REGISTRY.to_prometheus()
+        self.assertIn("# TYPE service_runs_rejected_total counter", text)
+        self.assertNotIn("service_runs_rejected ", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
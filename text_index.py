@@ -0,0 +1,124 @@
+import math
+import re
+from collections import Counter
+
+from query_dedup import STOPWORDS, _TOKEN_RE, _singular
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercased, plural-folded word tokens without stopwords.
+    """
+    return [_singular(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def terms(tokens: list[str], bigrams: bool = True) -> list[str]:
+    """
+    Index terms for a token list: the tokens plus adjacent-pair bigrams,
+    so phrase matches outscore the same words scattered across a passage.
+    """
+    if not bigrams:
+        return tokens
+    return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def split_sentences(text: str) -> list[str]:
+    return [sentence for sentence in _SENTENCE_RE.split(text.strip()) if sentence]
+
+
+def split_passages(text: str, max_words: int = 80, overlap_sentences: int = 1) -> list[str]:
+    """
+    Split text into passages of whole sentences up to roughly max_words,
+    repeating the last `overlap_sentences` of each passage in the next.
+    """
+    sentences = split_sentences(text)
+    passages = []
+    current, words = [], 0
+    for sentence in sentences:
+        length = len(sentence.split())
+        if current and words + length > max_words:
+            passages.append(" ".join(current))
+            current = current[-overlap_sentences:] if overlap_sentences else []
+            words = sum(len(s.split()) for s in current)
+        current.append(sentence)
+        words += length
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+class BM25Index:
+    """
+    Sparse BM25 index: an inverted index of term -> [(doc, term frequency)].
+    Scoring a query walks only the postings of its terms, so the cost is
+    proportional to matching postings rather than to corpus size.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, bigrams: bool = True):
+        self.k1 = k1
+        self.b = b
+        self.bigrams = bigrams
+        self.postings = {}
+        self.doc_lengths = []
+        self.doc_terms = []
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, text: str) -> int:
+        """
+        Index a document and return its position.
+        """
+        doc = len(self.doc_lengths)
+        counts = Counter(terms(tokenize(text), self.bigrams))
+        for term, tf in counts.items():
+            self.postings.setdefault(term, []).append((doc, tf))
+        length = sum(counts.values())
+        self.doc_lengths.append(length)
+        self.doc_terms.append(frozenset(counts))
+        self._total_length += length
+        return doc
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_lengths) - df + 0.5) / (df + 0.5))
+
+    def query_terms(self, text: str) -> list[str]:
+        return list(dict.fromkeys(terms(tokenize(text), self.bigrams)))
+
+    def scores(self, query_terms: list[str]) -> dict[int, float]:
+        """
+        BM25 score of every document sharing a term with the query.
+        """
+        if not self.doc_lengths:
+            return {}
+        average = self._total_length / len(self.doc_lengths) or 1.0
+        scores = {}
+        for term in query_terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc, tf in postings:
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / average)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return scores
+
+    def top(self, text: str, k: int = 5) -> list[tuple[int, float]]:
+        scores = self.scores(self.query_terms(text))
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+    def coverage(self, query_terms: list[str], doc: int) -> float:
+        """
+        Share of the query's word IDF weight present in a document (0..1).
+        Bigrams only rank; counting them here would penalize paraphrases.
+        """
+        query_terms = [term for term in query_terms if "_" not in term]
+        total = sum(self.idf(term) for term in query_terms)
+        if not total:
+            return 0.0
+        present = self.doc_terms[doc]
+        return sum(self.idf(term) for term in query_terms if term in present) / total